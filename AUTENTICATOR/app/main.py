@@ -1,12 +1,32 @@
 from fastapi import FastAPI
+from sqlalchemy import text
 from route.auth_notion import router as auth_routes
+from models.db_config import engine, Base
+from models import schemas  # registra as tabelas em Base.metadata
+from models.esquema import preparar_depois_das_tabelas
+from utils.pool import estatisticas_do_pool
+from utils.lag_loop import medidor_lag
 import uvicorn
 
+# Mesma chave do PROCESs: os serviços não alteram o esquema ao mesmo tempo
+CHAVE_LOCK_PREPARACAO = 8003
+
+# Ciclo de vida: esquema das tabelas de usuários e amostragem do atraso do event loop
+async def lifespan(app: FastAPI):
+    medidor_lag.iniciar()
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": CHAVE_LOCK_PREPARACAO})
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(preparar_depois_das_tabelas)
+    yield
+    await medidor_lag.parar()
+
 # Instância principal do aplicativo FastAPI
 app = FastAPI(
     title="Notion Integration API",
     description="API para integração com Notion e manipulação de intimações",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Incluindo as rotas de autenticação
@@ -20,6 +40,16 @@ async def root():
     """
     return {"message": "Notion Integration API is running!"}
 
+# Telemetria do pool de conexões
+@app.get("/metricas/pool", tags=["Health Check"])
+async def metricas_pool():
+    return estatisticas_do_pool(engine)
+
+# Atraso do event loop
+@app.get("/metricas/loop", tags=["Health Check"])
+async def metricas_loop():
+    return medidor_lag.como_dict()
+
 # Ponto de entrada para iniciar o servidor automaticamente
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,40 @@
+from sqlalchemy import text
+
+# Ajustes em tabelas que já existiam antes das colunas e triggers atuais;
+# create_all não altera tabelas existentes. Todos os comandos são idempotentes.
+
+# Marcação de credenciais recusadas pelo PROCESs (PROCESs/app/services/credenciais.py);
+# a troca do token do Notion ou da matrícula limpa a marcação
+CREDENCIAIS_INVALIDAS = [
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS credencial_invalida_em timestamptz",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS credencial_invalida_origem varchar",
+    """
+    CREATE OR REPLACE FUNCTION limpar_credencial_invalida() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        NEW.credencial_invalida_em := NULL;
+        NEW.credencial_invalida_origem := NULL;
+        RETURN NEW;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS tg_users_credencial_trocada ON users",
+    "CREATE TRIGGER tg_users_credencial_trocada BEFORE UPDATE OF access_token, matricula ON users "
+    "FOR EACH ROW WHEN (OLD.access_token IS DISTINCT FROM NEW.access_token "
+    "OR OLD.matricula IS DISTINCT FROM NEW.matricula) "
+    "EXECUTE FUNCTION limpar_credencial_invalida()",
+]
+
+# O cache de credenciais por NOTIFY foi removido; apaga os triggers que ele criava
+CACHE_CREDENCIAIS_REMOVIDO = [
+    "DROP TRIGGER IF EXISTS tg_users_credenciais ON users",
+    "DROP TRIGGER IF EXISTS tg_notion_databases_credenciais ON notion_databases",
+    "DROP FUNCTION IF EXISTS notificar_credenciais()",
+]
+
+DEPOIS_DAS_TABELAS = CREDENCIAIS_INVALIDAS + CACHE_CREDENCIAIS_REMOVIDO
+
+
+def preparar_depois_das_tabelas(conn):
+    for comando in DEPOIS_DAS_TABELAS:
+        conn.execute(text(comando))
@@ -14,6 +14,9 @@ class User(Base):
     tipo = Column(String, nullable=True, unique=True)
     access_token = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Preenchidas pelo PROCESs quando a AASP ou o Notion recusam a credencial
+    credencial_invalida_em = Column(DateTime(timezone=True), nullable=True)
+    credencial_invalida_origem = Column(String, nullable=True)
 
     notion_databases = relationship(
         "NotionDatabase", 
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Request
 import requests
 import base64
 from services.run_notion import run_notion_process
-from utils.settings import REDIRECT_URI, NOTION_CLIENT_SECRET, NOTION_CLIENT_ID
+from utils.settings import REDIRECT_URI, NOTION_CLIENT_SECRET, NOTION_CLIENT_ID, NOTION_API_URL
 import uuid
 from utils.logger import logger
 import asyncio
@@ -19,7 +19,7 @@ router = APIRouter()
     retry=retry_if_exception_type(requests.RequestException),
 )
 def obter_access_token(payload, headers):
-    token_url = "https://api.notion.com/v1/oauth/token"
+    token_url = f"{NOTION_API_URL}/oauth/token"
     response = requests.post(token_url, json=payload, headers=headers, timeout=10)
     response.raise_for_status()
     return response.json()
@@ -2,7 +2,8 @@ from fastapi import HTTPException
 from pydantic import BaseModel, Field
 import httpx
 from utils.logger import logger
-from utils.settings import NOTION_VERSION
+from utils.relatorio import AmostraErros
+from utils.settings import NOTION_VERSION, NOTION_API_URL
 from services.notion_services.formatter import formatar_dados_para_notion
 from sqlalchemy.orm import Session
 from models.schemas import NotionDatabase, User
@@ -17,7 +18,7 @@ class IntimacaoRequest(BaseModel):
     ano: int = Field(..., ge=1900, le=2100, example=2024)
 
 async def consultar_banco(access_token: str, database_id: str):
-    url = f"https://api.notion.com/v1/databases/{database_id}/query"
+    url = f"{NOTION_API_URL}/databases/{database_id}/query"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
@@ -53,7 +54,7 @@ async def criar_banco_de_dados(
             await db.commit()
             usuario = novo_usuario
 
-        url = "https://api.notion.com/v1/databases"
+        url = f"{NOTION_API_URL}/databases"
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
@@ -118,43 +119,37 @@ async def criar_banco_de_dados(
 async def enviar_dados_para_notion(
     user_uuid: str, intimacoes: list, access_token: str, notion_database_id: str, db: Session
 ):
-    url = "https://api.notion.com/v1/pages"
+    url = f"{NOTION_API_URL}/pages"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
         "Notion-Version": "2022-06-28"
     }
     success_count = 0
-    error_count = 0
-    success_details = []
-    error_details = []
+    erros = AmostraErros(f"notion {notion_database_id}")
     for index, intimacao in enumerate(intimacoes, start=1):
         try:
             dados_formatados = formatar_dados_para_notion(intimacao)
             if not dados_formatados:
-                error_count += 1
-                error_details.append({"index": index, "error": "Dados não formatados corretamente"})
+                erros.registrar({"index": index, "error": "Dados não formatados corretamente"})
                 continue
             payload = {"parent": {"database_id": notion_database_id}, "properties": dados_formatados}
             async with httpx.AsyncClient() as client:
                 response = await client.post(url, headers=headers, json=payload)
                 if response.status_code == 200:
                     success_count += 1
-                    success_details.append({"index": index, "response": response.json()})
                 else:
-                    error_count += 1
-                    error_details.append({"index": index, "status_code": response.status_code, "response": response.text})
+                    erros.registrar({"index": index, "status_code": response.status_code, "response": response.text})
         except Exception as e:
-            error_count += 1
-            error_details.append({"index": index, "error": str(e)})
+            erros.registrar({"index": index, "error": str(e)})
     return {
         "success": success_count,
-        "errors": error_count,
-        "details": {"success": success_details, "errors": error_details}
+        "errors": erros.total,
+        "details": erros.como_dict()
     }
 
 async def criar_banco_matricula(parent_id: str, access_token: str):
-    url = "https://api.notion.com/v1/databases"
+    url = f"{NOTION_API_URL}/databases"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
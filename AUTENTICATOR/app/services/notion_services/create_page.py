@@ -1,11 +1,11 @@
 import requests
 from utils.logger import logger
-from utils.settings import NOTION_VERSION
+from utils.settings import NOTION_VERSION, NOTION_API_URL
 from models.schemas import NotionDatabase
 
 
 def criar_pagina_pai_no_workspace(access_token: str, titulo: str, pagina_id: str):
-    url = "https://api.notion.com/v1/pages"
+    url = f"{NOTION_API_URL}/pages"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
@@ -32,7 +32,7 @@ def criar_pagina_pai_no_workspace(access_token: str, titulo: str, pagina_id: str
         return None
 
 def listar_paginas_existentes(access_token: str, nome_busca: str = None):
-    url = "https://api.notion.com/v1/search"
+    url = f"{NOTION_API_URL}/search"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
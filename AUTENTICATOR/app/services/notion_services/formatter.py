@@ -1,6 +1,8 @@
 import httpx
 from sqlalchemy.orm import Session
 from utils.logger import logger
+from utils.relatorio import AmostraErros
+from utils.settings import NOTION_API_URL
 
 
 def formatar_dados_para_notion(dados_json: dict) -> dict:
@@ -40,7 +42,7 @@ async def enviar_dados_para_notion(
     logger.debug(f"Usuário: {user_uuid}, DEFAULT_DATABASE_ID={notion_database_id}")
     # logger.debug(f"Usuário: {user_uuid}, ACCESS_TOKEN={access_token}, DEFAULT_DATABASE_ID={notion_database_id}")
 
-    url = "https://api.notion.com/v1/pages"
+    url = f"{NOTION_API_URL}/pages"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
@@ -48,9 +50,7 @@ async def enviar_dados_para_notion(
     }
 
     success_count = 0
-    error_count = 0
-    success_details = []
-    error_details = []
+    erros = AmostraErros(f"notion {notion_database_id}")
 
     for index, intimacao in enumerate(intimacoes, start=1):
         try:
@@ -58,8 +58,7 @@ async def enviar_dados_para_notion(
 
             if not dados_formatados:
                 logger.error(f"Intimação {index}: Dados não formatados corretamente.")
-                error_count += 1
-                error_details.append({"index": index, "error": "Dados não formatados corretamente"})
+                erros.registrar({"index": index, "error": "Dados não formatados corretamente"})
                 continue
 
             payload = {
@@ -71,13 +70,11 @@ async def enviar_dados_para_notion(
                 response = await client.post(url, headers=headers, json=payload)
 
                 if response.status_code == 200:
-                    logger.info(f"Intimação {index}: Dados enviados com sucesso ao Notion.")
+                    logger.info(f"Intimação {index}: Dados enviados com sucesso ao Notion.", extra={"amostra": "notion.envio"})
                     success_count += 1
-                    success_details.append({"index": index, "response": response.json()})
                 else:
                     logger.error(f"Intimação {index}: Erro ao enviar dados ({response.status_code}): {response.text}")
-                    error_count += 1
-                    error_details.append({
+                    erros.registrar({
                         "index": index,
                         "status_code": response.status_code,
                         "response": response.text
@@ -85,16 +82,12 @@ async def enviar_dados_para_notion(
 
         except Exception as e:
             logger.exception(f"Intimação {index}: Erro ao processar intimação: {str(e)}")
-            error_count += 1
-            error_details.append({"index": index, "error": str(e)})
+            erros.registrar({"index": index, "error": str(e)})
 
-    logger.info(f"Envio concluído: {success_count} enviados com sucesso, {error_count} erros.")
+    logger.info(f"Envio concluído: {success_count} enviados com sucesso, {erros.total} erros.")
 
     return {
         "success": success_count,
-        "errors": error_count,
-        "details": {
-            "success": success_details,
-            "errors": error_details
-        }
+        "errors": erros.total,
+        "details": erros.como_dict()
     }
@@ -0,0 +1,60 @@
+import asyncio
+import time
+from bisect import bisect_left
+from utils.settings import LAG_LOOP_INTERVALO
+
+# Limites (em ms) das faixas do histograma de atraso do event loop
+FAIXAS_LAG_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class MedidorLag:
+    """
+    Atraso do event loop do serviço: quanto um ``sleep(intervalo)`` passa do
+    previsto. Os contadores acumulam desde a subida; para medir um período
+    (ex.: um teste de carga), leia ``/metricas/loop`` antes e depois e use a
+    diferença.
+    """
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.amostras = 0
+        self.lag_total_s = 0.0
+        self.lag_maximo_s = 0.0
+        self.histograma = [0] * (len(FAIXAS_LAG_MS) + 1)
+        self._tarefa = None
+
+    def registrar(self, segundos: float):
+        self.amostras += 1
+        self.lag_total_s += segundos
+        self.lag_maximo_s = max(self.lag_maximo_s, segundos)
+        self.histograma[bisect_left(FAIXAS_LAG_MS, segundos * 1000)] += 1
+
+    async def _medir(self):
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(self.intervalo)
+            self.registrar(max(0.0, time.perf_counter() - inicio - self.intervalo))
+
+    def iniciar(self):
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._medir())
+
+    async def parar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+
+    def como_dict(self) -> dict:
+        faixas = [f"<={limite}ms" for limite in FAIXAS_LAG_MS] + [f">{FAIXAS_LAG_MS[-1]}ms"]
+        return {
+            "intervalo_ms": round(self.intervalo * 1000, 3),
+            "amostras": self.amostras,
+            "lag_total_ms": round(self.lag_total_s * 1000, 3),
+            "lag_medio_ms": round(self.lag_total_s / self.amostras * 1000, 3) if self.amostras else 0.0,
+            "lag_maximo_ms": round(self.lag_maximo_s * 1000, 3),
+            "histograma_lag": dict(zip(faixas, self.histograma)),
+        }
+
+
+medidor_lag = MedidorLag(LAG_LOOP_INTERVALO)
@@ -0,0 +1,94 @@
+import time
+from bisect import bisect_left
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from utils.settings import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_PREPARED_STATEMENT_CACHE_SIZE,
+)
+
+# Limites (em ms) das faixas do histograma de espera por conexão
+FAIXAS_ESPERA_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class TelemetriaPool:
+    """Espera por conexão, eventos de overflow e timeouts do pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.overflows = 0
+        self.timeouts = 0
+        self.espera_total_s = 0.0
+        self.espera_maxima_s = 0.0
+        self.histograma = [0] * (len(FAIXAS_ESPERA_MS) + 1)
+
+    def registrar_espera(self, segundos: float):
+        self.checkouts += 1
+        self.espera_total_s += segundos
+        self.espera_maxima_s = max(self.espera_maxima_s, segundos)
+        self.histograma[bisect_left(FAIXAS_ESPERA_MS, segundos * 1000)] += 1
+
+    def como_dict(self) -> dict:
+        faixas = [f"<={limite}ms" for limite in FAIXAS_ESPERA_MS] + [f">{FAIXAS_ESPERA_MS[-1]}ms"]
+        return {
+            "checkouts": self.checkouts,
+            "overflows": self.overflows,
+            "timeouts": self.timeouts,
+            "espera_media_ms": round(self.espera_total_s / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "espera_maxima_ms": round(self.espera_maxima_s * 1000, 3),
+            "histograma_espera": dict(zip(faixas, self.histograma)),
+        }
+
+
+telemetria_pool = TelemetriaPool()
+
+
+class PoolMedido(AsyncAdaptedQueuePool):
+    """Pool padrão do engine assíncrono, medindo o tempo até obter cada conexão."""
+
+    def _do_get(self):
+        overflow_antes = self._overflow
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except exc.TimeoutError:
+            telemetria_pool.timeouts += 1
+            raise
+        telemetria_pool.registrar_espera(time.perf_counter() - inicio)
+        if self._overflow > max(0, overflow_antes):
+            telemetria_pool.overflows += 1
+        return conexao
+
+
+def opcoes_do_engine() -> dict:
+    """Argumentos de ``create_async_engine`` definidos pela configuração."""
+    return {
+        "poolclass": PoolMedido,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "connect_args": {
+            # Cache do asyncpg e do adaptador do SQLAlchemy; 0 desliga (ex.: pgbouncer em modo transação)
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE,
+        },
+    }
+
+
+def estatisticas_do_pool(engine) -> dict:
+    pool = engine.pool
+    return {
+        "tamanho": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "em_uso": pool.checkedout(),
+        "livres": pool.checkedin(),
+        "overflow_atual": max(0, pool.overflow()),
+        **telemetria_pool.como_dict(),
+    }
@@ -1,10 +1,20 @@
 import asyncio
 import os
 from fastapi import FastAPI
-from route.endpoint import router as process_routes
+from sqlalchemy import text
+from route.endpoint import router as process_routes, encerrar_jobs, retomar_jobs, coletar_jobs, renovar_leases, admitir_job
 from models.db_config import engine, Base
+from models.esquema import preparar_antes_das_tabelas, preparar_depois_das_tabelas
 from utils.logger import logger
 from utils.resoucer import fila_uuids
+from utils.pool import estatisticas_do_pool
+from utils.lag_loop import medidor_lag
+from services.drenagem import drenagem
+from services.sincronizacao import executar_agenda
+from utils.settings import DRENAGEM_PRAZO, PROCESS_DISTRIBUIDO, SINCRONIZACAO_ATIVA
+
+# Serializa a preparação do banco entre processos que sobem ao mesmo tempo
+CHAVE_LOCK_PREPARACAO = 8003
 
 # Configuração de trabalhadores
 MAX_WORKERS = 3  # Número máximo de trabalhadores
@@ -29,21 +39,51 @@ async def worker(worker_id: int):
 # Ciclo de vida da aplicação
 async def lifespan(app: FastAPI):
     logger.info("Iniciando a API...")
+    loop = asyncio.get_running_loop()
+    drenagem.instalar(loop)
+    medidor_lag.iniciar()
 
     # Inicializar o banco de dados
     async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": CHAVE_LOCK_PREPARACAO})
+        await conn.run_sync(preparar_antes_das_tabelas)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(preparar_depois_das_tabelas)
     logger.info("Banco de dados inicializado com sucesso.")
 
     # Inicializar os trabalhadores
     logger.info(f"Iniciando {MAX_WORKERS} trabalhadores...")
-    for i in range(MAX_WORKERS):
-        asyncio.create_task(worker(i))
+    trabalhadores = [asyncio.create_task(worker(i)) for i in range(MAX_WORKERS)]
+
+    # Modo distribuído: os jobs vêm da fila no banco, inclusive os interrompidos
+    if PROCESS_DISTRIBUIDO:
+        coordenacao = [asyncio.create_task(coletar_jobs()), asyncio.create_task(renovar_leases())]
+    else:
+        coordenacao = []
+        await retomar_jobs()
+
+    # Sincronização diária de todos os usuários, escalonada na janela configurada
+    if SINCRONIZACAO_ATIVA:
+        coordenacao.append(asyncio.create_task(executar_agenda(admitir_job)))
 
     yield
 
-    # Finalizar recursos
+    # Finalizar recursos: drenar jobs e fila dentro do prazo antes de fechar o banco
     logger.info("Encerrando a API...")
+    prazo_final = loop.time() + DRENAGEM_PRAZO
+    drenagem.iniciar()
+    for tarefa in coordenacao:
+        tarefa.cancel()
+    await asyncio.gather(*coordenacao, return_exceptions=True)
+    await encerrar_jobs(DRENAGEM_PRAZO)
+    try:
+        await asyncio.wait_for(fila_uuids.join(), timeout=max(0.0, prazo_final - loop.time()))
+    except asyncio.TimeoutError:
+        logger.warning(f"{fila_uuids.qsize()} UUID(s) ficaram na fila sem processamento.")
+    for trabalhador in trabalhadores:
+        trabalhador.cancel()
+    await asyncio.gather(*trabalhadores, return_exceptions=True)
+    await medidor_lag.parar()
     await engine.dispose()
     logger.info("Conexão com o banco de dados encerrada.")
 
@@ -67,6 +107,16 @@ async def healthcheck():
     logger.info("Healthcheck chamado.")
     return {"status": "ok", "message": "Serviço operando normalmente"}
 
+# Telemetria do pool de conexões
+@app.get("/metricas/pool", tags=["Status"])
+async def metricas_pool():
+    return estatisticas_do_pool(engine)
+
+# Atraso do event loop
+@app.get("/metricas/loop", tags=["Status"])
+async def metricas_loop():
+    return medidor_lag.como_dict()
+
 if __name__ == "__main__":
     import uvicorn
 
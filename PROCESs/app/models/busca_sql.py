@@ -0,0 +1,29 @@
+from sqlalchemy import text
+from models.models import EXPRESSAO_BUSCA
+
+# unaccent() é apenas STABLE; o wrapper com dicionário explícito é IMMUTABLE e
+# pode ser usado na coluna gerada e no índice GIN de intimacoes.busca.
+ANTES_DAS_TABELAS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+    $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """,
+]
+
+# Bancos em que a tabela intimacoes já existia antes da coluna de busca
+DEPOIS_DAS_TABELAS = [
+    f"ALTER TABLE intimacoes ADD COLUMN IF NOT EXISTS busca tsvector GENERATED ALWAYS AS ({EXPRESSAO_BUSCA}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_intimacoes_busca ON intimacoes USING gin (busca)",
+]
+
+
+def preparar_antes_das_tabelas(conn):
+    for comando in ANTES_DAS_TABELAS:
+        conn.execute(text(comando))
+
+
+def preparar_depois_das_tabelas(conn):
+    for comando in DEPOIS_DAS_TABELAS:
+        conn.execute(text(comando))
@@ -1,20 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from utils.settings import DATABASE_URL
+from utils.settings import DATABASE_URL, DB_ECHO
+from utils.pool import opcoes_do_engine
 from sqlalchemy.ext.declarative import declarative_base
-import logging
-
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from utils.logger import logger
 
 Base = declarative_base()
 
-engine = create_async_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    echo=True
-)
+engine = create_async_engine(DATABASE_URL, echo=DB_ECHO, **opcoes_do_engine())
+
+def dsn_asyncpg() -> str:
+    """DSN do banco para conexões asyncpg dedicadas (fora do pool)."""
+    return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
 
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
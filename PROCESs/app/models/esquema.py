@@ -0,0 +1,24 @@
+from sqlalchemy import text
+from models import busca_sql
+
+# Ajustes em tabelas que já existiam antes das colunas e triggers atuais;
+# create_all não altera tabelas existentes. Todos os comandos são idempotentes.
+# As tabelas users e notion_databases pertencem ao AUTENTICATOR, que faz os
+# ajustes delas em AUTENTICATOR/app/models/esquema.py.
+
+# Blocos anexados ao corpo das páginas (services/notion/versoes.py)
+PAGINAS_NOTION = [
+    "ALTER TABLE paginas_notion ADD COLUMN IF NOT EXISTS blocos jsonb",
+]
+
+DEPOIS_DAS_TABELAS = PAGINAS_NOTION
+
+
+def preparar_antes_das_tabelas(conn):
+    busca_sql.preparar_antes_das_tabelas(conn)
+
+
+def preparar_depois_das_tabelas(conn):
+    busca_sql.preparar_depois_das_tabelas(conn)
+    for comando in DEPOIS_DAS_TABELAS:
+        conn.execute(text(comando))
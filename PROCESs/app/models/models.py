@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Float, BigInteger, Date, Computed, Index
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from models.db_config import Base
@@ -13,6 +14,8 @@ class User(Base):
     codigo_aasp = Column(String, nullable=True, unique=True)
     access_token = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    credencial_invalida_em = Column(DateTime(timezone=True), nullable=True)
+    credencial_invalida_origem = Column(String, nullable=True)
 
     notion_databases = relationship(
         "NotionDatabase", 
@@ -32,4 +35,104 @@ class NotionDatabase(Base):
         "User", 
         back_populates="notion_databases", 
         lazy="selectin"
-    )
\ No newline at end of file
+    )
+
+class JobResumo(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, nullable=False)
+    tipo = Column(String, nullable=False)
+    matricula = Column(String, nullable=False, index=True)
+    estado = Column(String, nullable=False)
+    mensagem = Column(String, nullable=True)
+    dias_total = Column(Integer, nullable=False, default=0)
+    dias_com_erro = Column(Integer, nullable=False, default=0)
+    intimacoes_encontradas = Column(Integer, nullable=False, default=0)
+    paginas_escritas = Column(Integer, nullable=False, default=0)
+    paginas_com_erro = Column(Integer, nullable=False, default=0)
+    total_erros = Column(Integer, nullable=False, default=0)
+    duracao_s = Column(Float, nullable=True)
+    criado_em = Column(DateTime(timezone=True), nullable=False)
+    finalizado_em = Column(DateTime(timezone=True), nullable=True)
+
+# Vetor de busca textual: sem acentos (f_unaccent, criada em models/busca_sql.py),
+# com o número do processo e o título pesando mais que o corpo da publicação.
+EXPRESSAO_BUSCA = (
+    "setweight(to_tsvector('simple', f_unaccent(coalesce(numero_processo, ''))), 'A') || "
+    "setweight(to_tsvector('portuguese', f_unaccent(coalesce(titulo, ''))), 'A') || "
+    "setweight(to_tsvector('portuguese', f_unaccent(coalesce(dados->>'cabecalho', ''))), 'B') || "
+    "setweight(to_tsvector('portuguese', f_unaccent(coalesce(dados->>'textoPublicacao', ''))), 'C')"
+)
+
+class Intimacao(Base):
+    """Arquivo local das intimações recebidas da AASP, particionado por mês de publicação."""
+    __tablename__ = "intimacoes"
+    __table_args__ = (
+        Index("ix_intimacoes_busca", "busca", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (data_publicacao)"},
+    )
+
+    matricula = Column(String, primary_key=True, nullable=False)
+    numero_publicacao = Column(BigInteger, primary_key=True, nullable=False)
+    codigo_relacionamento = Column(BigInteger, primary_key=True, nullable=False)
+    data_publicacao = Column(Date, primary_key=True, nullable=False)
+    codigo_aasp = Column(String, nullable=True)
+    numero_arquivo = Column(BigInteger, nullable=True)
+    numero_processo = Column(String, nullable=True, index=True)
+    titulo = Column(String, nullable=True)
+    jornal = Column(String, nullable=True)
+    dados = Column(JSONB, nullable=False)
+    busca = Column(TSVECTOR, Computed(EXPRESSAO_BUSCA, persisted=True))
+    recebido_em = Column(DateTime(timezone=True), server_default=func.now())
+
+class PaginaNotion(Base):
+    """Página criada no Notion para uma intimação, com o hash do conteúdo enviado."""
+    __tablename__ = "paginas_notion"
+
+    notion_database_id = Column(String, primary_key=True, nullable=False)
+    numero_publicacao = Column(BigInteger, primary_key=True, nullable=False)
+    codigo_relacionamento = Column(BigInteger, primary_key=True, nullable=False)
+    page_id = Column(String, nullable=False)
+    hash_conteudo = Column(String, nullable=True)
+    blocos = Column(JSONB, nullable=True)  # ids dos blocos anexados pelo serviço; nulo em páginas adotadas
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class JobCheckpoint(Base):
+    """Estado de um job interrompido no desligamento, para ser retomado na próxima subida."""
+    __tablename__ = "jobs_checkpoints"
+
+    job_id = Column(String, primary_key=True, nullable=False)
+    tipo = Column(String, nullable=False)
+    matricula = Column(String, nullable=False, index=True)
+    payload = Column(JSONB, nullable=False)
+    dias = Column(JSONB, nullable=False)
+    intimacoes = Column(JSONB, nullable=False)
+    paginas_escritas = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class JobFila(Base):
+    """Jobs aceitos no modo distribuído; cada processo reivindica os seus com SKIP LOCKED."""
+    __tablename__ = "jobs_fila"
+    __table_args__ = (
+        Index("ix_jobs_fila_estado_criado", "estado", "criado_em"),
+    )
+
+    job_id = Column(String, primary_key=True, nullable=False)
+    tipo = Column(String, nullable=False)
+    matricula = Column(String, nullable=False, index=True)
+    payload = Column(JSONB, nullable=False)
+    estado = Column(String, nullable=False)
+    dono = Column(String, nullable=True)
+    lease_ate = Column(DateTime(timezone=True), nullable=True)
+    tentativas = Column(Integer, nullable=False, default=0)
+    progresso = Column(JSONB, nullable=True)
+    criado_em = Column(DateTime(timezone=True), server_default=func.now())
+
+class SincronizacaoDiaria(Base):
+    """Última data em que a sincronização diária de cada usuário foi enfileirada."""
+    __tablename__ = "sincronizacoes_diarias"
+
+    uuid = Column(String, ForeignKey("users.uuid", ondelete="CASCADE"), primary_key=True, nullable=False)
+    data = Column(Date, nullable=False)
+    job_id = Column(String, nullable=True)
+    enfileirado_em = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
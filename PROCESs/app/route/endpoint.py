@@ -1,13 +1,345 @@
-from fastapi import FastAPI, APIRouter,Body
-from services.notion.route import processar_intimacao_empresa, processar_intimacao_associado
-from utils.resoucer import UserPayload
+from fastapi import FastAPI, APIRouter,Body, HTTPException, Query
+from services.notion.route import processar_intimacao_empresa, processar_intimacao_associado, processar_reenvio
+from utils.resoucer import UserPayload, ReenvioPayload
 from utils.logger import logger
-from fastapi.responses import JSONResponse
+from services.admissao import controle_admissao
+from services.jobs import Job, registro_jobs, persistir_resumo, obter_resumo
+from services.checkpoint import (
+    salvar_checkpoint,
+    carregar_checkpoints,
+    carregar_checkpoint,
+    remover_checkpoint,
+    remontar_payload,
+    payload_para_gravar,
+)
+from services import distribuicao
+from services.drenagem import drenagem
+from services.busca import buscar_publicacoes, TAMANHO_MAXIMO_PAGINA
+from services.credenciais import cache_negativo, AASP, NOTION
+from utils.serializacao import dumps
+from utils.settings import (
+    JOBS_SSE_HEARTBEAT,
+    DRENAGEM_PRAZO,
+    PROCESS_DISTRIBUIDO,
+    JOBS_LEASE_RENOVACAO,
+    JOBS_COLETA_INTERVALO,
+    ADMISSAO_RETRY_AFTER_PADRAO,
+    JOBS_PRAZO_CONTINUACOES_MAXIMAS,
+)
+from fastapi.responses import JSONResponse, StreamingResponse
 import asyncio
 
 app = FastAPI()
 router = APIRouter()
 
+# Referências às tarefas em andamento, para que não sejam coletadas antes do fim
+tarefas_em_andamento = set()
+
+PROCESSADORES = {
+    "empresa": (processar_intimacao_empresa, UserPayload),
+    "associado": (processar_intimacao_associado, UserPayload),
+    "reenvio": (processar_reenvio, ReenvioPayload),
+}
+
+# Acorda os streams de eventos para que terminem assim que o desligamento começar
+drenagem.ao_iniciar(lambda: [job._notificar() for job in registro_jobs.ativos()])
+
+
+def resposta_encerrando() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Serviço em desligamento. Tente novamente em instantes."},
+        headers={"Retry-After": str(int(DRENAGEM_PRAZO))},
+    )
+
+
+def resposta_sobrecarga(retry_after: int = None) -> JSONResponse:
+    retry_after = retry_after or controle_admissao.retry_after()
+    logger.warning(f"Limite de admissão atingido: {controle_admissao.estatisticas()}. Retry-After: {retry_after}s")
+    return JSONResponse(
+        status_code=429,
+        content={"message": "Serviço sobrecarregado. Tente novamente mais tarde."},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def resposta_credencial_invalida(credenciais: list):
+    """
+    409 com Retry-After quando alguma das ``(origem, credencial)`` foi recusada
+    recentemente, para não despachar um job que falharia do mesmo jeito.
+    """
+    for origem, credencial in credenciais:
+        motivo = cache_negativo.consultar(origem, credencial)
+        if motivo:
+            logger.warning(f"Job recusado: credencial {origem} marcada como inválida ({motivo}).")
+            return JSONResponse(
+                status_code=409,
+                content={"message": f"Credencial {origem} recusada recentemente. Revalide as credenciais.", "origem": origem},
+                headers={"Retry-After": str(cache_negativo.segundos_restantes(origem, credencial))},
+            )
+    return None
+
+
+def resposta_job_aceito(job_id: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={"message": "Processamento iniciado.", "job_id": job_id},
+        headers={"Location": f"/jobs/{job_id}"},
+    )
+
+
+async def admitir_job(tipo: str, payload):
+    """
+    Executa o job neste processo ou, no modo distribuído, grava-o na fila
+    compartilhada para que o primeiro processo com vaga o reivindique.
+    Retorna o id do job, ou ``None`` se não houver vaga.
+    """
+    if PROCESS_DISTRIBUIDO:
+        return await distribuicao.enfileirar(tipo, payload.matricula, payload_para_gravar(payload))
+
+    if not controle_admissao.tentar_admitir():
+        return None
+
+    # A vaga só é devolvida pela tarefa agendada; se ela nem chegar a existir,
+    # a reserva precisa ser desfeita aqui.
+    try:
+        job = registro_jobs.criar(tipo, payload.matricula, payload)
+        agendar_processamento(executar_job(job, PROCESSADORES[tipo][0], payload))
+    except BaseException:
+        controle_admissao.liberar_vaga()
+        raise
+    return job.id
+
+
+async def aceitar_job(tipo: str, payload) -> JSONResponse:
+    job_id = await admitir_job(tipo, payload)
+    if job_id is None:
+        return resposta_sobrecarga(ADMISSAO_RETRY_AFTER_PADRAO if PROCESS_DISTRIBUIDO else None)
+    return resposta_job_aceito(job_id)
+
+
+def agendar_processamento(coro):
+    tarefa = asyncio.create_task(controle_admissao.executar(coro))
+    tarefas_em_andamento.add(tarefa)
+    tarefa.add_done_callback(tarefas_em_andamento.discard)
+    return tarefa
+
+
+def agendar_quando_houver_vaga(coro):
+    async def aguardar_e_executar():
+        try:
+            await controle_admissao.aguardar_vaga()
+        except BaseException:
+            coro.close()
+            raise
+        if drenagem.encerrando:
+            # O job continua ativo e vira checkpoint em encerrar_jobs
+            controle_admissao.liberar_vaga()
+            coro.close()
+            return
+        await controle_admissao.executar(coro)
+
+    tarefa = asyncio.create_task(aguardar_e_executar())
+    tarefas_em_andamento.add(tarefa)
+    tarefa.add_done_callback(tarefas_em_andamento.discard)
+    return tarefa
+
+
+async def executar_job(job, processador, payload):
+    job.iniciar()
+    try:
+        resultado = await processador(payload, job)
+
+        if "error" in resultado:
+            logger.error(f"Erro no processamento ({job.tipo}): {resultado['error']}")
+            job.finalizar(erro=resultado["error"])
+        elif resultado.get("prazo_excedido"):
+            continuacao = await reenfileirar(job, resultado["prazo_excedido"])
+            mensagem = f"Prazo excedido na etapa {resultado['prazo_excedido']['etapa']}"
+            if continuacao:
+                mensagem += f"; restante reenfileirado no job {continuacao}"
+            logger.warning(f"{mensagem} ({job.tipo}, Matrícula: {job.matricula}).")
+            job.finalizar(erro=mensagem)
+        else:
+            logger.info(f"Processamento concluído ({job.tipo}): {resultado}")
+            job.finalizar(mensagem=resultado.get("message"))
+
+    except Exception as e:
+        logger.error(f"Erro inesperado ao processar {job.tipo}: {e}")
+        job.finalizar(erro=str(e))
+
+    await persistir_resumo(job)
+    if job.retomado:
+        await remover_checkpoint(job.id)
+    if PROCESS_DISTRIBUIDO:
+        await distribuicao.concluir(job.id)
+
+
+async def reenfileirar(job, prazo_excedido: dict):
+    """
+    Cria a continuação de um job que estourou o prazo, com os dias ainda não
+    consultados e, se a escrita não terminou, as intimações a reenviar (as
+    que já foram escritas são ignoradas pelo hash de conteúdo). Retorna o id
+    da continuação, ou ``None`` se o limite de continuações foi atingido.
+    """
+    if job.payload.continuacao >= JOBS_PRAZO_CONTINUACOES_MAXIMAS:
+        logger.error(f"Job {job.id} atingiu {JOBS_PRAZO_CONTINUACOES_MAXIMAS} continuação(ões); o restante não será reenfileirado.")
+        return None
+
+    payload = job.payload.model_copy(update={"continuacao": job.payload.continuacao + 1})
+    dias = {chave: "pendente" for chave, status in job.dias.items() if status != "concluido"}
+    intimacoes = job.intimacoes_coletadas if prazo_excedido.get("reescrever") else []
+    if not dias and not intimacoes:
+        # Nada restou; uma continuação vazia seria planejada do zero na retomada
+        return None
+
+    if PROCESS_DISTRIBUIDO:
+        continuacao = Job(job.tipo, job.matricula, payload)
+        continuacao.restaurar(dias, intimacoes)
+        await salvar_checkpoint(continuacao)
+        if await distribuicao.enfileirar(job.tipo, job.matricula, payload_para_gravar(payload), job_id=continuacao.id) is None:
+            logger.error(f"Fila global cheia; continuação do job {job.id} descartada.")
+            await remover_checkpoint(continuacao.id)
+            return None
+        return continuacao.id
+
+    continuacao = registro_jobs.criar(job.tipo, job.matricula, payload)
+    continuacao.restaurar(dias, intimacoes)
+    # Sem vaga agora, a continuação fica com a próxima liberada (em geral a do
+    # próprio job, que termina em seguida); no desligamento, vira checkpoint
+    agendar_quando_houver_vaga(executar_job(continuacao, PROCESSADORES[job.tipo][0], payload))
+    return continuacao.id
+
+
+async def encerrar_jobs(prazo: float):
+    """
+    Drena os jobs em andamento e salva checkpoint dos que foram interrompidos.
+    No modo distribuído, um job que ainda não tem progresso volta à fila sem
+    checkpoint: o payload já está em ``jobs_fila`` e ele recomeça do zero.
+    """
+    await drenagem.drenar(tarefas_em_andamento, prazo)
+    for job in registro_jobs.ativos():
+        if not PROCESS_DISTRIBUIDO or job.tem_progresso():
+            await salvar_checkpoint(job)
+        if PROCESS_DISTRIBUIDO:
+            await distribuicao.liberar(job.id)
+
+
+async def descartar_job(tipo: str, matricula: str, job_id: str, motivo: str):
+    """Registra como falho um job interrompido que não pode ser retomado."""
+    job = Job(tipo, matricula, job_id=job_id)
+    job.finalizar(erro=motivo)
+    await persistir_resumo(job)
+    await remover_checkpoint(job_id)
+
+
+async def retomar_jobs():
+    """Reagenda os jobs interrompidos no último desligamento."""
+    for checkpoint in await carregar_checkpoints():
+        processador, modelo = PROCESSADORES.get(checkpoint.tipo, (None, None))
+        if processador is None:
+            logger.warning(f"Checkpoint {checkpoint.job_id} com tipo desconhecido: {checkpoint.tipo}")
+            continue
+
+        payload = await remontar_payload(modelo, checkpoint.payload)
+        if payload is None:
+            await descartar_job(checkpoint.tipo, checkpoint.matricula, checkpoint.job_id, "Usuário não encontrado na retomada.")
+            continue
+
+        if not controle_admissao.tentar_admitir():
+            logger.warning("Limite de admissão atingido; os checkpoints restantes ficam para a próxima subida.")
+            return
+
+        try:
+            job = registro_jobs.criar(checkpoint.tipo, checkpoint.matricula, payload, job_id=checkpoint.job_id)
+            job.restaurar(checkpoint.dias, checkpoint.intimacoes, checkpoint.paginas_escritas)
+            logger.info(f"Retomando job {job.id} ({job.tipo}, Matrícula: {job.matricula}) a partir do checkpoint.")
+            agendar_processamento(executar_job(job, processador, payload))
+        except BaseException:
+            controle_admissao.liberar_vaga()
+            raise
+
+
+async def iniciar_reivindicado(linha):
+    """
+    Cria o job reivindicado da fila, retomando o checkpoint se houver. O token
+    do usuário é relido do cadastro, já que a fila não o guarda. A vaga
+    reservada por ``coletar_jobs`` é devolvida se o job não chegar a começar.
+    """
+    processador, modelo = PROCESSADORES[linha.tipo]
+    try:
+        payload = await remontar_payload(modelo, linha.payload)
+        checkpoint = await carregar_checkpoint(linha.job_id) if payload else None
+    except BaseException:
+        controle_admissao.liberar_vaga()
+        raise
+
+    if payload is None:
+        controle_admissao.liberar_vaga()
+        await descartar_job(linha.tipo, linha.matricula, linha.job_id, "Usuário não encontrado.")
+        await distribuicao.concluir(linha.job_id)
+        return
+
+    try:
+        job = registro_jobs.criar(linha.tipo, linha.matricula, payload, job_id=linha.job_id)
+        if checkpoint:
+            job.restaurar(checkpoint.dias, checkpoint.intimacoes, checkpoint.paginas_escritas)
+            logger.info(f"Job {job.id} retomado por {distribuicao.IDENTIDADE} a partir do checkpoint.")
+        agendar_processamento(executar_job(job, processador, payload))
+    except BaseException:
+        controle_admissao.liberar_vaga()
+        raise
+
+
+async def coletar_jobs():
+    """
+    Modo distribuído: reivindica jobs da fila compartilhada enquanto houver
+    vaga de execução neste processo.
+    """
+    while not drenagem.encerrando:
+        if not controle_admissao.tentar_admitir():
+            await asyncio.sleep(JOBS_COLETA_INTERVALO)
+            continue
+        try:
+            linha = await distribuicao.reivindicar()
+        except Exception as e:
+            logger.error(f"Erro ao reivindicar job da fila: {e}")
+            linha = None
+        if linha is None or linha.tipo not in PROCESSADORES:
+            controle_admissao.liberar_vaga()
+            if linha is not None:
+                logger.warning(f"Job {linha.job_id} com tipo desconhecido: {linha.tipo}")
+            await asyncio.sleep(JOBS_COLETA_INTERVALO)
+            continue
+        try:
+            await iniciar_reivindicado(linha)
+        except Exception as e:
+            # O lease expira e o job volta a ser reivindicável
+            logger.error(f"Erro ao iniciar o job {linha.job_id} reivindicado: {e}")
+            await asyncio.sleep(JOBS_COLETA_INTERVALO)
+
+
+async def renovar_leases():
+    """
+    Modo distribuído: mantém o lease e o progresso dos jobs deste processo e
+    registra como falhos os jobs da fila que esgotaram as tentativas.
+    """
+    while True:
+        await asyncio.sleep(JOBS_LEASE_RENOVACAO)
+        try:
+            await distribuicao.renovar(registro_jobs.ativos())
+        except Exception as e:
+            logger.error(f"Erro ao renovar leases dos jobs: {e}")
+        try:
+            for linha in await distribuicao.recolher_esgotados():
+                logger.error(f"Job {linha.job_id} ({linha.tipo}, Matrícula: {linha.matricula}) interrompido {linha.tentativas} vez(es); descartado.")
+                await descartar_job(
+                    linha.tipo, linha.matricula, linha.job_id,
+                    f"Processo encerrado durante a execução em {linha.tentativas} tentativa(s).",
+                )
+        except Exception as e:
+            logger.error(f"Erro ao recolher jobs que esgotaram as tentativas: {e}")
+
 
 @router.post("/empresa")
 async def intimacao_empresa(payload: UserPayload = Body(...)):
@@ -17,25 +349,14 @@ async def intimacao_empresa(payload: UserPayload = Body(...)):
         logger.error("Payload inválido: Matrícula e Código AASP são obrigatórios.")
         return JSONResponse(status_code=400, content={"message": "Matrícula e Código AASP são obrigatórios para empresa."})
 
-    # Return initial response immediately
-    response = JSONResponse(status_code=202, content={"message": "Processamento iniciado."})
-    
-    # Process the payload asynchronously
-    async def process_payload():
-        try:
-            resultado = await processar_intimacao_empresa(payload)
-
-            if "error" in resultado:
-                logger.error(f"Erro no processamento para empresa: {resultado['error']}")
-            else:
-                logger.info(f"Processamento concluído para empresa: {resultado}")
+    recusa = resposta_credencial_invalida([(AASP, payload.matricula), (NOTION, payload.access_token)])
+    if recusa:
+        return recusa
 
-        except Exception as e:
-            logger.error(f"Erro inesperado ao processar empresa: {e}")
-
-    asyncio.create_task(process_payload())
+    if drenagem.encerrando:
+        return resposta_encerrando()
 
-    return response
+    return await aceitar_job("empresa", payload)
 
 
 @router.post("/associado")
@@ -46,22 +367,92 @@ async def intimacao_empresa(payload: UserPayload = Body(...)):
         logger.error("Payload inválido: Matrícula é obrigatórios.")
         return JSONResponse(status_code=400, content={"message": "Matrícula é obrigatórios para associado."})
 
-    # Return initial response immediately
-    response = JSONResponse(status_code=202, content={"message": "Processamento iniciado."})
-    
-    # Process the payload asynchronously
-    async def process_payload():
-        try:
-            resultado = await processar_intimacao_associado(payload)
+    recusa = resposta_credencial_invalida([(AASP, payload.matricula), (NOTION, payload.access_token)])
+    if recusa:
+        return recusa
 
-            if "error" in resultado:
-                logger.error(f"Erro no processamento para empresa: {resultado['error']}")
-            else:
-                logger.info(f"Processamento concluído para associado: {resultado}")
+    if drenagem.encerrando:
+        return resposta_encerrando()
 
-        except Exception as e:
-            logger.error(f"Erro inesperado ao processar associado: {e}")
+    return await aceitar_job("associado", payload)
+
+
+@router.post("/reenviar")
+async def reenviar_arquivo(payload: ReenvioPayload = Body(...)):
+    logger.info(f"Recebido pedido de reenvio para Matrícula: {payload.matricula} ({payload.data_inicio} a {payload.data_fim})")
+
+    if payload.data_fim < payload.data_inicio:
+        return JSONResponse(status_code=400, content={"message": "data_fim deve ser posterior a data_inicio."})
+
+    recusa = resposta_credencial_invalida([(NOTION, payload.access_token)])
+    if recusa:
+        return recusa
+
+    if drenagem.encerrando:
+        return resposta_encerrando()
+
+    return await aceitar_job("reenvio", payload)
+
+
+@router.get("/jobs/{job_id}")
+async def consultar_job(job_id: str):
+    job = registro_jobs.obter(job_id)
+    if job:
+        return job.como_dict()
+
+    resumo = await obter_resumo(job_id)
+    if not resumo and PROCESS_DISTRIBUIDO:
+        resumo = await distribuicao.consultar(job_id)
+    if not resumo:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return resumo
+
+
+@router.get("/jobs/{job_id}/eventos")
+async def acompanhar_job(job_id: str):
+    """Envia o progresso do job por server-sent events até a sua conclusão."""
+    job = registro_jobs.obter(job_id)
+    if not job:
+        resumo = await obter_resumo(job_id)
+        if not resumo and PROCESS_DISTRIBUIDO:
+            # Job de outro processo: um evento com o último progresso publicado
+            resumo = await distribuicao.consultar(job_id)
+        if not resumo:
+            raise HTTPException(status_code=404, detail="Job não encontrado.")
+
+        async def evento_unico():
+            yield b"data: " + dumps(resumo) + b"\n\n"
+
+        return StreamingResponse(evento_unico(), media_type="text/event-stream")
+
+    async def eventos():
+        evento = job.assinar()
+        try:
+            yield b"data: " + dumps(job.como_dict()) + b"\n\n"
+            while not job.finalizado and not drenagem.encerrando:
+                try:
+                    await asyncio.wait_for(evento.wait(), timeout=JOBS_SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+                    continue
+                evento.clear()
+                yield b"data: " + dumps(job.como_dict()) + b"\n\n"
+        finally:
+            job.cancelar_assinatura(evento)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
-    asyncio.create_task(process_payload())
 
-    return response
\ No newline at end of file
+@router.get("/search")
+async def buscar(
+    matricula: str = Query(...),
+    q: str = Query(..., min_length=2),
+    pagina: int = Query(1, ge=1),
+    tamanho: int = Query(20, ge=1, le=TAMANHO_MAXIMO_PAGINA),
+):
+    """Busca textual ranqueada nas publicações arquivadas da matrícula."""
+    return await buscar_publicacoes(matricula, q, pagina, tamanho)
@@ -0,0 +1,115 @@
+import asyncio
+import math
+import time
+from collections import deque
+from utils.settings import (
+    ADMISSAO_LIMITE_EM_EXECUCAO,
+    ADMISSAO_LIMITE_FILA,
+    ADMISSAO_RETRY_AFTER_PADRAO,
+    ADMISSAO_RETRY_AFTER_MAXIMO,
+    por_processo,
+)
+
+
+class ControleAdmissao:
+    """
+    Limita quantos jobs executam ao mesmo tempo e quantos podem aguardar.
+
+    ``tentar_admitir`` reserva uma vaga (execução ou fila) e deve ser seguido
+    de ``executar``, que libera a vaga ao terminar. Quando não há vaga, o
+    chamador responde 429 com ``retry_after``, estimado a partir da taxa de
+    conclusão dos últimos jobs. ``aguardar_vaga`` é para o que não pode ser
+    recusado (continuações de jobs já aceitos): a próxima vaga liberada vai
+    para quem espera, antes de novos pedidos.
+    """
+
+    def __init__(self, limite_em_execucao: int, limite_fila: int, janela: int = 50):
+        self.limite_em_execucao = limite_em_execucao
+        self.limite_fila = limite_fila
+        self._semaforo = asyncio.Semaphore(limite_em_execucao)
+        self._admitidos = 0
+        self._em_execucao = 0
+        self._conclusoes = deque(maxlen=janela)
+        self._espera = deque()
+
+    @property
+    def capacidade(self) -> int:
+        return self.limite_em_execucao + self.limite_fila
+
+    def tentar_admitir(self) -> bool:
+        if self._admitidos >= self.capacidade:
+            return False
+        self._admitidos += 1
+        return True
+
+    def liberar_vaga(self):
+        """Devolve uma vaga reservada que não chegou a ser usada."""
+        self._admitidos -= 1
+        self._repassar_vagas()
+
+    async def aguardar_vaga(self):
+        """Reserva uma vaga, esperando a próxima liberada se não houver agora."""
+        if not self._espera and self.tentar_admitir():
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._espera.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # A vaga foi repassada no mesmo instante do cancelamento
+                self.liberar_vaga()
+            else:
+                self._espera.remove(future)
+            raise
+
+    def _repassar_vagas(self):
+        while self._espera and self._admitidos < self.capacidade:
+            future = self._espera.popleft()
+            if future.done():
+                continue
+            self._admitidos += 1
+            future.set_result(None)
+
+    async def executar(self, coro):
+        """Executa um job já admitido assim que houver vaga de execução."""
+        try:
+            async with self._semaforo:
+                self._em_execucao += 1
+                try:
+                    return await coro
+                finally:
+                    self._em_execucao -= 1
+                    self._conclusoes.append(time.monotonic())
+        finally:
+            self._admitidos -= 1
+            self._repassar_vagas()
+
+    def taxa_de_vazao(self) -> float:
+        """Jobs concluídos por segundo na janela recente."""
+        if len(self._conclusoes) < 2:
+            return 0.0
+        intervalo = time.monotonic() - self._conclusoes[0]
+        return (len(self._conclusoes) - 1) / intervalo if intervalo > 0 else 0.0
+
+    def retry_after(self) -> int:
+        """Segundos estimados até que uma vaga seja liberada."""
+        taxa = self.taxa_de_vazao()
+        if taxa <= 0:
+            return ADMISSAO_RETRY_AFTER_PADRAO
+        excedente = self._admitidos - self.capacidade + 1
+        return min(ADMISSAO_RETRY_AFTER_MAXIMO, max(1, math.ceil(excedente / taxa)))
+
+    def estatisticas(self) -> dict:
+        return {
+            "em_execucao": self._em_execucao,
+            "na_fila": self._admitidos - self._em_execucao,
+            "aguardando_vaga": len(self._espera),
+            "taxa_de_vazao": round(self.taxa_de_vazao(), 3),
+        }
+
+
+controle_admissao = ControleAdmissao(
+    limite_em_execucao=por_processo(ADMISSAO_LIMITE_EM_EXECUCAO),
+    limite_fila=por_processo(ADMISSAO_LIMITE_FILA),
+)
@@ -0,0 +1,151 @@
+import asyncio
+import contextvars
+import sys
+from collections import deque
+from utils.settings import (
+    AGENDADOR_LIMITE_GLOBAL,
+    AGENDADOR_LIMITE_POR_USUARIO,
+    AGENDADOR_CUSTO_BUSCA,
+    AGENDADOR_CUSTO_ESCRITA,
+    por_processo,
+)
+
+BUSCA = "busca"  # busca de um dia na API da AASP
+ESCRITA = "escrita"  # escrita de uma página no Notion
+CONSULTA = "consulta"  # consulta a um banco do Notion
+
+CUSTOS = {BUSCA: AGENDADOR_CUSTO_BUSCA, ESCRITA: AGENDADOR_CUSTO_ESCRITA, CONSULTA: AGENDADOR_CUSTO_ESCRITA}
+
+
+class _Unidade:
+    __slots__ = ("usuario", "tipo", "fabrica", "inicio_virtual", "future", "contexto", "tarefa")
+
+    def __init__(self, usuario, tipo, fabrica, inicio_virtual, future, contexto):
+        self.usuario = usuario
+        self.tipo = tipo
+        self.fabrica = fabrica
+        self.inicio_virtual = inicio_virtual
+        self.future = future
+        self.contexto = contexto
+        self.tarefa = None
+
+
+class AgendadorJusto:
+    """
+    Intercala unidades de trabalho (busca de um dia, escrita de uma página)
+    de vários usuários com enfileiramento justo ponderado (start-time fair
+    queuing).
+
+    Cada usuário tem uma fila FIFO; a unidade recebe a marca de início
+    ``max(tempo_virtual, fim_anterior_do_usuario)`` e o usuário avança
+    ``custo / peso``. Sempre que há vaga, executa a unidade com menor marca
+    entre os usuários abaixo do limite individual, de modo que um backfill
+    grande recebe apenas a sua fatia e não atrasa as sincronizações pequenas.
+    """
+
+    def __init__(self, limite_global: int, limite_por_usuario: int):
+        self.limite_global = limite_global
+        self.limite_por_usuario = limite_por_usuario
+        self._filas = {}
+        self._fim_virtual = {}
+        self._em_execucao = {}
+        self._tempo_virtual = 0.0
+        self._total_em_execucao = 0
+        self._tarefas = set()
+
+    async def executar(self, usuario: str, tipo: str, fabrica, peso: float = 1.0):
+        """
+        Enfileira ``fabrica`` (função sem argumentos que retorna uma corrotina)
+        e aguarda o seu resultado.
+        """
+        inicio = max(self._tempo_virtual, self._fim_virtual.get(usuario, 0.0))
+        self._fim_virtual[usuario] = inicio + CUSTOS.get(tipo, 1.0) / peso
+
+        future = asyncio.get_running_loop().create_future()
+        unidade = _Unidade(usuario, tipo, fabrica, inicio, future, contextvars.copy_context())
+        self._filas.setdefault(usuario, deque()).append(unidade)
+        self._despachar()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Quem aguardava desistiu (ex.: prazo do job): libera a vaga já
+            if unidade.tarefa is not None:
+                unidade.tarefa.cancel()
+            raise
+
+    def estatisticas(self) -> dict:
+        return {
+            "em_execucao": self._total_em_execucao,
+            "enfileiradas": sum(len(fila) for fila in self._filas.values()),
+            "usuarios": len(self._filas),
+        }
+
+    def _proxima(self):
+        escolhida = None
+        for usuario, fila in self._filas.items():
+            if self._em_execucao.get(usuario, 0) >= self.limite_por_usuario:
+                continue
+            unidade = fila[0]
+            if escolhida is None or unidade.inicio_virtual < escolhida.inicio_virtual:
+                escolhida = unidade
+        return escolhida
+
+    def _despachar(self):
+        while self._total_em_execucao < self.limite_global:
+            unidade = self._proxima()
+            if unidade is None:
+                return
+
+            fila = self._filas[unidade.usuario]
+            fila.popleft()
+            if not fila:
+                del self._filas[unidade.usuario]
+
+            if unidade.future.cancelled():
+                continue
+
+            self._tempo_virtual = max(self._tempo_virtual, unidade.inicio_virtual)
+            self._em_execucao[unidade.usuario] = self._em_execucao.get(unidade.usuario, 0) + 1
+            self._total_em_execucao += 1
+            tarefa = unidade.tarefa = self._criar_tarefa(unidade)
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    def _criar_tarefa(self, unidade: _Unidade) -> asyncio.Task:
+        # Quem despacha é a unidade que acabou de liberar a vaga; a nova tarefa
+        # precisa rodar no contexto de quem enfileirou (ex.: prazo do job)
+        if sys.version_info >= (3, 11):
+            return asyncio.create_task(self._rodar(unidade), context=unidade.contexto)
+        return unidade.contexto.run(asyncio.create_task, self._rodar(unidade))
+
+    async def _rodar(self, unidade: _Unidade):
+        try:
+            resultado = await unidade.fabrica()
+            if not unidade.future.done():
+                unidade.future.set_result(resultado)
+        except asyncio.CancelledError:
+            unidade.future.cancel()
+            raise
+        except Exception as e:
+            if not unidade.future.done():
+                unidade.future.set_exception(e)
+        finally:
+            self._liberar(unidade.usuario)
+
+    def _liberar(self, usuario: str):
+        self._total_em_execucao -= 1
+        restantes = self._em_execucao.get(usuario, 1) - 1
+        if restantes:
+            self._em_execucao[usuario] = restantes
+        else:
+            self._em_execucao.pop(usuario, None)
+            # Usuário ocioso recomeça no tempo virtual atual: descarta o estado
+            if usuario not in self._filas:
+                self._fim_virtual.pop(usuario, None)
+        self._despachar()
+
+
+agendador = AgendadorJusto(
+    limite_global=por_processo(AGENDADOR_LIMITE_GLOBAL),
+    limite_por_usuario=AGENDADOR_LIMITE_POR_USUARIO,
+)
\ No newline at end of file
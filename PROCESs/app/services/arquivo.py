@@ -0,0 +1,136 @@
+from datetime import date, datetime
+from sqlalchemy.future import select
+from models.db_config import SessionLocal, engine
+from models.models import Intimacao
+from utils.logger import logger
+from utils.serializacao import dumps
+
+COLUNAS = (
+    "matricula",
+    "numero_publicacao",
+    "codigo_relacionamento",
+    "data_publicacao",
+    "codigo_aasp",
+    "numero_arquivo",
+    "numero_processo",
+    "titulo",
+    "jornal",
+    "dados",
+)
+
+# Partições mensais já garantidas neste processo
+_particoes_criadas = set()
+
+# Serializa a criação de partições entre processos (segunda chave: ano * 100 + mês)
+CHAVE_LOCK_PARTICOES = 8004
+
+
+def _data_publicacao(intimacao: dict, data_consulta: dict) -> date:
+    """Data de disponibilização informada pela AASP, ou o dia consultado."""
+    valor = (intimacao.get("jornal") or {}).get("dataDisponibilizacao_Publicacao")
+    if isinstance(valor, str):
+        for formato, tamanho in (("%Y-%m-%d", 10), ("%d/%m/%Y", 10)):
+            try:
+                return datetime.strptime(valor[:tamanho], formato).date()
+            except ValueError:
+                continue
+    return date(data_consulta["ano"], data_consulta["mes"], data_consulta["dia"])
+
+
+def _tem_chave(intimacao: dict) -> bool:
+    """Sem os dois identificadores da AASP a intimação não tem chave própria no arquivo."""
+    return intimacao.get("numeroPublicacao") is not None and intimacao.get("codigoRelacionamento") is not None
+
+
+def _registro(matricula: str, codigo_aasp, data_consulta: dict, intimacao: dict) -> tuple:
+    return (
+        matricula,
+        intimacao["numeroPublicacao"],
+        intimacao["codigoRelacionamento"],
+        _data_publicacao(intimacao, data_consulta),
+        codigo_aasp,
+        intimacao.get("numeroArquivo"),
+        intimacao.get("numeroUnicoProcesso"),
+        intimacao.get("titulo"),
+        (intimacao.get("jornal") or {}).get("nomeJornal"),
+        dumps(intimacao).decode("utf-8"),
+    )
+
+
+async def _garantir_particoes(conn, datas: set):
+    """
+    Cria as partições mensais que faltam, cada uma em transação própria sob
+    um advisory lock do mês: ``IF NOT EXISTS`` sozinho não impede que dois
+    processos criem a mesma partição ao mesmo tempo e um deles falhe.
+    """
+    for mes in sorted({(d.year, d.month) for d in datas} - _particoes_criadas):
+        ano, numero = mes
+        inicio = date(ano, numero, 1)
+        fim = date(ano + (numero == 12), numero % 12 + 1, 1)
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1, $2)", CHAVE_LOCK_PARTICOES, ano * 100 + numero)
+            await conn.execute(
+                f"CREATE TABLE IF NOT EXISTS intimacoes_{ano:04d}_{numero:02d} "
+                f"PARTITION OF intimacoes FOR VALUES FROM ('{inicio}') TO ('{fim}')"
+            )
+        _particoes_criadas.add(mes)
+
+
+async def arquivar_intimacoes(matricula: str, codigo_aasp, data_consulta: dict, intimacoes: list) -> int:
+    """
+    Grava o lote de um dia no arquivo local com COPY para uma tabela
+    temporária e ``INSERT ... ON CONFLICT DO NOTHING``, de modo que
+    reentregas do mesmo dia não dupliquem linhas. Intimações sem
+    ``numeroPublicacao`` ou ``codigoRelacionamento`` são ignoradas e
+    contadas: com uma chave substituta colidiriam entre si e seriam
+    descartadas pelo ``ON CONFLICT``. Retorna quantas intimações novas foram
+    gravadas.
+    """
+    registros = [_registro(matricula, codigo_aasp, data_consulta, i) for i in intimacoes if _tem_chave(i)]
+    sem_chave = len(intimacoes) - len(registros)
+    if sem_chave:
+        logger.warning(
+            f"{sem_chave} intimação(ões) de {matricula} em {data_consulta} sem numeroPublicacao/"
+            f"codigoRelacionamento não foram arquivadas."
+        )
+    if not registros:
+        return 0
+
+    colunas = ", ".join(COLUNAS)
+
+    async with engine.connect() as conexao:
+        bruta = await conexao.get_raw_connection()
+        conn = bruta.driver_connection
+
+        await _garantir_particoes(conn, {r[3] for r in registros})
+        async with conn.transaction():
+            await conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS intimacoes_entrada "
+                "(LIKE intimacoes INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            await conn.copy_records_to_table("intimacoes_entrada", records=registros, columns=COLUNAS)
+            status = await conn.execute(
+                f"INSERT INTO intimacoes ({colunas}) "
+                f"SELECT DISTINCT ON (matricula, numero_publicacao, codigo_relacionamento, data_publicacao) {colunas} "
+                f"FROM intimacoes_entrada ON CONFLICT DO NOTHING"
+            )
+
+    novas = int(status.split()[-1])
+    logger.info(f"Arquivadas {novas}/{len(registros)} intimações de {matricula} em {data_consulta}.")
+    return novas
+
+
+async def listar_arquivadas(matricula: str, inicio: date, fim: date) -> list:
+    """Intimações arquivadas de uma matrícula entre ``inicio`` e ``fim`` (inclusive)."""
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(Intimacao.dados)
+            .where(
+                Intimacao.matricula == matricula,
+                Intimacao.data_publicacao >= inicio,
+                Intimacao.data_publicacao <= fim,
+            )
+            .order_by(Intimacao.data_publicacao, Intimacao.numero_publicacao)
+        )
+        return list(result.scalars().all())
+
@@ -0,0 +1,71 @@
+from sqlalchemy import text
+from models.db_config import SessionLocal
+
+TAMANHO_MAXIMO_PAGINA = 100
+
+# Consulta em linguagem de busca web ("termo exato", -exclusão, OR), sem acentos.
+# O vetor usa 'simple' para o número do processo e 'portuguese' para o texto,
+# por isso a consulta combina as duas configurações.
+CONSULTA = text("""
+    WITH q AS (
+        SELECT websearch_to_tsquery('portuguese', f_unaccent(:termo))
+            || websearch_to_tsquery('simple', f_unaccent(:termo)) AS consulta
+    )
+    SELECT
+        i.numero_publicacao,
+        i.codigo_relacionamento,
+        i.data_publicacao,
+        i.numero_processo,
+        i.titulo,
+        i.jornal,
+        ts_rank_cd(i.busca, q.consulta) AS relevancia,
+        ts_headline(
+            'portuguese',
+            coalesce(i.dados->>'textoPublicacao', ''),
+            q.consulta,
+            'MaxFragments=2, MaxWords=30, MinWords=10'
+        ) AS trecho
+    FROM intimacoes i, q
+    WHERE i.matricula = :matricula
+      AND i.busca @@ q.consulta
+    ORDER BY relevancia DESC, i.data_publicacao DESC
+    LIMIT :limite OFFSET :deslocamento
+""")
+
+
+async def buscar_publicacoes(matricula: str, termo: str, pagina: int = 1, tamanho: int = 20) -> dict:
+    """
+    Busca textual ranqueada nas intimações arquivadas de uma matrícula.
+    Busca uma linha a mais que o tamanho da página para indicar se há próxima.
+    """
+    tamanho = max(1, min(tamanho, TAMANHO_MAXIMO_PAGINA))
+    pagina = max(1, pagina)
+
+    async with SessionLocal() as session:
+        result = await session.execute(CONSULTA, {
+            "matricula": matricula,
+            "termo": termo,
+            "limite": tamanho + 1,
+            "deslocamento": (pagina - 1) * tamanho,
+        })
+        linhas = result.mappings().all()
+
+    resultados = [
+        {
+            "numero_publicacao": linha["numero_publicacao"],
+            "codigo_relacionamento": linha["codigo_relacionamento"],
+            "data_publicacao": linha["data_publicacao"].isoformat(),
+            "numero_processo": linha["numero_processo"],
+            "titulo": linha["titulo"],
+            "jornal": linha["jornal"],
+            "relevancia": round(float(linha["relevancia"]), 4),
+            "trecho": linha["trecho"],
+        }
+        for linha in linhas[:tamanho]
+    ]
+    return {
+        "pagina": pagina,
+        "tamanho": tamanho,
+        "tem_mais": len(linhas) > tamanho,
+        "resultados": resultados,
+    }
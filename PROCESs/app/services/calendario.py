@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from utils.logger import logger
+from utils.settings import CALENDARIO_TRIBUNAIS, CALENDARIO_FERIADOS_EXTRAS
+
+# Feriados nacionais de data fixa (mês, dia)
+FERIADOS_NACIONAIS = {
+    (1, 1),    # Confraternização Universal
+    (4, 21),   # Tiradentes
+    (5, 1),    # Dia do Trabalho
+    (9, 7),    # Independência
+    (10, 12),  # Nossa Senhora Aparecida
+    (11, 2),   # Finados
+    (11, 15),  # Proclamação da República
+    (11, 20),  # Dia Nacional de Zumbi e da Consciência Negra
+    (12, 25),  # Natal
+}
+
+# Feriados móveis, em dias a partir do domingo de Páscoa
+MOVEIS_NACIONAIS = {
+    -48,  # Segunda-feira de Carnaval
+    -47,  # Terça-feira de Carnaval
+    -2,   # Sexta-feira Santa
+    60,   # Corpus Christi
+}
+
+# Calendário usado quando nenhum tribunal é configurado: só os feriados nacionais
+NACIONAL = "NACIONAL"
+
+# Dias sem expediente forense próprios de cada tribunal, além dos nacionais
+CALENDARIOS = {
+    "TJSP": {
+        "fixos": {(1, 25), (7, 9), (12, 8)},  # Aniversário de São Paulo, Revolução Constitucionalista, Dia da Justiça
+        "moveis": {-3},                        # Quinta-feira Santa
+    },
+    "TRF3": {
+        "fixos": {(1, 25), (7, 9), (8, 11), (11, 1), (12, 8)},  # Lei 5.010/66, art. 62
+        "moveis": {-4, -3},                                     # Quarta e Quinta-feira Santa
+    },
+    "TRT2": {
+        "fixos": {(1, 25), (7, 9), (12, 8)},
+        "moveis": {-4, -3},
+    },
+    "TRT15": {
+        "fixos": {(7, 9), (12, 8)},
+        "moveis": {-4, -3},
+    },
+}
+
+
+@lru_cache(maxsize=64)
+def domingo_de_pascoa(ano: int) -> date:
+    """Algoritmo de Meeus/Jones/Butcher para o calendário gregoriano."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def _extras() -> set:
+    extras = set()
+    for valor in CALENDARIO_FERIADOS_EXTRAS:
+        try:
+            extras.add(datetime.strptime(valor, "%Y-%m-%d").date())
+        except ValueError:
+            logger.warning(f"Data inválida em CALENDARIO_FERIADOS_EXTRAS: {valor}")
+    return extras
+
+
+_FERIADOS_EXTRAS = _extras()
+
+
+@lru_cache(maxsize=256)
+def feriados(ano: int, tribunal: str) -> frozenset:
+    """Dias sem publicação do ``tribunal`` no ``ano`` (nacionais, locais e extras)."""
+    calendario = CALENDARIOS.get(tribunal, {})
+    pascoa = domingo_de_pascoa(ano)
+    dias = {date(ano, mes, dia) for mes, dia in FERIADOS_NACIONAIS | calendario.get("fixos", set())}
+    dias |= {pascoa + timedelta(days=n) for n in MOVEIS_NACIONAIS | calendario.get("moveis", set())}
+    dias |= {d for d in _FERIADOS_EXTRAS if d.year == ano}
+    return frozenset(dias)
+
+
+def dia_de_publicacao(dia: date, tribunais: tuple = None) -> bool:
+    """
+    Um dia só é descartado quando nenhum dos ``tribunais`` publica nele:
+    fim de semana ou feriado em todos eles.
+    """
+    if dia.weekday() >= 5:
+        return False
+    tribunais = tribunais or tuple(CALENDARIO_TRIBUNAIS) or (NACIONAL,)
+    return any(dia not in feriados(dia.year, tribunal) for tribunal in tribunais)
+
+
+def planejar_datas(dias_atras: int, hoje: date = None, tribunais: tuple = None) -> list:
+    """
+    Dias de publicação entre ontem e ``dias_atras`` dias atrás, do mais
+    recente ao mais antigo, no formato ``{"dia", "mes", "ano"}`` usado nas
+    consultas à AASP.
+    """
+    hoje = hoje or datetime.now().date()
+    candidatos = [hoje - timedelta(days=i) for i in range(1, dias_atras)]
+    datas = [
+        {"dia": d.day, "mes": d.month, "ano": d.year}
+        for d in candidatos
+        if dia_de_publicacao(d, tribunais)
+    ]
+    logger.debug(f"Calendário judicial: {len(datas)} de {len(candidatos)} dias com publicação.")
+    return datas
@@ -0,0 +1,87 @@
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete
+from sqlalchemy.future import select
+from models.db_config import SessionLocal
+from models.models import JobCheckpoint, NotionDatabase
+from services.request_intimation import obter_credenciais_do_usuario
+from utils.logger import logger
+
+# O token de acesso não é gravado junto do job: é relido do cadastro do
+# usuário quando o job é retomado.
+CAMPOS_OMITIDOS = {"access_token"}
+
+
+def payload_para_gravar(payload) -> dict:
+    return jsonable_encoder(payload, exclude=CAMPOS_OMITIDOS)
+
+
+async def remontar_payload(modelo, dados: dict):
+    """
+    Recria o payload gravado com o token atual do usuário dono do banco do
+    Notion. Retorna ``None`` se o banco não pertence mais a nenhum usuário.
+    """
+    async with SessionLocal() as session:
+        user_uuid = await session.scalar(
+            select(NotionDatabase.uuid).where(NotionDatabase.notion_database_id == dados["notion_database_id"])
+        )
+        if user_uuid is None:
+            logger.error(f"Banco do Notion {dados['notion_database_id']} sem usuário; o job não pode ser retomado.")
+            return None
+        access_token, _ = await obter_credenciais_do_usuario(user_uuid, session)
+    return modelo(**{**dados, "access_token": access_token})
+
+
+async def salvar_checkpoint(job):
+    """
+    Grava o ponto em que o job parou: os dias já consultados (e as
+    intimações obtidas neles) e quantas páginas já foram escritas. As
+    páginas em si ficam registradas em ``paginas_notion`` e não são
+    reenviadas na retomada. O payload é gravado sem o token de acesso.
+    """
+    if job.payload is None:
+        return
+    checkpoint = JobCheckpoint(
+        job_id=job.id,
+        tipo=job.tipo,
+        matricula=job.matricula,
+        payload=payload_para_gravar(job.payload),
+        dias=job.dias,
+        intimacoes=job.intimacoes_coletadas,
+        paginas_escritas=job.paginas_escritas,
+    )
+    try:
+        async with SessionLocal() as session:
+            await session.merge(checkpoint)
+            await session.commit()
+        pendentes = sum(1 for status in job.dias.values() if status != "concluido")
+        logger.info(f"Checkpoint do job {job.id} salvo: {pendentes} dia(s) pendente(s), {job.paginas_escritas} página(s) escrita(s).")
+    except Exception as e:
+        logger.error(f"Erro ao salvar checkpoint do job {job.id}: {e}")
+
+
+async def carregar_checkpoints() -> list:
+    try:
+        async with SessionLocal() as session:
+            result = await session.execute(select(JobCheckpoint).order_by(JobCheckpoint.atualizado_em))
+            return list(result.scalars().all())
+    except Exception as e:
+        logger.error(f"Erro ao carregar checkpoints de jobs: {e}")
+        return []
+
+
+async def carregar_checkpoint(job_id: str):
+    try:
+        async with SessionLocal() as session:
+            return await session.get(JobCheckpoint, job_id)
+    except Exception as e:
+        logger.error(f"Erro ao carregar checkpoint do job {job_id}: {e}")
+        return None
+
+
+async def remover_checkpoint(job_id: str):
+    try:
+        async with SessionLocal() as session:
+            await session.execute(delete(JobCheckpoint).where(JobCheckpoint.job_id == job_id))
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Erro ao remover checkpoint do job {job_id}: {e}")
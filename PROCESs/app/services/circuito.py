@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import deque
+from utils.logger import logger
+from utils.settings import (
+    AASP_CIRCUITO_LIMITE_FALHAS,
+    AASP_CIRCUITO_TEMPO_ABERTO,
+    AASP_HEDGE_AMOSTRAS_MINIMAS,
+)
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class Disjuntor:
+    """
+    Circuit breaker por endpoint.
+
+    Após ``limite_falhas`` falhas consecutivas o circuito abre e as chamadas
+    são recusadas sem ir à rede por ``tempo_aberto`` segundos. Depois disso
+    uma única chamada de teste é liberada (meio-aberto): sucesso fecha o
+    circuito, falha o reabre.
+    """
+
+    def __init__(self, nome: str, limite_falhas: int, tempo_aberto: float):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.estado = FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+
+    def permitir(self) -> bool:
+        if self.estado == FECHADO:
+            return True
+        if self.estado == ABERTO:
+            if time.monotonic() - self._aberto_em < self.tempo_aberto:
+                return False
+            self.estado = MEIO_ABERTO
+            self._teste_em_andamento = False
+            logger.info(f"Circuito {self.nome} meio-aberto: liberando requisição de teste.")
+        if self._teste_em_andamento:
+            return False
+        self._teste_em_andamento = True
+        return True
+
+    def registrar_sucesso(self):
+        if self.estado != FECHADO:
+            logger.info(f"Circuito {self.nome} fechado.")
+        self.estado = FECHADO
+        self._falhas = 0
+        self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        self._falhas += 1
+        if self.estado == MEIO_ABERTO or self._falhas >= self.limite_falhas:
+            if self.estado != ABERTO:
+                logger.warning(
+                    f"Circuito {self.nome} aberto após {self._falhas} falha(s); "
+                    f"novas requisições suspensas por {self.tempo_aberto}s."
+                )
+            self.estado = ABERTO
+            self._aberto_em = time.monotonic()
+            self._teste_em_andamento = False
+
+    def liberar_teste(self):
+        """Devolve a vaga de teste quando a chamada não chegou a um veredito."""
+        self._teste_em_andamento = False
+
+
+class LatenciaObservada:
+    """Janela das latências recentes de um endpoint, usada para o hedge."""
+
+    def __init__(self, tamanho: int = 200):
+        self._amostras = deque(maxlen=tamanho)
+
+    def registrar(self, segundos: float):
+        self._amostras.append(segundos)
+
+    def percentil(self, p: float):
+        if len(self._amostras) < AASP_HEDGE_AMOSTRAS_MINIMAS:
+            return None
+        ordenadas = sorted(self._amostras)
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+async def primeira_resposta(fabrica, atraso):
+    """
+    Executa ``fabrica()`` e, se não terminar em ``atraso`` segundos, dispara
+    uma segunda cópia (hedge). Retorna o primeiro resultado sem exceção e
+    cancela o outro.
+    """
+    principal = asyncio.ensure_future(fabrica())
+    if atraso is None:
+        return await principal
+
+    pendentes = {principal}
+    try:
+        concluidas, pendentes = await asyncio.wait(pendentes, timeout=atraso)
+        if concluidas:
+            return principal.result()
+
+        logger.info(f"Requisição excedeu o p95 ({atraso:.2f}s); enviando requisição de hedge.")
+        pendentes.add(asyncio.ensure_future(fabrica()))
+        while pendentes:
+            concluidas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa in concluidas:
+                if tarefa.exception() is None:
+                    return tarefa.result()
+            if not pendentes:
+                return concluidas.pop().result()
+    finally:
+        for tarefa in pendentes:
+            tarefa.cancel()
+
+
+disjuntores = {
+    nome: Disjuntor(nome, AASP_CIRCUITO_LIMITE_FALHAS, AASP_CIRCUITO_TEMPO_ABERTO)
+    for nome in ("aasp_empresa", "aasp_associado")
+}
+latencias = {nome: LatenciaObservada() for nome in disjuntores}
@@ -0,0 +1,99 @@
+import hashlib
+import time
+from sqlalchemy import text
+from models.db_config import SessionLocal
+from utils.logger import logger
+from utils.settings import CREDENCIAIS_INVALIDAS_TTL
+
+NOTION = "notion"
+AASP = "aasp"
+
+STATUS_CREDENCIAL_INVALIDA = {401, 403}
+
+
+class CredencialInvalida(Exception):
+    """A AASP ou o Notion recusaram a credencial; o restante do job é abortado."""
+
+    def __init__(self, origem: str, motivo: str):
+        super().__init__(f"Credencial {origem} inválida: {motivo}")
+        self.origem = origem
+        self.motivo = motivo
+
+
+def resposta_aasp_chave_invalida(status_code: int, texto: str) -> bool:
+    if status_code in STATUS_CREDENCIAL_INVALIDA:
+        return True
+    texto = (texto or "").lower()
+    return status_code < 500 and "chave" in texto and ("inválid" in texto or "invalid" in texto)
+
+
+class CacheNegativo:
+    """
+    Credenciais recusadas recentemente, por ``(origem, hash da credencial)``.
+
+    Enquanto a entrada não expira, novas chamadas com a mesma credencial
+    falham sem ir à rede e novos jobs do usuário são recusados.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entradas = {}
+
+    @staticmethod
+    def _chave(origem: str, credencial: str) -> tuple:
+        return (origem, hashlib.sha256(credencial.encode("utf-8")).hexdigest())
+
+    def registrar(self, origem: str, credencial: str, motivo: str):
+        self._entradas[self._chave(origem, credencial)] = (time.monotonic() + self.ttl, motivo)
+
+    def consultar(self, origem: str, credencial: str):
+        """Motivo da recusa, se a credencial ainda estiver no cache."""
+        if not credencial:
+            return None
+        chave = self._chave(origem, credencial)
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        expira_em, motivo = entrada
+        if time.monotonic() >= expira_em:
+            del self._entradas[chave]
+            return None
+        return motivo
+
+    def segundos_restantes(self, origem: str, credencial: str) -> int:
+        entrada = self._entradas.get(self._chave(origem, credencial)) if credencial else None
+        return max(0, int(entrada[0] - time.monotonic())) + 1 if entrada else 0
+
+    def verificar(self, origem: str, credencial: str):
+        motivo = self.consultar(origem, credencial)
+        if motivo:
+            raise CredencialInvalida(origem, motivo)
+
+    def descartar(self, origem: str, credencial: str):
+        self._entradas.pop(self._chave(origem, credencial), None)
+
+
+async def marcar_para_revalidacao(matricula: str, origem: str):
+    """Sinaliza no usuário que a credencial precisa ser validada novamente."""
+    try:
+        async with SessionLocal() as session:
+            await session.execute(
+                text("UPDATE users SET credencial_invalida_em = now(), credencial_invalida_origem = :origem WHERE matricula = :matricula"),
+                {"matricula": matricula, "origem": origem},
+            )
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Erro ao marcar usuário {matricula} para revalidação: {e}")
+
+
+async def registrar_credencial_invalida(origem: str, credencial: str, motivo: str, matricula: str = None):
+    """Guarda a recusa no cache e marca o usuário, apenas na primeira ocorrência."""
+    if cache_negativo.consultar(origem, credencial):
+        return
+    cache_negativo.registrar(origem, credencial, motivo)
+    logger.warning(f"Credencial {origem} recusada (Matrícula: {matricula}): {motivo}. Suspensa por {cache_negativo.ttl:.0f}s.")
+    if matricula:
+        await marcar_para_revalidacao(matricula, origem)
+
+
+cache_negativo = CacheNegativo(ttl=CREDENCIAIS_INVALIDAS_TTL)
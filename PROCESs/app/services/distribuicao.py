@@ -0,0 +1,155 @@
+import os
+import socket
+import uuid
+from datetime import timedelta
+from sqlalchemy import delete, func, or_, and_, update
+from sqlalchemy.future import select
+from models.db_config import SessionLocal
+from models.models import JobFila
+from utils.logger import logger
+from utils.settings import JOBS_FILA_LIMITE_GLOBAL, JOBS_LEASE_SEGUNDOS, JOBS_MAXIMO_TENTATIVAS
+
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+
+# Identifica este processo como dono dos jobs que reivindicar
+IDENTIDADE = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _lease():
+    return func.now() + timedelta(seconds=JOBS_LEASE_SEGUNDOS)
+
+
+async def enfileirar(tipo: str, matricula: str, payload: dict, job_id: str = None):
+    """
+    Registra o job na fila compartilhada, de onde qualquer processo pode
+    reivindicá-lo. Retorna o id, ou ``None`` se a fila global estiver cheia.
+    """
+    async with SessionLocal() as session:
+        na_fila = await session.scalar(
+            select(func.count()).select_from(JobFila).where(JobFila.estado == NA_FILA)
+        )
+        if na_fila >= JOBS_FILA_LIMITE_GLOBAL:
+            return None
+        job_id = job_id or uuid.uuid4().hex
+        session.add(JobFila(job_id=job_id, tipo=tipo, matricula=matricula, payload=payload, estado=NA_FILA))
+        await session.commit()
+        return job_id
+
+
+async def reivindicar():
+    """
+    Toma para este processo o job mais antigo na fila, ou um cujo dono parou
+    de renovar o lease (processo encerrado à força). ``FOR UPDATE SKIP LOCKED``
+    garante que dois processos nunca recebam o mesmo job. Jobs que já
+    esgotaram ``JOBS_MAXIMO_TENTATIVAS`` ficam para ``recolher_esgotados``.
+    """
+    disponivel = (
+        select(JobFila.job_id)
+        .where(
+            or_(
+                JobFila.estado == NA_FILA,
+                and_(JobFila.estado == EXECUTANDO, JobFila.lease_ate < func.now()),
+            ),
+            JobFila.tentativas < JOBS_MAXIMO_TENTATIVAS,
+        )
+        .order_by(JobFila.criado_em)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    async with SessionLocal() as session:
+        result = await session.execute(
+            update(JobFila)
+            .where(JobFila.job_id == disponivel)
+            .values(estado=EXECUTANDO, dono=IDENTIDADE, lease_ate=_lease(), tentativas=JobFila.tentativas + 1)
+            .returning(JobFila.job_id, JobFila.tipo, JobFila.matricula, JobFila.payload, JobFila.tentativas)
+        )
+        linha = result.first()
+        await session.commit()
+        return linha
+
+
+async def recolher_esgotados() -> list:
+    """
+    Remove da fila os jobs com lease expirado que já foram reivindicados
+    ``JOBS_MAXIMO_TENTATIVAS`` vezes: derrubaram todos os processos que os
+    executaram e derrubariam o próximo. Retorna as linhas removidas, para
+    que sejam registradas como falhas.
+    """
+    esgotados = (
+        select(JobFila.job_id)
+        .where(
+            JobFila.tentativas >= JOBS_MAXIMO_TENTATIVAS,
+            or_(JobFila.estado == NA_FILA, JobFila.lease_ate < func.now()),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    async with SessionLocal() as session:
+        result = await session.execute(
+            delete(JobFila)
+            .where(JobFila.job_id.in_(esgotados))
+            .returning(JobFila.job_id, JobFila.tipo, JobFila.matricula, JobFila.tentativas)
+        )
+        linhas = result.all()
+        await session.commit()
+        return linhas
+
+
+async def renovar(jobs: list):
+    """Estende o lease dos jobs deste processo e publica o progresso de cada um."""
+    if not jobs:
+        return
+    async with SessionLocal() as session:
+        for job in jobs:
+            result = await session.execute(
+                update(JobFila)
+                .where(JobFila.job_id == job.id, JobFila.dono == IDENTIDADE)
+                .values(lease_ate=_lease(), progresso=job.como_dict())
+            )
+            if result.rowcount == 0:
+                logger.warning(f"Job {job.id} não pertence mais a {IDENTIDADE} (lease expirado).")
+        await session.commit()
+
+
+async def concluir(job_id: str):
+    try:
+        async with SessionLocal() as session:
+            await session.execute(delete(JobFila).where(JobFila.job_id == job_id, JobFila.dono == IDENTIDADE))
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Erro ao remover o job {job_id} da fila: {e}")
+
+
+async def liberar(job_id: str):
+    """
+    Devolve o job à fila (desligamento), para ser retomado por outro processo.
+    A reivindicação atual não conta como tentativa: o job não derrubou o processo.
+    """
+    try:
+        async with SessionLocal() as session:
+            await session.execute(
+                update(JobFila)
+                .where(JobFila.job_id == job_id, JobFila.dono == IDENTIDADE)
+                .values(estado=NA_FILA, dono=None, lease_ate=None, tentativas=JobFila.tentativas - 1)
+            )
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Erro ao devolver o job {job_id} à fila: {e}")
+
+
+async def consultar(job_id: str):
+    """Estado de um job ainda na fila ou em execução em qualquer processo."""
+    async with SessionLocal() as session:
+        registro = await session.get(JobFila, job_id)
+        if not registro:
+            return None
+        if registro.progresso:
+            return {**registro.progresso, "estado": registro.estado, "dono": registro.dono}
+        return {
+            "id": registro.job_id,
+            "tipo": registro.tipo,
+            "matricula": registro.matricula,
+            "estado": registro.estado,
+            "dono": registro.dono,
+        }
@@ -0,0 +1,64 @@
+import asyncio
+import signal
+from utils.logger import logger
+
+
+class Drenagem:
+    """
+    Coordena o desligamento: a partir do SIGTERM nenhum job novo é aceito e
+    os streams de eventos são encerrados, para que o servidor possa fechar as
+    conexões e chegar ao shutdown do ``lifespan``, onde os jobs em andamento
+    têm até o prazo para terminar.
+    """
+
+    def __init__(self):
+        self.encerrando = False
+        self._loop = None
+        self._callbacks = []
+
+    def instalar(self, loop: asyncio.AbstractEventLoop):
+        """Encadeia o tratamento de SIGTERM/SIGINT ao já instalado pelo servidor."""
+        self._loop = loop
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            anterior = signal.getsignal(sinal)
+
+            def tratar(numero, frame, anterior=anterior):
+                self._loop.call_soon_threadsafe(self.iniciar)
+                if callable(anterior):
+                    anterior(numero, frame)
+
+            signal.signal(sinal, tratar)
+
+    def ao_iniciar(self, callback):
+        """Registra uma função chamada quando o desligamento começa."""
+        self._callbacks.append(callback)
+
+    def iniciar(self):
+        if self.encerrando:
+            return
+        self.encerrando = True
+        logger.info("Desligamento solicitado: novos jobs serão recusados.")
+        for callback in self._callbacks:
+            callback()
+
+    async def drenar(self, tarefas: set, prazo: float) -> set:
+        """
+        Aguarda as tarefas por até ``prazo`` segundos e cancela as que não
+        terminaram, esperando o cancelamento concluir. Retorna as canceladas.
+        """
+        self.iniciar()
+        pendentes = {tarefa for tarefa in tarefas if not tarefa.done()}
+        if not pendentes:
+            return set()
+
+        logger.info(f"Drenando {len(pendentes)} job(s) em andamento (prazo de {prazo:.0f}s)...")
+        _, pendentes = await asyncio.wait(pendentes, timeout=prazo)
+        if pendentes:
+            logger.warning(f"{len(pendentes)} job(s) não terminaram no prazo e serão interrompidos.")
+            for tarefa in pendentes:
+                tarefa.cancel()
+            await asyncio.gather(*pendentes, return_exceptions=True)
+        return pendentes
+
+
+drenagem = Drenagem()
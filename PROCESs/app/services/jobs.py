@@ -0,0 +1,252 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from models.db_config import SessionLocal
+from models.models import JobResumo
+from utils.logger import logger
+from utils.relatorio import AmostraErros
+from utils.settings import JOBS_RETENCAO_MAXIMA
+
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+ESTADOS_FINAIS = {CONCLUIDO, FALHOU}
+
+
+def _chave_data(data: dict) -> str:
+    return f"{data['ano']:04d}-{data['mes']:02d}-{data['dia']:02d}"
+
+
+def _data_da_chave(chave: str) -> dict:
+    ano, mes, dia = (int(parte) for parte in chave.split("-"))
+    return {"dia": dia, "mes": mes, "ano": ano}
+
+
+class Job:
+    """Estado e progresso de um processamento de /empresa ou /associado."""
+
+    def __init__(self, tipo: str, matricula: str, payload=None, job_id: str = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.tipo = tipo
+        self.matricula = matricula
+        self.payload = payload
+        self.retomado = False
+        self.estado = NA_FILA
+        self.criado_em = datetime.now(timezone.utc)
+        self.iniciado_em = None
+        self.finalizado_em = None
+        self.dias = {}
+        self.intimacoes_coletadas = []
+        self.intimacoes_encontradas = 0
+        self.paginas_escritas = 0
+        self.paginas_com_erro = 0
+        self.paginas_ignoradas = 0
+        # Os detalhes completos já vão para o log pelos relatórios de envio e de busca
+        self.erros = AmostraErros(f"job {self.id}", detalhes_no_log=False)
+        self.mensagem = None
+        self._inicio_monotonic = None
+        self._duracoes = {}
+        self._assinantes = set()
+
+    # Progresso -----------------------------------------------------------
+
+    def iniciar(self):
+        self.estado = EXECUTANDO
+        self.iniciado_em = datetime.now(timezone.utc)
+        self._inicio_monotonic = time.monotonic()
+        self._notificar()
+
+    def planejar_dias(self, datas: list):
+        self.dias = {_chave_data(data): "pendente" for data in datas}
+        self._notificar()
+
+    def restaurar(self, dias: dict, intimacoes: list, paginas_escritas: int = 0):
+        """Retoma o progresso salvo em um checkpoint."""
+        self.retomado = True
+        self.dias = dict(dias)
+        self.intimacoes_coletadas = list(intimacoes)
+        self.intimacoes_encontradas = len(self.intimacoes_coletadas)
+        self.paginas_escritas = paginas_escritas
+
+    def tem_progresso(self) -> bool:
+        """Se há dias planejados ou intimações a reenviar; sem isso, o job começa do zero."""
+        return bool(self.dias or self.intimacoes_coletadas)
+
+    def datas_pendentes(self) -> list:
+        """Dias planejados que ainda não foram consultados com sucesso."""
+        return [_data_da_chave(chave) for chave, status in self.dias.items() if status != "concluido"]
+
+    def registrar_dia(self, data: dict, intimacoes: list = None, erro: str = None):
+        self.dias[_chave_data(data)] = "erro" if erro else "concluido"
+        if intimacoes:
+            self.intimacoes_encontradas += len(intimacoes)
+            self.intimacoes_coletadas.extend(intimacoes)
+        if erro:
+            self.registrar_erro(erro, etapa="busca", data=_chave_data(data))
+        self._notificar()
+
+    def registrar_pagina(self, erro: str = None):
+        if erro:
+            self.paginas_com_erro += 1
+            self.registrar_erro(erro, etapa="escrita")
+        else:
+            self.paginas_escritas += 1
+        self._notificar()
+
+    def registrar_ignoradas(self, quantidade: int):
+        self.paginas_ignoradas += quantidade
+        self._notificar()
+
+    def registrar_erro(self, erro: str, **contexto):
+        self.erros.registrar({"erro": erro, **contexto})
+
+    def registrar_duracao(self, etapa: str, segundos: float):
+        self._duracoes[etapa] = self._duracoes.get(etapa, 0.0) + segundos
+
+    def finalizar(self, mensagem: str = None, erro: str = None):
+        self.estado = FALHOU if erro else CONCLUIDO
+        self.intimacoes_coletadas = []
+        self.mensagem = erro or mensagem
+        self.finalizado_em = datetime.now(timezone.utc)
+        if self._inicio_monotonic is not None:
+            self._duracoes["total"] = time.monotonic() - self._inicio_monotonic
+        self._notificar()
+
+    @property
+    def finalizado(self) -> bool:
+        return self.estado in ESTADOS_FINAIS
+
+    # Consulta ------------------------------------------------------------
+
+    def como_dict(self) -> dict:
+        dias_concluidos = sum(1 for status in self.dias.values() if status != "pendente")
+        return {
+            "id": self.id,
+            "tipo": self.tipo,
+            "matricula": self.matricula,
+            "estado": self.estado,
+            "mensagem": self.mensagem,
+            "progresso": {
+                "dias_total": len(self.dias),
+                "dias_concluidos": dias_concluidos,
+                "dias": self.dias,
+                "intimacoes_encontradas": self.intimacoes_encontradas,
+                "paginas_escritas": self.paginas_escritas,
+                "paginas_com_erro": self.paginas_com_erro,
+                "paginas_ignoradas": self.paginas_ignoradas,
+            },
+            "erros": self.erros.como_dict(),
+            "tempos": {
+                "criado_em": self.criado_em.isoformat(),
+                "iniciado_em": self.iniciado_em.isoformat() if self.iniciado_em else None,
+                "finalizado_em": self.finalizado_em.isoformat() if self.finalizado_em else None,
+                "duracoes_s": {etapa: round(s, 3) for etapa, s in self._duracoes.items()},
+            },
+        }
+
+    def como_resumo(self) -> JobResumo:
+        return JobResumo(
+            id=self.id,
+            tipo=self.tipo,
+            matricula=self.matricula,
+            estado=self.estado,
+            mensagem=self.mensagem,
+            dias_total=len(self.dias),
+            dias_com_erro=sum(1 for status in self.dias.values() if status == "erro"),
+            intimacoes_encontradas=self.intimacoes_encontradas,
+            paginas_escritas=self.paginas_escritas,
+            paginas_com_erro=self.paginas_com_erro,
+            total_erros=self.erros.total,
+            duracao_s=self._duracoes.get("total"),
+            criado_em=self.criado_em,
+            finalizado_em=self.finalizado_em,
+        )
+
+    # Assinaturas (SSE) ---------------------------------------------------
+
+    def assinar(self) -> asyncio.Event:
+        evento = asyncio.Event()
+        self._assinantes.add(evento)
+        return evento
+
+    def cancelar_assinatura(self, evento: asyncio.Event):
+        self._assinantes.discard(evento)
+
+    def _notificar(self):
+        for evento in self._assinantes:
+            evento.set()
+
+
+class RegistroJobs:
+    """
+    Guarda os jobs recentes em memória. Ao passar de ``retencao`` jobs, os
+    finalizados mais antigos são descartados; o resumo deles continua
+    disponível na tabela ``jobs``.
+    """
+
+    def __init__(self, retencao: int):
+        self.retencao = retencao
+        self._jobs = OrderedDict()
+
+    def criar(self, tipo: str, matricula: str, payload=None, job_id: str = None) -> Job:
+        job = Job(tipo, matricula, payload, job_id)
+        self._jobs[job.id] = job
+        self._podar()
+        return job
+
+    def obter(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def ativos(self) -> list:
+        return [job for job in self._jobs.values() if not job.finalizado]
+
+    def _podar(self):
+        if len(self._jobs) <= self.retencao:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finalizado]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.retencao:
+                return
+
+
+async def persistir_resumo(job: Job):
+    try:
+        async with SessionLocal() as session:
+            await session.merge(job.como_resumo())
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Erro ao persistir resumo do job {job.id}: {e}")
+
+
+async def obter_resumo(job_id: str):
+    async with SessionLocal() as session:
+        resumo = await session.get(JobResumo, job_id)
+        if not resumo:
+            return None
+        return {
+            "id": resumo.id,
+            "tipo": resumo.tipo,
+            "matricula": resumo.matricula,
+            "estado": resumo.estado,
+            "mensagem": resumo.mensagem,
+            "progresso": {
+                "dias_total": resumo.dias_total,
+                "dias_com_erro": resumo.dias_com_erro,
+                "intimacoes_encontradas": resumo.intimacoes_encontradas,
+                "paginas_escritas": resumo.paginas_escritas,
+                "paginas_com_erro": resumo.paginas_com_erro,
+            },
+            "erros": {"total": resumo.total_erros},
+            "tempos": {
+                "criado_em": resumo.criado_em.isoformat() if resumo.criado_em else None,
+                "finalizado_em": resumo.finalizado_em.isoformat() if resumo.finalizado_em else None,
+                "duracoes_s": {"total": resumo.duracao_s},
+            },
+        }
+
+
+registro_jobs = RegistroJobs(retencao=JOBS_RETENCAO_MAXIMA)
@@ -0,0 +1,72 @@
+from utils.logger import logger
+from utils.serializacao import dumps, loads
+from utils.settings import NOTION_EXISTENTES_POR_CONSULTA, NOTION_API_URL
+
+PROPRIEDADE_PUBLICACAO = "Nº Publicação"
+PROPRIEDADE_RELACIONAMENTO = "Cod Relacionamento"
+
+
+def chave_intimacao(intimacao: dict) -> tuple:
+    return (intimacao.get("numeroPublicacao"), intimacao.get("codigoRelacionamento"))
+
+
+def _numero(propriedades: dict, nome: str):
+    return (propriedades.get(nome) or {}).get("number")
+
+
+def _filtro(numeros: list) -> dict:
+    return {
+        "or": [
+            {"property": PROPRIEDADE_PUBLICACAO, "number": {"equals": numero}}
+            for numero in numeros
+        ]
+    }
+
+
+async def buscar_existentes(enviar, database_id: str, intimacoes: list) -> dict:
+    """
+    Descobre quais intimações já têm página no banco do Notion.
+
+    Agrupa os números de publicação em filtros ``or`` de até
+    ``NOTION_EXISTENTES_POR_CONSULTA`` itens em ``/databases/{id}/query``,
+    seguindo a paginação, em vez de uma consulta por intimação.
+    ``enviar(url, payload_bytes)`` deve retornar a resposta HTTP.
+
+    Retorna ``{(Nº Publicação, Cod Relacionamento): page_id}`` das páginas
+    encontradas; para intimações sem código de relacionamento basta o
+    número da publicação, que também é incluído como ``(numero, None)``.
+    """
+    url = f"{NOTION_API_URL}/databases/{database_id}/query"
+    numeros = sorted({n for n, _ in map(chave_intimacao, intimacoes) if n is not None})
+    existentes = {}
+    consultas = 0
+
+    for i in range(0, len(numeros), NOTION_EXISTENTES_POR_CONSULTA):
+        corpo = {"filter": _filtro(numeros[i:i + NOTION_EXISTENTES_POR_CONSULTA]), "page_size": 100}
+        while True:
+            response = await enviar(url, dumps(corpo))
+            consultas += 1
+            if response.status_code != 200:
+                raise RuntimeError(f"Consulta de existentes falhou: {response.status_code} - {response.text}")
+
+            dados = loads(response.content)
+            for pagina in dados.get("results", []):
+                propriedades = pagina.get("properties", {})
+                numero = _numero(propriedades, PROPRIEDADE_PUBLICACAO)
+                existentes[(numero, _numero(propriedades, PROPRIEDADE_RELACIONAMENTO))] = pagina.get("id")
+                existentes.setdefault((numero, None), pagina.get("id"))
+
+            if not dados.get("has_more"):
+                break
+            corpo["start_cursor"] = dados.get("next_cursor")
+
+    logger.info(f"{len(numeros)} publicação(ões) verificadas em {consultas} consulta(s) ao banco {database_id}.")
+    return existentes
+
+
+def pagina_existente(intimacao: dict, existentes: dict):
+    """Id da página já existente para a intimação, ou ``None``."""
+    numero, relacionamento = chave_intimacao(intimacao)
+    if numero is None:
+        return None
+    return existentes.get((numero, relacionamento))
@@ -1,53 +1,145 @@
-
+import asyncio
+from collections import OrderedDict
 from utils.logger import logger
+from utils.relatorio import AmostraErros
 from services.request_intimation import obter_dados_intimacao_associado
 from services.request_intimation import obter_dados_intimacao
+from services.agendador import agendador, BUSCA
+from services.arquivo import arquivar_intimacoes
+from services.credenciais import AASP, CredencialInvalida, cache_negativo
+from utils.settings import (
+    BUSCA_INTIMACOES_POR_UNIDADE,
+    BUSCA_DIAS_POR_UNIDADE_MAXIMO,
+    BUSCA_TAMANHOS_OBSERVADOS_MAXIMO,
+)
 
 
+class TamanhosObservados:
+    """Média móvel de intimações por dia de cada matrícula."""
 
-async def obter_dados_para_lote_associado(matricula, datas):
-    try:
-        logger.info(f"Obtendo dados para o período {datas[0]} até {datas[-1]} (Matrícula: {matricula})")
-        intimações_agrupadas = []
-        erros = []
-
-        for data in datas:
-            try:
-                dados = await obter_dados_intimacao_associado(matricula, data)
-                if dados and "intimacoes" in dados:
-                    intimações_agrupadas.extend(dados.get("intimacoes", []))
-                elif "error" in dados:
-                    erros.append({"data": data, "detalhes": dados.get('error', 'Erro desconhecido')})
-            except Exception as e:
-                logger.error(f"Erro ao obter dados para {data}: {e}", exc_info=True)
-                erros.append({"data": data, "detalhes": str(e)})
-
-        return {"intimacoes": intimações_agrupadas, "erros": erros}
+    def __init__(self, maximo: int, alfa: float = 0.3):
+        self.maximo = maximo
+        self.alfa = alfa
+        self._medias = OrderedDict()
+
+    def registrar(self, matricula: str, quantidade: int):
+        anterior = self._medias.pop(matricula, None)
+        self._medias[matricula] = quantidade if anterior is None else anterior + self.alfa * (quantidade - anterior)
+        while len(self._medias) > self.maximo:
+            self._medias.popitem(last=False)
+
+    def estimativa(self, matricula: str):
+        return self._medias.get(matricula)
+
+
+tamanhos_observados = TamanhosObservados(BUSCA_TAMANHOS_OBSERVADOS_MAXIMO)
 
+
+def dividir_em_unidades(matricula: str, datas: list) -> list:
+    """
+    Divide os dias em unidades de busca independentes. Sem histórico, ou
+    com dias pesados, cada dia é uma unidade; dias leves são agrupados até
+    somarem cerca de ``BUSCA_INTIMACOES_POR_UNIDADE`` intimações esperadas,
+    para que as unidades tenham tamanhos parecidos.
+    """
+    estimativa = tamanhos_observados.estimativa(matricula)
+    if estimativa is None or estimativa >= BUSCA_INTIMACOES_POR_UNIDADE:
+        dias_por_unidade = 1
+    else:
+        dias_por_unidade = int(BUSCA_INTIMACOES_POR_UNIDADE / max(estimativa, 1.0))
+        dias_por_unidade = max(1, min(BUSCA_DIAS_POR_UNIDADE_MAXIMO, dias_por_unidade))
+    return [datas[i:i + dias_por_unidade] for i in range(0, len(datas), dias_por_unidade)]
+
+
+async def arquivar_dia(matricula, codigo_aasp, data, intimacoes):
+    try:
+        await arquivar_intimacoes(matricula, codigo_aasp, data, intimacoes)
     except Exception as e:
-        logger.error(f"Erro inesperado ao processar período {datas}: {e}", exc_info=True)
+        logger.error(f"Erro ao arquivar intimações de {data} (Matrícula: {matricula}): {e}")
+
+
+async def buscar_dia(matricula, codigo_aasp, data, consultar, job=None) -> dict:
+    """Consulta, arquiva e registra no job as intimações de um dia."""
+    cache_negativo.verificar(AASP, matricula)
+    try:
+        dados = await consultar(data)
+        if dados and "intimacoes" in dados:
+            intimacoes = dados.get("intimacoes", [])
+            tamanhos_observados.registrar(matricula, len(intimacoes))
+            await arquivar_dia(matricula, codigo_aasp, data, intimacoes)
+            if job:
+                job.registrar_dia(data, intimacoes=intimacoes)
+            return {"intimacoes": intimacoes, "erros": []}
+        if "error" in dados:
+            erro = dados.get('error', 'Erro desconhecido')
+            if job:
+                job.registrar_dia(data, erro=erro)
+            return {"intimacoes": [], "erros": [{"data": data, "detalhes": erro}]}
+        if job:
+            job.registrar_dia(data)
+        return {"intimacoes": [], "erros": []}
+    except CredencialInvalida:
         raise
+    except Exception as e:
+        logger.error(f"Erro ao obter dados para {data}: {e}", exc_info=True)
+        if job:
+            job.registrar_dia(data, erro=str(e))
+        return {"intimacoes": [], "erros": [{"data": data, "detalhes": str(e)}]}
 
 
-async def obter_dados_para_lote(matricula, codigo_aasp, datas):
+async def buscar_dias(matricula, codigo_aasp, datas, consultar, job=None, coletadas: list = None) -> dict:
+    """
+    Busca os dias como unidades independentes no agendador global: qualquer
+    vaga livre pega a próxima unidade de qualquer usuário, e um dia lento
+    ocupa só a sua vaga em vez de segurar um período inteiro. Os erros voltam
+    como ``AmostraErros``: o total e uma amostra limitada. ``coletadas``
+    recebe as intimações de cada dia assim que ele termina, para que o que
+    já foi buscado não se perca se a busca for cancelada (prazo).
+    """
+    unidades = dividir_em_unidades(matricula, datas)
+    logger.info(f"Buscando {len(datas)} dia(s) em {len(unidades)} unidade(s) (Matrícula: {matricula})")
+
+    async def executar_unidade(unidade):
+        resultados = []
+        for data in unidade:
+            resultado = await buscar_dia(matricula, codigo_aasp, data, consultar, job)
+            if coletadas is not None:
+                coletadas.extend(resultado["intimacoes"])
+            resultados.append(resultado)
+        return resultados
+
+    tarefas = [
+        asyncio.ensure_future(
+            agendador.executar(matricula, BUSCA, lambda unidade=unidade: executar_unidade(unidade), peso=1 / len(unidade))
+        )
+        for unidade in unidades
+    ]
     try:
-        logger.info(f"Obtendo dados para o período {datas[0]} até {datas[-1]} (Matrícula: {matricula}, Código: {codigo_aasp})")
-        intimações_agrupadas = []
-        erros = []
-
-        for data in datas:
-            try:
-                dados = await obter_dados_intimacao(matricula, codigo_aasp, data)
-                if dados and "intimacoes" in dados:
-                    intimações_agrupadas.extend(dados.get("intimacoes", []))
-                elif "error" in dados:
-                    erros.append({"data": data, "detalhes": dados.get('error', 'Erro desconhecido')})
-            except Exception as e:
-                logger.error(f"Erro ao obter dados para {data}: {e}", exc_info=True)
-                erros.append({"data": data, "detalhes": str(e)})
-
-        return {"intimacoes": intimações_agrupadas, "erros": erros}
+        por_unidade = await asyncio.gather(*tarefas)
+    except BaseException:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        raise
 
-    except Exception as e:
-        logger.error(f"Erro inesperado ao processar período {datas}: {e}", exc_info=True)
-        raise
\ No newline at end of file
+    resultados = [resultado for unidade in por_unidade for resultado in unidade]
+    erros = AmostraErros(f"busca {matricula}")
+    for resultado in resultados:
+        for erro in resultado["erros"]:
+            erros.registrar(erro)
+    return {
+        "intimacoes": [i for resultado in resultados for i in resultado["intimacoes"]],
+        "erros": erros,
+        "unidades": len(unidades),
+    }
+
+
+async def obter_dados_para_lote_associado(matricula, datas, job=None, coletadas: list = None):
+    return await buscar_dias(
+        matricula, None, datas, lambda data: obter_dados_intimacao_associado(matricula, data), job, coletadas
+    )
+
+
+async def obter_dados_para_lote(matricula, codigo_aasp, datas, job=None, coletadas: list = None):
+    return await buscar_dias(
+        matricula, codigo_aasp, datas, lambda data: obter_dados_intimacao(matricula, codigo_aasp, data), job, coletadas
+    )
@@ -0,0 +1,135 @@
+from utils.serializacao import dumps
+
+# Limites da API do Notion
+LIMITE_RICH_TEXT = 2000  # caracteres por item de rich_text
+LIMITE_ITENS = 100  # elementos por array (rich_text, children)
+
+RETICENCIAS = "…"
+
+
+def _rich_text(conteudo) -> list:
+    return [{"text": {"content": conteudo}}]
+
+
+def dividir_texto_em_blocos(texto: str, limite: int = LIMITE_RICH_TEXT) -> list:
+    return [texto[i:i + limite] for i in range(0, len(texto), limite)]
+
+
+def _blocos_rich_text(texto: str, limite: int = LIMITE_RICH_TEXT) -> list:
+    return [{"text": {"content": bloco}} for bloco in dividir_texto_em_blocos(texto, limite)]
+
+
+def excede_limites(texto: str) -> bool:
+    """Indica se o texto não cabe em uma única propriedade rich_text."""
+    return len(texto) > LIMITE_RICH_TEXT * LIMITE_ITENS
+
+
+def truncar(texto, limite: int = LIMITE_RICH_TEXT):
+    if not isinstance(texto, str) or len(texto) <= limite:
+        return texto
+    return texto[:limite - len(RETICENCIAS)] + RETICENCIAS
+
+
+def montar_publicacao(dados_json: dict) -> str:
+    """Concatena os trechos da publicação, trocando ';' por quebras de linha."""
+    get = dados_json.get
+    publicacao = (
+        f"{get('termoReferenciaData', '')} "
+        f"{get('titulo', '')} "
+        f"{get('cabecalho', '')} "
+        f"{get('textoPublicacao', '')} "
+        f"{get('rodape', '')}"
+    ).strip()
+    return publicacao.replace(";", "\n")
+
+
+def montar_blocos_paragrafo(texto: str) -> list:
+    """Converte o texto em blocos de parágrafo para o corpo da página."""
+    return [
+        {"object": "block", "type": "paragraph", "paragraph": {"rich_text": _rich_text(bloco)}}
+        for bloco in dividir_texto_em_blocos(texto)
+    ]
+
+
+def rich_text_publicacao(publicacao: str) -> list:
+    """
+    Divide a publicação em itens de até 2000 caracteres. Se não couber em
+    100 itens, retorna apenas o início truncado; o texto completo deve ir
+    para o corpo da página (ver ``PayloadBuilder.pagina``).
+    """
+    if excede_limites(publicacao):
+        return _rich_text(truncar(publicacao))
+    return _blocos_rich_text(publicacao)
+
+
+def montar_propriedades(dados_json: dict, publicacao: str = None) -> dict:
+    """Equivalente a ``notion_integration.formatar_dados_para_notion``."""
+    get = dados_json.get
+    jornal = get('jornal', {})
+    if publicacao is None:
+        publicacao = montar_publicacao(dados_json)
+
+    return {
+        "Jornal": {"title": _rich_text(truncar(jornal.get('nomeJornal', 'Sem Nome')))},
+        "Tratado em": {"date": {"start": jornal.get('dataTratamento')}},
+        "Disponibilização": {"date": {"start": jornal.get('dataDisponibilizacao_Publicacao')}},
+        "Nº do Processo": {"rich_text": _rich_text(truncar(get('numeroUnicoProcesso', 'Sem Processo')))},
+        "Publicação": {"rich_text": rich_text_publicacao(publicacao)},
+        "Título": {"rich_text": _rich_text(truncar(get('titulo', 'Sem Título')))},
+        "Cabeçalho": {"rich_text": _rich_text(truncar(get('cabecalho', 'Sem Cabeçalho')))},
+        "Rodapé": {"rich_text": _rich_text(truncar(get('rodape') or 'Sem Rodapé'))},
+        "Nº Publicação": {"number": get('numeroPublicacao')},
+        "Nº Arquivo": {"number": get('numeroArquivo')},
+        "Cod Relacionamento": {"number": get('codigoRelacionamento')}
+    }
+
+
+class PayloadBuilder:
+    """Serializa páginas de um mesmo banco do Notion direto para bytes."""
+
+    def __init__(self, notion_database_id: str):
+        self.notion_database_id = notion_database_id
+        self._parent = {"database_id": notion_database_id}
+
+    def propriedades(self, intimacao: dict) -> dict:
+        return montar_propriedades(intimacao)
+
+    def conteudo(self, intimacao: dict) -> tuple:
+        """
+        Propriedades e blocos de parágrafo do corpo da página. Publicações que
+        cabem na propriedade não geram blocos; as que não cabem têm a
+        propriedade truncada e o texto completo nos blocos.
+        """
+        publicacao = montar_publicacao(intimacao)
+        propriedades = montar_propriedades(intimacao, publicacao)
+        blocos = montar_blocos_paragrafo(publicacao) if excede_limites(publicacao) else []
+        return propriedades, blocos
+
+    def pagina(self, intimacao: dict, conteudo: tuple = None) -> tuple:
+        """
+        Retorna o payload de criação da página e a lista de payloads
+        ``{"children": [...]}`` que ainda precisam ser anexados via
+        ``PATCH /blocks/{id}/children``: o primeiro lote de até 100 blocos
+        segue na própria criação e o restante em lotes de 100.
+        ``conteudo`` evita remontar o que ``conteudo()`` já devolveu.
+        """
+        propriedades, blocos = conteudo or self.conteudo(intimacao)
+        payload = {"parent": self._parent, "properties": propriedades}
+        if not blocos:
+            return dumps(payload), []
+
+        payload["children"] = blocos[:LIMITE_ITENS]
+        return dumps(payload), _lotes(blocos[LIMITE_ITENS:])
+
+    def atualizacao(self, intimacao: dict, conteudo: tuple = None) -> tuple:
+        """
+        Retorna o payload de ``PATCH /pages/{id}`` com as propriedades e os
+        lotes ``{"children": [...]}`` do novo corpo da página (vazio para
+        publicações que cabem na propriedade).
+        """
+        propriedades, blocos = conteudo or self.conteudo(intimacao)
+        return dumps({"properties": propriedades}), _lotes(blocos)
+
+
+def _lotes(blocos: list) -> list:
+    return [dumps({"children": blocos[i:i + LIMITE_ITENS]}) for i in range(0, len(blocos), LIMITE_ITENS)]
@@ -1,69 +1,97 @@
-import asyncio
-from utils.resoucer import UserPayload
-from datetime import datetime, timedelta
+import time
+from utils.resoucer import UserPayload, ReenvioPayload
+from services.arquivo import listar_arquivadas
+from services.calendario import planejar_datas
 from services.notion.lote import obter_dados_para_lote
 from services.notion_integration import enviar_dados_para_notion
+from services.prazo import Prazo, PrazoExcedido, BUSCA, ESCRITA
 from utils.logger import logger
+from utils.relatorio import AmostraErros
 from services.notion.lote import obter_dados_para_lote_associado
 
-async def processar_intimacao_associado(payload: UserPayload):
+
+async def buscar_e_enviar(payload, job, anteriores: list, buscar):
+    """
+    Busca os dias e envia as intimações ao Notion dentro do prazo do job.
+
+    ``buscar(coletadas)`` preenche ``coletadas`` dia a dia. Se a busca
+    estourar o orçamento, o que já foi obtido ainda segue para o Notion com o
+    tempo restante, com ou sem job. Retorna o resultado da busca, as
+    intimações enviadas e, havendo estouro, ``{"etapa", "reescrever"}`` para
+    a continuação do job (``None`` se tudo terminou no prazo).
+    """
+    prazo = Prazo()
+    prazo_excedido = None
+    coletadas = []
+
+    inicio_busca = time.monotonic()
+    try:
+        resultado = await prazo.executar(BUSCA, buscar(coletadas))
+        intimacoes = anteriores + resultado["intimacoes"]
+    except PrazoExcedido as e:
+        logger.warning(f"{e} (Matrícula: {payload.matricula}); os dias restantes serão reenfileirados.")
+        resultado = {"intimacoes": [], "erros": AmostraErros(), "unidades": 0}
+        intimacoes = anteriores + coletadas
+        prazo_excedido = {"etapa": e.etapa, "reescrever": False}
+    if job:
+        job.registrar_duracao("busca", time.monotonic() - inicio_busca)
+
+    # Enviar dados em lote para o Notion
+    if intimacoes:
+        inicio_escrita = time.monotonic()
+        try:
+            await prazo.executar_ate_o_fim(ESCRITA, enviar_dados_para_notion(
+                intimacoes=intimacoes,
+                access_token=payload.access_token,
+                notion_database_id=payload.notion_database_id,
+                usuario=payload.matricula,
+                job=job,
+                prazo=prazo,
+            ))
+        except PrazoExcedido as e:
+            logger.warning(f"{e} (Matrícula: {payload.matricula}); as páginas restantes serão reenviadas.")
+            prazo_excedido = {"etapa": e.etapa, "reescrever": True}
+        if job:
+            job.registrar_duracao("escrita", time.monotonic() - inicio_escrita)
+
+    return resultado, intimacoes, prazo_excedido
+
+async def processar_intimacao_associado(payload: UserPayload, job=None):
     try:
         matricula = payload.matricula
-        access_token = payload.access_token
-        notion_database_id = payload.notion_database_id
 
         logger.info(f"Iniciando processamento para Matrícula: {matricula}")
 
-        hoje = datetime.now()
-        datas = [
-            {"dia": (hoje - timedelta(days=i)).day,
-             "mes": (hoje - timedelta(days=i)).month,
-             "ano": (hoje - timedelta(days=i)).year}
-            for i in range(1, 30)
-        ]
-
-        # Dividir as datas em períodos de 5 dias
-        periodos = [datas[i:i + 5] for i in range(0, len(datas), 5)]
-
-        semaphore = asyncio.Semaphore(3)  # Limitar o número de tarefas simultâneas
-
-        async def processar_periodo(periodo):
-            async with semaphore:
-                return await obter_dados_para_lote_associado(matricula, periodo)
-
-        tasks = [processar_periodo(periodo) for periodo in periodos]
-        resultados = await asyncio.gather(*tasks)
-
-        intimações_para_enviar = [
-            intimacao
-            for resultado in resultados
-            for intimacao in resultado["intimacoes"]
-        ]
-
-        erros = [
-            erro
-            for resultado in resultados
-            for erro in resultado["erros"]
-        ]
-
-        # Enviar dados em lote para o Notion
-        if intimações_para_enviar:
-            await enviar_dados_para_notion(
-                intimacoes=intimações_para_enviar,
-                access_token=access_token,
-                notion_database_id=notion_database_id
-            )
+        # Na retomada de um checkpoint, só os dias que faltaram; as intimações
+        # dos dias já consultados vêm do próprio checkpoint. Um job interrompido
+        # antes de planejar os dias é planejado do zero.
+        anteriores = []
+        if job and job.retomado and job.tem_progresso():
+            datas = job.datas_pendentes()
+            anteriores = list(job.intimacoes_coletadas)
+        else:
+            # Somente dias em que o Diário publica (sem fins de semana e feriados forenses)
+            datas = planejar_datas(payload.dias_atras or 30)
+            if job:
+                job.planejar_dias(datas)
+
+        # Cada dia (ou grupo de dias leves) é uma unidade no agendador global
+        resultado, intimações_para_enviar, prazo_excedido = await buscar_e_enviar(
+            payload, job, anteriores, lambda coletadas: obter_dados_para_lote_associado(matricula, datas, job, coletadas)
+        )
+        erros = resultado["erros"]
 
         logger.info(f"Processamento concluído para Matrícula: {matricula}")
         return {
             "message": f"Processamento concluído para Matrícula: {matricula}",
             "detalhes": {
                 "dias_processados": len(datas),
-                "periodos_processados": len(periodos),
+                "unidades_processadas": resultado["unidades"],
                 "sucessos": len(intimações_para_enviar),
-                "erros": len(erros),
-                "erros_detalhados": erros
-            }
+                "erros": erros.total,
+                "erros_detalhados": erros.amostra
+            },
+            "prazo_excedido": prazo_excedido,
         }
 
     except Exception as e:
@@ -71,67 +99,89 @@ async def processar_intimacao_associado(payload: UserPayload):
         return {"error": f"Erro ao processar Matrícula {matricula}: {str(e)}"}
 
 
-async def processar_intimacao_empresa(payload: UserPayload):
+async def processar_intimacao_empresa(payload: UserPayload, job=None):
     try:
         matricula = payload.matricula
         codigo_aasp = payload.codigo_aasp
-        access_token = payload.access_token
-        notion_database_id = payload.notion_database_id
 
         logger.info(f"Iniciando processamento para Matrícula: {matricula}, Código: {codigo_aasp}")
 
-        hoje = datetime.now()
-        datas = [
-            {"dia": (hoje - timedelta(days=i)).day,
-             "mes": (hoje - timedelta(days=i)).month,
-             "ano": (hoje - timedelta(days=i)).year}
-            for i in range(1, 10)
-        ]
-
-        # Dividir as datas em períodos de 5 dias
-        periodos = [datas[i:i + 5] for i in range(0, len(datas), 5)]
-
-        semaphore = asyncio.Semaphore(3)  # Limitar o número de tarefas simultâneas
-
-        async def processar_periodo(periodo):
-            async with semaphore:
-                return await obter_dados_para_lote(matricula, codigo_aasp, periodo)
-
-        tasks = [processar_periodo(periodo) for periodo in periodos]
-        resultados = await asyncio.gather(*tasks)
-
-        intimações_para_enviar = [
-            intimacao
-            for resultado in resultados
-            for intimacao in resultado["intimacoes"]
-        ]
-
-        erros = [
-            erro
-            for resultado in resultados
-            for erro in resultado["erros"]
-        ]
-
-        # Enviar dados em lote para o Notion
-        if intimações_para_enviar:
-            await enviar_dados_para_notion(
-                intimacoes=intimações_para_enviar,
-                access_token=access_token,
-                notion_database_id=notion_database_id
-            )
+        # Na retomada de um checkpoint, só os dias que faltaram; as intimações
+        # dos dias já consultados vêm do próprio checkpoint. Um job interrompido
+        # antes de planejar os dias é planejado do zero.
+        anteriores = []
+        if job and job.retomado and job.tem_progresso():
+            datas = job.datas_pendentes()
+            anteriores = list(job.intimacoes_coletadas)
+        else:
+            # Somente dias em que o Diário publica (sem fins de semana e feriados forenses)
+            datas = planejar_datas(payload.dias_atras or 10)
+            if job:
+                job.planejar_dias(datas)
+
+        # Cada dia (ou grupo de dias leves) é uma unidade no agendador global
+        resultado, intimações_para_enviar, prazo_excedido = await buscar_e_enviar(
+            payload, job, anteriores, lambda coletadas: obter_dados_para_lote(matricula, codigo_aasp, datas, job, coletadas)
+        )
+        erros = resultado["erros"]
 
         logger.info(f"Processamento concluído para Matrícula: {matricula}, Código: {codigo_aasp}")
         return {
             "message": f"Processamento concluído para Matrícula: {matricula}, Código: {codigo_aasp}",
             "detalhes": {
                 "dias_processados": len(datas),
-                "periodos_processados": len(periodos),
+                "unidades_processadas": resultado["unidades"],
                 "sucessos": len(intimações_para_enviar),
-                "erros": len(erros),
-                "erros_detalhados": erros
-            }
+                "erros": erros.total,
+                "erros_detalhados": erros.amostra
+            },
+            "prazo_excedido": prazo_excedido,
         }
 
     except Exception as e:
         logger.error(f"Erro ao processar Matrícula {matricula}, Código {codigo_aasp}: {e}", exc_info=True)
         return {"error": f"Erro ao processar Matrícula {matricula}, Código {codigo_aasp}: {str(e)}"}
+
+
+async def processar_reenvio(payload: ReenvioPayload, job=None):
+    """Reenvia ao Notion as intimações já arquivadas, sem consultar a AASP."""
+    try:
+        matricula = payload.matricula
+        logger.info(f"Iniciando reenvio do arquivo para Matrícula: {matricula} ({payload.data_inicio} a {payload.data_fim})")
+
+        intimacoes = await listar_arquivadas(matricula, payload.data_inicio, payload.data_fim)
+
+        resultado = {"success": 0, "errors": 0}
+        prazo_excedido = None
+        if intimacoes:
+            prazo = Prazo()
+            inicio_escrita = time.monotonic()
+            try:
+                resultado = await prazo.executar_ate_o_fim(ESCRITA, enviar_dados_para_notion(
+                    intimacoes=intimacoes,
+                    access_token=payload.access_token,
+                    notion_database_id=payload.notion_database_id,
+                    usuario=matricula,
+                    job=job,
+                    prazo=prazo,
+                ))
+            except PrazoExcedido as e:
+                logger.warning(f"{e} (Matrícula: {matricula}); o reenvio será reenfileirado.")
+                prazo_excedido = {"etapa": e.etapa, "reescrever": True}
+            if job:
+                job.registrar_duracao("escrita", time.monotonic() - inicio_escrita)
+
+        logger.info(f"Reenvio concluído para Matrícula: {matricula}")
+        return {
+            "message": f"Reenvio concluído para Matrícula: {matricula}",
+            "detalhes": {
+                "intimacoes_arquivadas": len(intimacoes),
+                "sucessos": resultado["success"],
+                "erros": resultado["errors"]
+            },
+            "prazo_excedido": prazo_excedido,
+        }
+
+    except Exception as e:
+        logger.error(f"Erro ao reenviar Matrícula {payload.matricula}: {e}", exc_info=True)
+        return {"error": f"Erro ao reenviar Matrícula {payload.matricula}: {str(e)}"}
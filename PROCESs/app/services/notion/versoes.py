@@ -0,0 +1,101 @@
+import hashlib
+import json
+from sqlalchemy import tuple_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+from models.db_config import SessionLocal
+from models.models import PaginaNotion
+from utils.logger import logger
+from services.notion.existentes import chave_intimacao
+
+
+def chave_versao(intimacao: dict) -> tuple:
+    numero, relacionamento = chave_intimacao(intimacao)
+    return (numero or 0, relacionamento or 0)
+
+
+def hash_conteudo(propriedades: dict, blocos: list) -> str:
+    """
+    Hash do conteúdo formatado da página (propriedades e blocos), sobre um
+    JSON canônico (chaves ordenadas, sem espaços): não depende do
+    serializador usado para montar os payloads.
+    """
+    canonico = json.dumps(
+        {"properties": propriedades, "blocos": blocos},
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(canonico.encode("utf-8")).hexdigest()
+
+
+async def carregar_versoes(notion_database_id: str, intimacoes: list) -> dict:
+    """
+    Páginas já conhecidas das intimações, como ``{chave: (page_id, hash,
+    blocos)}``; ``blocos`` são os ids dos blocos que este serviço anexou ao
+    corpo da página, ou ``None`` se não se sabe (página adotada).
+    Em caso de erro no banco retorna vazio, e as intimações seguem o
+    fluxo normal de criação.
+    """
+    chaves = {chave_versao(i) for i in intimacoes if i.get("numeroPublicacao") is not None}
+    if not chaves:
+        return {}
+
+    try:
+        async with SessionLocal() as session:
+            result = await session.execute(
+                select(
+                    PaginaNotion.numero_publicacao,
+                    PaginaNotion.codigo_relacionamento,
+                    PaginaNotion.page_id,
+                    PaginaNotion.hash_conteudo,
+                    PaginaNotion.blocos,
+                ).where(
+                    PaginaNotion.notion_database_id == notion_database_id,
+                    tuple_(PaginaNotion.numero_publicacao, PaginaNotion.codigo_relacionamento).in_(list(chaves)),
+                )
+            )
+            return {(numero, rel): (page_id, h, blocos) for numero, rel, page_id, h, blocos in result.all()}
+    except Exception as e:
+        logger.error(f"Erro ao carregar versões das páginas do banco {notion_database_id}: {e}")
+        return {}
+
+
+def versao_de(intimacao: dict, versoes: dict):
+    if intimacao.get("numeroPublicacao") is None:
+        return None
+    return versoes.get(chave_versao(intimacao))
+
+
+async def salvar_versoes(notion_database_id: str, registros: list):
+    """Grava ``(intimacao, page_id, hash, blocos)`` em lote, sobrescrevendo versões anteriores."""
+    linhas = {}
+    for intimacao, page_id, h, blocos in registros:
+        if intimacao.get("numeroPublicacao") is None:
+            continue
+        numero, relacionamento = chave_versao(intimacao)
+        linhas[(numero, relacionamento)] = {
+            "notion_database_id": notion_database_id,
+            "numero_publicacao": numero,
+            "codigo_relacionamento": relacionamento,
+            "page_id": page_id,
+            "hash_conteudo": h,
+            "blocos": blocos,
+        }
+    if not linhas:
+        return
+
+    comando = insert(PaginaNotion).values(list(linhas.values()))
+    comando = comando.on_conflict_do_update(
+        index_elements=["notion_database_id", "numero_publicacao", "codigo_relacionamento"],
+        set_={
+            "page_id": comando.excluded.page_id,
+            "hash_conteudo": comando.excluded.hash_conteudo,
+            "blocos": comando.excluded.blocos,
+            "atualizado_em": func.now(),
+        },
+    )
+    try:
+        async with SessionLocal() as session:
+            await session.execute(comando)
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Erro ao salvar versões das páginas do banco {notion_database_id}: {e}")
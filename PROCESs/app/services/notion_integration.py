@@ -1,53 +1,167 @@
 import httpx
 from utils.logger import logger
-import re
+from utils.relatorio import AmostraErros
+from utils.serializacao import loads
+from services.notion.payload import PayloadBuilder, montar_propriedades
+from services.notion.existentes import buscar_existentes, pagina_existente
+from services.notion.versoes import carregar_versoes, salvar_versoes, versao_de, hash_conteudo, chave_versao
+from services.agendador import agendador, ESCRITA, CONSULTA
+from services.credenciais import (
+    NOTION,
+    STATUS_CREDENCIAL_INVALIDA,
+    CredencialInvalida,
+    cache_negativo,
+    registrar_credencial_invalida,
+)
+from services.prazo import Prazo, FORMATACAO, ESCRITA, limitar
+from utils.settings import NOTION_VERIFICAR_EXISTENTES, NOTION_API_URL, NOTION_TIMEOUT
 
-async def enviar_requisicao(client, url, headers, payload, tentativas=3):
+async def enviar_requisicao(client, url, headers, payload: bytes, tentativas=3, metodo="POST"):
     for tentativa in range(tentativas):
         try:
-            response = await client.post(url, headers=headers, json=payload)
+            response = await client.request(
+                metodo, url, headers=headers, content=payload, timeout=limitar(NOTION_TIMEOUT)
+            )
             return response
         except httpx.RequestError as e:
             if tentativa < tentativas - 1:
                 continue
             raise e
 
-def dividir_texto_em_blocos(texto: str, limite: int = 2000) -> list:
-    return [texto[i:i + limite] for i in range(0, len(texto), limite)]
+async def anexar_blocos(client, page_id: str, headers: dict, lotes: list):
+    """
+    Anexa os lotes de blocos ao corpo da página, em ordem. Retorna
+    ``(ids, resposta_com_erro)``, com os ids dos blocos criados.
+    """
+    url = f"{NOTION_API_URL}/blocks/{page_id}/children"
+    ids = []
+    for lote in lotes:
+        response = await enviar_requisicao(client, url, headers, lote, tentativas=3, metodo="PATCH")
+        if response.status_code != 200:
+            return ids, response
+        ids.extend(bloco["id"] for bloco in loads(response.content).get("results", []))
+    return ids, None
+
+async def verificar_credencial_notion(response, access_token: str, usuario: str = None):
+    """Aborta o envio quando o Notion recusa o token (revogado ou sem acesso ao banco)."""
+    if response.status_code in STATUS_CREDENCIAL_INVALIDA:
+        motivo = f"HTTP {response.status_code} - {response.text}"
+        await registrar_credencial_invalida(NOTION, access_token, motivo, usuario)
+        raise CredencialInvalida(NOTION, motivo)
+
+async def listar_blocos(client, page_id: str, headers: dict, uma_pagina: bool = False):
+    """
+    Ids dos blocos do corpo da página (só os 100 primeiros com
+    ``uma_pagina``). Retorna ``(ids, resposta_com_erro)``.
+    """
+    ids = []
+    cursor = None
+    while True:
+        url = f"{NOTION_API_URL}/blocks/{page_id}/children?page_size=100"
+        if cursor:
+            url += f"&start_cursor={cursor}"
+        response = await enviar_requisicao(client, url, headers, None, tentativas=3, metodo="GET")
+        if response.status_code != 200:
+            return ids, response
+        dados = loads(response.content)
+        ids.extend(bloco["id"] for bloco in dados.get("results", []))
+        if uma_pagina or not dados.get("has_more"):
+            return ids, None
+        cursor = dados.get("next_cursor")
+
+def bloco_removido(response) -> bool:
+    """Remoção bem-sucedida, ou o bloco já não existia (removido pelo usuário)."""
+    if response.status_code in (200, 404):
+        return True
+    return response.status_code == 400 and "archived" in response.text
+
+async def remover_blocos(client, headers: dict, blocos: list):
+    """Remove os blocos indicados. Retorna a resposta com erro, se houver."""
+    for bloco_id in blocos:
+        response = await enviar_requisicao(
+            client, f"{NOTION_API_URL}/blocks/{bloco_id}", headers, None, tentativas=3, metodo="DELETE"
+        )
+        if not bloco_removido(response):
+            return response
+    return None
 
 def formatar_dados_para_notion(dados_json: dict) -> dict:
-    def dividir_texto_em_blocos(texto: str, limite: int = 2000) -> list:
-        return [texto[i:i + limite] for i in range(0, len(texto), limite)]
+    return montar_propriedades(dados_json)
 
-    publicacao = (
-        f"{dados_json.get('termoReferenciaData', '')} "
-        f"{dados_json.get('titulo', '')} "
-        f"{dados_json.get('cabecalho', '')} "
-        f"{dados_json.get('textoPublicacao', '')} "
-        f"{dados_json.get('rodape', '')}"
-    ).strip()
+async def enviar_pagina(client, url, headers, payload: bytes, lotes: list, tem_corpo: bool = False):
+    """
+    Cria a página e anexa os blocos excedentes. Retorna a última resposta
+    relevante e os ids dos blocos do corpo.
+    """
+    response = await enviar_requisicao(client, url, headers, payload, tentativas=3)
+    if response.status_code != 200 or not tem_corpo:
+        return response, []
 
-    publicacao_formatada = re.sub(r";", r"\n", publicacao)
-    blocos_publicacao = dividir_texto_em_blocos(publicacao_formatada)
+    # A criação não devolve os blocos enviados com ela; a página é nova, então
+    # os primeiros 100 do corpo são exatamente esses
+    page_id = loads(response.content)["id"]
+    blocos, erro = await listar_blocos(client, page_id, headers, uma_pagina=True)
+    if erro is None and lotes:
+        logger.info(f"Página {page_id} excede os limites da propriedade; anexando {len(lotes)} lote(s) de blocos.")
+        anexados, erro = await anexar_blocos(client, page_id, headers, lotes)
+        blocos += anexados
+    return erro or response, blocos
 
-    publicacao_rich_text = [{"text": {"content": bloco}} for bloco in blocos_publicacao]
+async def atualizar_pagina(client, url, headers, page_id: str, payload: bytes, lotes: list, blocos_anteriores: list):
+    """
+    Atualiza as propriedades da página. O corpo só é tocado quando o conteúdo
+    anterior ou o novo têm blocos: saem apenas os blocos que este serviço
+    anexou (``blocos_anteriores``) e entram os novos, preservando o que o
+    usuário acrescentou à página. Retorna a última resposta relevante e os
+    ids dos blocos do corpo.
+    """
+    response = await enviar_requisicao(client, f"{url}/{page_id}", headers, payload, tentativas=3, metodo="PATCH")
+    if response.status_code != 200 or not (blocos_anteriores or lotes):
+        return response, blocos_anteriores
 
-    return {
-        "Jornal": {"title": [{"text": {"content": dados_json.get('jornal', {}).get('nomeJornal', 'Sem Nome')}}]},
-        "Tratado em": {"date": {"start": dados_json.get('jornal', {}).get('dataTratamento')}},
-        "Disponibilização": {"date": {"start": dados_json.get('jornal', {}).get('dataDisponibilizacao_Publicacao')}},
-        "Nº do Processo": {"rich_text": [{"text": {"content": dados_json.get('numeroUnicoProcesso', 'Sem Processo')}}]},
-        "Publicação": {"rich_text": publicacao_rich_text},
-        "Título": {"rich_text": [{"text": {"content": dados_json.get('titulo', 'Sem Título')}}]},
-        "Cabeçalho": {"rich_text": [{"text": {"content": dados_json.get('cabecalho', 'Sem Cabeçalho')}}]},
-        "Rodapé": {"rich_text": [{"text": {"content": dados_json.get('rodape') or 'Sem Rodapé'}}]},
-        "Nº Publicação": {"number": dados_json.get('numeroPublicacao')},
-        "Nº Arquivo": {"number": dados_json.get('numeroArquivo')},
-        "Cod Relacionamento": {"number": dados_json.get('codigoRelacionamento')}
-    }
+    erro = await remover_blocos(client, headers, blocos_anteriores or [])
+    if erro is not None:
+        return erro, blocos_anteriores
+    blocos, erro = await anexar_blocos(client, page_id, headers, lotes)
+    return erro or response, blocos
+
+async def localizar_paginas(client, headers, access_token: str, notion_database_id: str, intimacoes: list, usuario: str = None) -> dict:
+    """
+    Versões conhecidas das páginas das intimações, ``{chave: (page_id, hash)}``.
 
-async def enviar_dados_para_notion(intimacoes: list, access_token: str, notion_database_id: str):
-    url = "https://api.notion.com/v1/pages"
+    Primeiro consulta o registro local; as intimações que não estão nele são
+    procuradas no próprio banco do Notion (páginas criadas antes do registro
+    existir), e voltam sem hash nem blocos. Se a consulta ao Notion falhar,
+    seguem como novas.
+    """
+    versoes = await carregar_versoes(notion_database_id, intimacoes)
+    desconhecidas = [i for i in intimacoes if versao_de(i, versoes) is None]
+    if not NOTION_VERIFICAR_EXISTENTES or not desconhecidas:
+        return versoes
+
+    async def enviar(url, payload):
+        response = await agendador.executar(
+            usuario or notion_database_id,
+            CONSULTA,
+            lambda: enviar_requisicao(client, url, headers, payload, tentativas=3),
+        )
+        await verificar_credencial_notion(response, access_token, usuario)
+        return response
+
+    try:
+        existentes = await buscar_existentes(enviar, notion_database_id, desconhecidas)
+    except (httpx.HTTPError, RuntimeError) as e:
+        logger.warning(f"Não foi possível verificar intimações existentes no banco {notion_database_id}: {e}")
+        return versoes
+
+    for intimacao in desconhecidas:
+        page_id = pagina_existente(intimacao, existentes)
+        if page_id:
+            versoes[chave_versao(intimacao)] = (page_id, None, None)
+    return versoes
+
+async def enviar_dados_para_notion(intimacoes: list, access_token: str, notion_database_id: str, usuario: str = None, job=None, prazo: Prazo = None):
+    url = f"{NOTION_API_URL}/pages"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
@@ -55,44 +169,120 @@ async def enviar_dados_para_notion(intimacoes: list, access_token: str, notion_d
     }
 
     success_count = 0
-    error_count = 0
-    details = []
-
-    total = len(intimacoes)
-    logger.info(f"Iniciando o envio de {total} intimações para o Notion.")
-
-    async with httpx.AsyncClient(timeout=httpx.Timeout(60.0)) as client:
-        for index, intimacao in enumerate(intimacoes, start=1):
-            try:
-                logger.info(f"Processando intimação {index}/{total}...")
-                dados_formatados = formatar_dados_para_notion(intimacao)
-                payload = {
-                    "parent": {"database_id": notion_database_id},
-                    "properties": dados_formatados
-                }
-
-                response = await enviar_requisicao(client, url, headers, payload, tentativas=3)
-
-                if response.status_code == 200:
-                    success_count += 1
-                    logger.info(f"Intimação {index}/{total} enviada com sucesso.")
-                else:
-                    details.append({
-                        "index": index,
-                        "status": response.status_code,
-                        "response_text": response.text
-                    })
-                    error_count += 1
-                    logger.error(f"Erro ao enviar intimação {index}/{total}: {response.status_code} - {response.text}")
-
-            except httpx.TimeoutException:
-                details.append({"index": index, "error": "Timeout na solicitação"})
-                error_count += 1
-                logger.error(f"Timeout ao enviar intimação {index}/{total}.")
-            except httpx.RequestError as e:
-                details.append({"index": index, "error": f"Erro de conexão: {str(e)}"})
-                error_count += 1
-                logger.error(f"Erro de conexão ao enviar intimação {index}/{total}: {str(e)}")
-
-    logger.info(f"Envio concluído para o banco {notion_database_id}: {success_count} sucesso(s), {error_count} erro(s).")
-    return {"success": success_count, "errors": error_count, "details": details}
\ No newline at end of file
+    updated_count = 0
+    erros = AmostraErros(f"notion {notion_database_id}")
+    novas_versoes = []
+
+    cache_negativo.verificar(NOTION, access_token)
+    logger.info(f"Iniciando o envio de {len(intimacoes)} intimações para o Notion.")
+
+    builder = PayloadBuilder(notion_database_id)
+    prazo = prazo or Prazo(0)
+
+    # Formatação: conteúdo e hash de todas as páginas antes de ir à rede; os
+    # payloads só são serializados para as que de fato serão enviadas
+    prazo.iniciar_etapa(FORMATACAO)
+    formatadas = []
+    for intimacao in intimacoes:
+        prazo.verificar()
+        conteudo = builder.conteudo(intimacao)
+        formatadas.append((intimacao, conteudo, hash_conteudo(*conteudo)))
+
+    prazo.iniciar_etapa(ESCRITA)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(NOTION_TIMEOUT)) as client:
+        versoes = await localizar_paginas(client, headers, access_token, notion_database_id, intimacoes, usuario)
+
+        # Só segue para a API o que é novo ou mudou desde o último envio. Páginas
+        # encontradas no Notion sem registro local são adotadas com o hash
+        # atual, sem reescrita: vêm da mesma publicação e só voltam a ser
+        # atualizadas se ela mudar.
+        pendentes = []
+        for intimacao, conteudo, hash_atual in formatadas:
+            versao = versao_de(intimacao, versoes)
+            if versao and versao[1] is None:
+                novas_versoes.append((intimacao, versao[0], hash_atual, None))
+                continue
+            if versao and versao[1] == hash_atual:
+                continue
+            pendentes.append((intimacao, conteudo, hash_atual, versao))
+
+        skipped_count = len(intimacoes) - len(pendentes)
+        if skipped_count:
+            logger.info(f"{skipped_count} intimação(ões) sem alteração no banco {notion_database_id} serão ignoradas.")
+            if job:
+                job.registrar_ignoradas(skipped_count)
+
+        total = len(pendentes)
+        try:
+            for index, (intimacao, conteudo, hash_atual, versao) in enumerate(pendentes, start=1):
+                prazo.verificar()
+                try:
+                    logger.debug(f"Processando intimação {index}/{total}...", extra={"amostra": "notion.envio"})
+
+                    if versao:
+                        page_id, _, blocos_anteriores = versao
+                        atualizacao, lotes = builder.atualizacao(intimacao, conteudo)
+                        response, blocos = await agendador.executar(
+                            usuario or notion_database_id,
+                            ESCRITA,
+                            lambda page_id=page_id, atualizacao=atualizacao, lotes=lotes, anteriores=blocos_anteriores: atualizar_pagina(
+                                client, url, headers, page_id, atualizacao, lotes, anteriores
+                            ),
+                        )
+                    else:
+                        payload, lotes = builder.pagina(intimacao, conteudo)
+                        response, blocos = await agendador.executar(
+                            usuario or notion_database_id,
+                            ESCRITA,
+                            lambda payload=payload, lotes=lotes, tem_corpo=bool(conteudo[1]): enviar_pagina(
+                                client, url, headers, payload, lotes, tem_corpo
+                            ),
+                        )
+
+                    await verificar_credencial_notion(response, access_token, usuario)
+
+                    if response.status_code == 200:
+                        if versao:
+                            updated_count += 1
+                            novas_versoes.append((intimacao, versao[0], hash_atual, blocos))
+                            logger.info(f"Intimação {index}/{total} atualizada na página {versao[0]}.", extra={"amostra": "notion.envio"})
+                        else:
+                            success_count += 1
+                            novas_versoes.append((intimacao, loads(response.content)["id"], hash_atual, blocos))
+                            logger.info(f"Intimação {index}/{total} enviada com sucesso.", extra={"amostra": "notion.envio"})
+                        if job:
+                            job.registrar_pagina()
+                    else:
+                        erros.registrar({
+                            "index": index,
+                            "status": response.status_code,
+                            "response_text": response.text
+                        })
+                        logger.error(f"Erro ao enviar intimação {index}/{total}: {response.status_code} - {response.text}")
+                        if job:
+                            job.registrar_pagina(erro=f"HTTP {response.status_code}")
+
+                except httpx.TimeoutException:
+                    erros.registrar({"index": index, "error": "Timeout na solicitação"})
+                    logger.error(f"Timeout ao enviar intimação {index}/{total}.")
+                    if job:
+                        job.registrar_pagina(erro="Timeout na solicitação")
+                except httpx.RequestError as e:
+                    erros.registrar({"index": index, "error": f"Erro de conexão: {str(e)}"})
+                    logger.error(f"Erro de conexão ao enviar intimação {index}/{total}: {str(e)}")
+                    if job:
+                        job.registrar_pagina(erro=f"Erro de conexão: {str(e)}")
+        finally:
+            await salvar_versoes(notion_database_id, novas_versoes)
+
+    logger.info(
+        f"Envio concluído para o banco {notion_database_id}: {success_count} criada(s), "
+        f"{updated_count} atualizada(s), {skipped_count} sem alteração, {erros.total} erro(s)."
+    )
+    return {
+        "success": success_count,
+        "updated": updated_count,
+        "errors": erros.total,
+        "skipped": skipped_count,
+        "details": erros.como_dict(),
+    }
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from utils.settings import (
+    JOBS_PRAZO_SEGUNDOS,
+    JOBS_PRAZO_FRACAO_BUSCA,
+    JOBS_PRAZO_FRACAO_FORMATACAO,
+    JOBS_PRAZO_FRACAO_ESCRITA,
+)
+
+BUSCA = "busca"
+FORMATACAO = "formatacao"
+ESCRITA = "escrita"
+
+ETAPAS = (BUSCA, FORMATACAO, ESCRITA)
+
+# Folga dada aos timeouts de rede para que o cancelamento pelo prazo chegue
+# antes e o dia fique pendente, e não registrado como erro da API.
+FOLGA_TIMEOUT = 1.0
+
+# Instante (time.monotonic) em que termina a etapa em execução na tarefa atual.
+# O agendador copia o contexto de quem enfileira, então o limite acompanha a
+# unidade até a requisição HTTP.
+limite_da_etapa = ContextVar("limite_da_etapa", default=None)
+
+
+class PrazoExcedido(Exception):
+    """A etapa do job consumiu o seu orçamento de tempo."""
+
+    def __init__(self, etapa: str, orcamento: float):
+        super().__init__(f"Prazo da etapa {etapa} excedido ({orcamento:.1f}s)")
+        self.etapa = etapa
+        self.orcamento = orcamento
+
+
+def limitar(timeout: float) -> float:
+    """``timeout`` reduzido ao tempo que resta na etapa atual, se houver prazo."""
+    limite = limite_da_etapa.get()
+    if limite is None:
+        return timeout
+    return min(timeout, max(0.0, limite - time.monotonic()) + FOLGA_TIMEOUT)
+
+
+class Prazo:
+    """
+    Orçamento de tempo de um job, repartido entre busca, formatação e escrita.
+
+    Cada etapa recebe a sua fração do tempo que ainda resta, proporcional às
+    frações das etapas que faltam; o que uma etapa não usa passa para as
+    seguintes. Com ``total`` igual a zero não há limite.
+    """
+
+    def __init__(self, total: float = JOBS_PRAZO_SEGUNDOS, fracoes: dict = None):
+        self.total = total
+        self.fracoes = fracoes or {
+            BUSCA: JOBS_PRAZO_FRACAO_BUSCA,
+            FORMATACAO: JOBS_PRAZO_FRACAO_FORMATACAO,
+            ESCRITA: JOBS_PRAZO_FRACAO_ESCRITA,
+        }
+        self.fim = time.monotonic() + total if total > 0 else None
+        self.etapa = None
+        self._orcamento_da_etapa = None
+
+    def restante(self):
+        if self.fim is None:
+            return None
+        return max(0.0, self.fim - time.monotonic())
+
+    def orcamento(self, etapa: str):
+        restante = self.restante()
+        if restante is None:
+            return None
+        seguintes = ETAPAS[ETAPAS.index(etapa):]
+        soma = sum(self.fracoes.get(e, 0.0) for e in seguintes)
+        return restante * self.fracoes.get(etapa, 0.0) / soma if soma else restante
+
+    def iniciar_etapa(self, etapa: str):
+        """Define o limite da etapa para a tarefa atual e as que ela criar."""
+        self.etapa = etapa
+        orcamento = self._orcamento_da_etapa = self.orcamento(etapa)
+        limite_da_etapa.set(None if orcamento is None else time.monotonic() + orcamento)
+        return orcamento
+
+    def verificar(self):
+        """Para laços síncronos ou entre requisições: falha se a etapa estourou."""
+        limite = limite_da_etapa.get()
+        if limite is not None and time.monotonic() >= limite:
+            raise PrazoExcedido(self.etapa, self._orcamento_da_etapa or 0.0)
+
+    async def executar(self, etapa: str, coro):
+        """Executa ``coro`` como a etapa, cancelando-a quando o orçamento acaba."""
+        orcamento = self.iniciar_etapa(etapa)
+        try:
+            return await asyncio.wait_for(coro, orcamento)
+        except asyncio.TimeoutError:
+            raise PrazoExcedido(etapa, orcamento)
+
+    async def executar_ate_o_fim(self, etapa: str, coro):
+        """
+        Executa ``coro`` com o tempo que resta ao job inteiro; as etapas
+        internas controlam os próprios limites com ``iniciar_etapa``.
+        """
+        restante = self.restante()
+        try:
+            return await asyncio.wait_for(coro, restante)
+        except asyncio.TimeoutError:
+            raise PrazoExcedido(self.etapa or etapa, restante)
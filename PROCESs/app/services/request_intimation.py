@@ -1,8 +1,21 @@
 from pydantic import BaseModel, Field
+import asyncio
+import time
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from utils.logger import logger
+from utils.serializacao import loads
+from services.prazo import limitar
+from services.circuito import disjuntores, latencias, primeira_resposta, FECHADO
+from services.credenciais import (
+    AASP,
+    CredencialInvalida,
+    cache_negativo,
+    registrar_credencial_invalida,
+    resposta_aasp_chave_invalida,
+)
+from utils.settings import AASP_TIMEOUT, AASP_HEDGE_ATIVO, AASP_EMPRESA_URL, AASP_ASSOCIADO_URL
 from models.models import User
 from sqlalchemy.future import select
 from datetime import datetime
@@ -36,66 +49,69 @@ async def obter_credenciais_do_usuario(user_uuid: str, db: AsyncSession):
         logger.error(f"Erro ao obter credenciais do usuário: {e}")
         raise
 
-async def obter_dados_intimacao(matricula: str, codigo: str, data: dict) -> dict:
-    try:
-        # Formatar a data no formato dia%2Fmes%2Fano
-        data_formatada = f"{data['dia']:02d}%2F{data['mes']:02d}%2F{data['ano']}"
-        url = f"http://intimacaoapi.aasp.org.br/api/Empresa/intimacao?chave={matricula}&codigoPessoaAssociado={codigo}&data={data_formatada}"
+async def consultar_aasp(endpoint: str, url: str) -> dict:
+    """
+    GET na API da AASP protegido pelo circuit breaker do endpoint. Com o
+    hedge ativo, uma segunda requisição é enviada quando a primeira passa do
+    p95 observado.
+    """
+    disjuntor = disjuntores[endpoint]
+    latencia = latencias[endpoint]
 
-        logger.info(f"Requisição para {url}")
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url)
-            if response.status_code == 200:
-                return response.json()
-            logger.error(f"Erro na API: {response.status_code}")
-            return {"error": f"Erro na API: {response.status_code}"}
-    except Exception as e:
-        logger.error(f"Erro de conexão: {str(e)}")
-        return {"error": str(e)}
-    
-async def obter_dados_intimacao_associado(matricula: str, data: dict) -> dict:
-    try:
-        # Formatar a data no formato dia%2Fmes%2Fano
-        data_formatada = f"{data['dia']:02d}%2F{data['mes']:02d}%2F{data['ano']}"
-        url = f"https://intimacaoapi.aasp.org.br/api/Associado/intimacao/json?chave={matricula}&data={data_formatada}&diferencial=false"
-        
+    if not disjuntor.permitir():
+        logger.warning(f"Circuito {endpoint} aberto. Requisição não enviada.", extra={"amostra": "aasp.circuito"})
+        return {"error": f"Circuito aberto para {endpoint}"}
 
-        logger.info(f"Requisição para {url}")
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url)
-            if response.status_code == 200:
-                return response.json()
-            logger.error(f"Erro na API: {response.status_code}")
-            return {"error": f"Erro na API: {response.status_code}"}
+    atraso_hedge = latencia.percentil(0.95) if AASP_HEDGE_ATIVO and disjuntor.estado == FECHADO else None
+
+    logger.info(f"Requisição para {url}", extra={"amostra": "aasp.requisicao"})
+    inicio = time.monotonic()
+    try:
+        async with httpx.AsyncClient(follow_redirects=True, timeout=httpx.Timeout(limitar(AASP_TIMEOUT))) as client:
+            response = await primeira_resposta(lambda: client.get(url), atraso_hedge)
+    except asyncio.CancelledError:
+        disjuntor.liberar_teste()
+        raise
     except Exception as e:
+        disjuntor.registrar_falha()
         logger.error(f"Erro de conexão: {str(e)}")
         return {"error": str(e)}
 
-    
+    if response.status_code >= 500 or response.status_code == 429:
+        disjuntor.registrar_falha()
+    else:
+        disjuntor.registrar_sucesso()
+        latencia.registrar(time.monotonic() - inicio)
 
-def formatar_dados_para_notion(dados_json: dict) -> dict:
-    def formatar_data(data: str) -> str:
-        return data if data else None
+    if response.status_code == 200:
+        try:
+            return loads(response.content)
+        except ValueError as e:
+            logger.error(f"Resposta inválida da API: {e}")
+            return {"error": f"Resposta inválida da API: {e}"}
+    if resposta_aasp_chave_invalida(response.status_code, response.text):
+        logger.error(f"Chave recusada pela API: {response.status_code}")
+        return {"error": f"Chave recusada pela API: {response.status_code}", "credencial_invalida": True}
+    logger.error(f"Erro na API: {response.status_code}")
+    return {"error": f"Erro na API: {response.status_code}"}
 
-    jornal_nome = dados_json.get('jornal', {}).get('nomeJornal', None) or "Sem Nome"
-    publicacao = (
-        f"{dados_json.get('termoReferenciaData', '')} "
-        f"{dados_json.get('titulo', '')} "
-        f"{dados_json.get('cabecalho', '')} "
-        f"{dados_json.get('textoPublicacao', '')} "
-        f"{dados_json.get('rodape', '')}"
-    ).strip()
+async def consultar_aasp_com_chave(endpoint: str, url: str, matricula: str) -> dict:
+    """Recusa de imediato chaves já rejeitadas e registra as novas recusas."""
+    cache_negativo.verificar(AASP, matricula)
+    dados = await consultar_aasp(endpoint, url)
+    if dados.get("credencial_invalida"):
+        await registrar_credencial_invalida(AASP, matricula, dados["error"], matricula)
+        raise CredencialInvalida(AASP, dados["error"])
+    return dados
 
-    return {
-        "Jornal": {"title": [{"text": {"content": jornal_nome}}]},
-        "Tratado em": {"date": {"start": formatar_data(dados_json.get('jornal', {}).get('dataTratamento'))}},
-        "Disponibilização": {"date": {"start": formatar_data(dados_json.get('jornal', {}).get('dataDisponibilizacao_Publicacao'))}},
-        "Nº do Processo": {"rich_text": [{"text": {"content": dados_json.get('numeroUnicoProcesso', 'Sem Processo')}}]},
-        "Publicação": {"rich_text": [{"text": {"content": publicacao}}]},
-        "Nº Publicação": {"number": dados_json.get('numeroPublicacao') or 0},
-        "Nº Arquivo": {"number": dados_json.get('numeroArquivo') or 0},
-        "Cod Relacionamento": {"number": dados_json.get('codigoRelacionamento') or 0},
-        "Título": {"rich_text": [{"text": {"content": dados_json.get('titulo', 'Sem Título')}}]},
-        "Cabeçalho": {"rich_text": [{"text": {"content": dados_json.get('cabecalho', 'Sem Cabeçalho')}}]},
-        "Rodapé": {"rich_text": [{"text": {"content": dados_json.get('rodape') or 'Sem Rodapé'}}]}
-    }
\ No newline at end of file
+async def obter_dados_intimacao(matricula: str, codigo: str, data: dict) -> dict:
+    # Formatar a data no formato dia%2Fmes%2Fano
+    data_formatada = f"{data['dia']:02d}%2F{data['mes']:02d}%2F{data['ano']}"
+    url = f"{AASP_EMPRESA_URL}?chave={matricula}&codigoPessoaAssociado={codigo}&data={data_formatada}"
+    return await consultar_aasp_com_chave("aasp_empresa", url, matricula)
+    
+async def obter_dados_intimacao_associado(matricula: str, data: dict) -> dict:
+    # Formatar a data no formato dia%2Fmes%2Fano
+    data_formatada = f"{data['dia']:02d}%2F{data['mes']:02d}%2F{data['ano']}"
+    url = f"{AASP_ASSOCIADO_URL}?chave={matricula}&data={data_formatada}&diferencial=false"
+    return await consultar_aasp_com_chave("aasp_associado", url, matricula)
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from models.db_config import SessionLocal, dsn_asyncpg
+from models.models import SincronizacaoDiaria
+from services.drenagem import drenagem
+from utils.logger import logger
+from utils.resoucer import UserPayload
+from utils.settings import (
+    CREDENCIAIS_INVALIDAS_TTL,
+    SINCRONIZACAO_FUSO,
+    SINCRONIZACAO_INICIO,
+    SINCRONIZACAO_JANELA_HORAS,
+    SINCRONIZACAO_JITTER_SEGUNDOS,
+    SINCRONIZACAO_MAXIMO_POR_MINUTO,
+    SINCRONIZACAO_DIAS_ATRAS,
+    SINCRONIZACAO_INTERVALO,
+)
+
+# Só o processo que detém este advisory lock executa a agenda
+CHAVE_LOCK_AGENDA = 8047
+
+FUSO = ZoneInfo(SINCRONIZACAO_FUSO)
+
+USUARIOS_PENDENTES = text(
+    """
+    SELECT u.uuid, u.matricula, u.codigo_aasp, u.access_token, nd.notion_database_id
+    FROM users u
+    JOIN notion_databases nd ON nd.uuid = u.uuid
+    LEFT JOIN sincronizacoes_diarias s ON s.uuid = u.uuid
+    WHERE u.matricula IS NOT NULL
+      AND (u.credencial_invalida_em IS NULL
+           OR u.credencial_invalida_em < now() - make_interval(secs => :ttl_credencial))
+      AND (s.data IS NULL OR s.data < :dia)
+    """
+)
+
+
+def _hash(valor: str) -> int:
+    return int.from_bytes(hashlib.sha256(valor.encode("utf-8")).digest()[:8], "big")
+
+
+def inicio_da_janela(dia: date) -> datetime:
+    hora, minuto = (int(parte) for parte in SINCRONIZACAO_INICIO.split(":"))
+    return datetime(dia.year, dia.month, dia.day, hora, minuto, tzinfo=FUSO)
+
+
+def janela_atual(agora: datetime) -> date:
+    """
+    Dia da janela mais recente já iniciada. Uma janela que atravessa a
+    meia-noite continua pertencendo ao dia em que começou.
+    """
+    dia = agora.astimezone(FUSO).date()
+    if inicio_da_janela(dia) > agora:
+        dia -= timedelta(days=1)
+    return dia
+
+
+def horario_previsto(user_uuid: str, dia: date) -> datetime:
+    """
+    Momento da sincronização do usuário na janela do dia: um deslocamento
+    fixo a partir do início da janela, derivado do uuid, mais um jitter que
+    muda a cada dia.
+    """
+    inicio = inicio_da_janela(dia)
+    janela = max(1, int(SINCRONIZACAO_JANELA_HORAS * 3600))
+    jitter = _hash(f"{user_uuid}:{dia.isoformat()}") % max(1, int(SINCRONIZACAO_JITTER_SEGUNDOS))
+    return inicio + timedelta(seconds=_hash(user_uuid) % janela + jitter)
+
+
+class LimitadorTaxa:
+    """Espaça os disparos para no máximo ``por_minuto`` por minuto."""
+
+    def __init__(self, por_minuto: float):
+        self.intervalo = 60.0 / por_minuto if por_minuto > 0 else 0.0
+        self._proximo = 0.0
+
+    async def aguardar(self):
+        agora = time.monotonic()
+        espera = self._proximo - agora
+        self._proximo = max(agora, self._proximo) + self.intervalo
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+async def carregar_pendentes(dia: date) -> list:
+    """
+    Usuários ainda não sincronizados na janela de ``dia``. Uma credencial
+    recusada sai da agenda até ser trocada (o trigger de ``users`` limpa a
+    marcação) ou até passar ``CREDENCIAIS_INVALIDAS_TTL``.
+    """
+    async with SessionLocal() as session:
+        result = await session.execute(
+            USUARIOS_PENDENTES, {"dia": dia, "ttl_credencial": CREDENCIAIS_INVALIDAS_TTL}
+        )
+        return list(result.all())
+
+
+async def marcar_sincronizado(user_uuid: str, dia: date, job_id: str):
+    comando = insert(SincronizacaoDiaria).values(uuid=user_uuid, data=dia, job_id=job_id)
+    comando = comando.on_conflict_do_update(
+        index_elements=[SincronizacaoDiaria.uuid],
+        set_={"data": comando.excluded.data, "job_id": comando.excluded.job_id},
+    )
+    async with SessionLocal() as session:
+        await session.execute(comando)
+        await session.commit()
+
+
+async def executar_ciclo(despachar, limitador: LimitadorTaxa) -> int:
+    """
+    Enfileira a sincronização dos usuários cujo horário do dia já chegou,
+    em ordem de horário e respeitando o limite de taxa. ``despachar(tipo,
+    payload)`` devolve o id do job, ou ``None`` quando não há vaga; nesse
+    caso o restante fica para o próximo ciclo.
+    """
+    agora = datetime.now(FUSO)
+    dia = janela_atual(agora)
+    vencidos = sorted(
+        (
+            (horario_previsto(usuario.uuid, dia), usuario)
+            for usuario in await carregar_pendentes(dia)
+        ),
+        key=lambda item: item[0],
+    )
+    enfileirados = 0
+    for horario, usuario in vencidos:
+        if horario > agora:
+            break
+        if drenagem.encerrando:
+            break
+
+        await limitador.aguardar()
+        tipo = "empresa" if usuario.codigo_aasp else "associado"
+        payload = UserPayload(
+            matricula=usuario.matricula,
+            codigo_aasp=usuario.codigo_aasp,
+            access_token=usuario.access_token,
+            notion_database_id=usuario.notion_database_id,
+            tipo=tipo,
+            dias_atras=SINCRONIZACAO_DIAS_ATRAS,
+        )
+        job_id = await despachar(tipo, payload)
+        if job_id is None:
+            logger.info("Sincronização diária sem vaga para novos jobs; continua no próximo ciclo.")
+            break
+        await marcar_sincronizado(usuario.uuid, dia, job_id)
+        enfileirados += 1
+
+    if enfileirados:
+        logger.info(f"Sincronização diária: {enfileirados} usuário(s) enfileirados.")
+    return enfileirados
+
+
+async def executar_agenda(despachar):
+    """
+    Mantém a agenda diária enquanto este processo for o líder, isto é,
+    enquanto segurar o advisory lock numa conexão dedicada. Se o processo
+    cair, a conexão fecha, o lock é liberado e outro processo assume; a
+    tabela ``sincronizacoes_diarias`` evita enfileirar o mesmo usuário duas
+    vezes no dia.
+    """
+    limitador = LimitadorTaxa(SINCRONIZACAO_MAXIMO_POR_MINUTO)
+    while not drenagem.encerrando:
+        conexao = None
+        try:
+            conexao = await asyncpg.connect(dsn_asyncpg())
+            if await conexao.fetchval("SELECT pg_try_advisory_lock($1)", CHAVE_LOCK_AGENDA):
+                logger.info("Este processo assumiu a agenda de sincronização diária.")
+                while not conexao.is_closed() and not drenagem.encerrando:
+                    await executar_ciclo(despachar, limitador)
+                    await asyncio.sleep(SINCRONIZACAO_INTERVALO)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro na agenda de sincronização diária: {e}")
+        finally:
+            if conexao is not None and not conexao.is_closed():
+                await conexao.close()
+        await asyncio.sleep(SINCRONIZACAO_INTERVALO)
@@ -0,0 +1,52 @@
+"""
+Execução de produção do PROCESs: vários processos de trabalho, sem reload.
+
+Com ``PROCESS_DISTRIBUIDO=true`` os jobs aceitos por qualquer processo (ou
+réplica) vão para a fila ``jobs_fila`` e são executados por quem tiver vaga.
+uvloop e httptools são usados quando estiverem instalados.
+
+Os limites de concorrência (agendador e admissão) são do serviço inteiro e
+cada processo usa ``1 / (PROCESS_WORKERS × PROCESS_REPLICAS)`` deles; informe
+``PROCESS_REPLICAS`` ao escalar horizontalmente. O circuit breaker da AASP e o
+pool do banco continuam sendo de cada processo.
+"""
+import importlib.util
+import os
+import uvicorn
+from utils.logger import logger
+from utils.settings import (
+    PROCESS_WORKERS,
+    PROCESS_REPLICAS,
+    PROCESS_DISTRIBUIDO,
+    AGENDADOR_LIMITE_GLOBAL,
+    ADMISSAO_LIMITE_EM_EXECUCAO,
+    por_processo,
+)
+
+
+def _disponivel(modulo: str) -> bool:
+    return importlib.util.find_spec(modulo) is not None
+
+
+if __name__ == "__main__":
+    HOST = os.getenv("APP_HOST", "0.0.0.0")
+    PORT = int(os.getenv("APP_PORT", 8003))
+
+    workers = PROCESS_WORKERS
+    if workers > 1 and not PROCESS_DISTRIBUIDO:
+        logger.warning("PROCESS_DISTRIBUIDO desativado: usando um único processo para não dividir o estado dos jobs.")
+        workers = 1
+
+    loop = "uvloop" if _disponivel("uvloop") else "asyncio"
+    http = "httptools" if _disponivel("httptools") else "h11"
+    logger.info(f"Iniciando PROCESs com {workers} processo(s) (loop={loop}, http={http}).")
+    if PROCESS_DISTRIBUIDO:
+        processos = workers * PROCESS_REPLICAS
+        logger.info(
+            f"Limites por processo ({processos} no total): agendador {por_processo(AGENDADOR_LIMITE_GLOBAL)}, "
+            f"jobs em execução {por_processo(ADMISSAO_LIMITE_EM_EXECUCAO)}."
+        )
+        if processos > min(AGENDADOR_LIMITE_GLOBAL, ADMISSAO_LIMITE_EM_EXECUCAO):
+            logger.warning("Há mais processos que vagas nos limites do serviço; cada processo fica com 1 e o total é excedido.")
+
+    uvicorn.run("main:app", host=HOST, port=PORT, workers=workers, loop=loop, http=http, reload=False)
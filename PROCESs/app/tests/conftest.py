@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do serviço são importados a partir de PROCESs/app, como em main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,61 @@
+from datetime import date
+
+import pytest
+
+from services.calendario import NACIONAL, domingo_de_pascoa, feriados, dia_de_publicacao, planejar_datas
+
+
+@pytest.mark.parametrize("ano, pascoa", [
+    (1818, date(1818, 3, 22)),
+    (2000, date(2000, 4, 23)),
+    (2019, date(2019, 4, 21)),
+    (2024, date(2024, 3, 31)),
+    (2025, date(2025, 4, 20)),
+    (2026, date(2026, 4, 5)),
+    (2038, date(2038, 4, 25)),
+])
+def test_domingo_de_pascoa(ano, pascoa):
+    assert domingo_de_pascoa(ano) == pascoa
+
+
+def test_feriados_nacionais_moveis():
+    dias = feriados(2025, NACIONAL)
+    assert {date(2025, 3, 3), date(2025, 3, 4), date(2025, 4, 18), date(2025, 6, 19)} <= dias
+    assert date(2025, 4, 17) not in dias
+
+
+def test_feriados_nacionais_fixos():
+    dias = feriados(2026, NACIONAL)
+    assert {date(2026, 1, 1), date(2026, 4, 21), date(2026, 11, 20), date(2026, 12, 25)} <= dias
+
+
+def test_feriados_do_tribunal_incluem_os_nacionais():
+    assert feriados(2025, NACIONAL) < feriados(2025, "TJSP")
+    assert {date(2025, 1, 25), date(2025, 4, 17)} <= feriados(2025, "TJSP")
+
+
+def test_fim_de_semana_nao_tem_publicacao():
+    assert not dia_de_publicacao(date(2026, 10, 17))
+    assert not dia_de_publicacao(date(2026, 10, 18))
+
+
+def test_feriado_local_nao_e_descartado_sem_tribunal():
+    # 25/01/2027 (segunda): aniversário de São Paulo, feriado só no TJSP
+    assert dia_de_publicacao(date(2027, 1, 25), (NACIONAL,))
+    assert not dia_de_publicacao(date(2027, 1, 25), ("TJSP",))
+
+
+def test_dia_descartado_so_se_nenhum_tribunal_publica():
+    # O TRT15 não tem o feriado de 25/01
+    assert dia_de_publicacao(date(2027, 1, 25), ("TJSP", "TRT15"))
+    assert not dia_de_publicacao(date(2027, 1, 25), ("TJSP", "TRF3"))
+
+
+def test_planejar_datas_semana_santa():
+    datas = planejar_datas(8, hoje=date(2025, 4, 22), tribunais=("TJSP",))
+    assert datas == [{"dia": 16, "mes": 4, "ano": 2025}, {"dia": 15, "mes": 4, "ano": 2025}]
+
+
+def test_planejar_datas_sem_tribunal_mantem_quinta_santa():
+    datas = planejar_datas(8, hoje=date(2025, 4, 22), tribunais=(NACIONAL,))
+    assert {"dia": 17, "mes": 4, "ano": 2025} in datas
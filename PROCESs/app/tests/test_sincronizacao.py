@@ -0,0 +1,39 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from services import sincronizacao
+from services.sincronizacao import FUSO, horario_previsto, janela_atual
+
+
+@pytest.fixture
+def janela_noturna(monkeypatch):
+    monkeypatch.setattr(sincronizacao, "SINCRONIZACAO_INICIO", "22:00")
+    monkeypatch.setattr(sincronizacao, "SINCRONIZACAO_JANELA_HORAS", 4)
+
+
+def local(texto: str) -> datetime:
+    return datetime.fromisoformat(texto).replace(tzinfo=FUSO)
+
+
+@pytest.mark.parametrize("agora, dia", [
+    ("2026-10-19 21:59", date(2026, 10, 18)),
+    ("2026-10-19 22:00", date(2026, 10, 19)),
+    ("2026-10-19 23:30", date(2026, 10, 19)),
+    ("2026-10-20 01:30", date(2026, 10, 19)),
+])
+def test_janela_que_atravessa_a_meia_noite_pertence_ao_dia_em_que_comecou(janela_noturna, agora, dia):
+    assert janela_atual(local(agora)) == dia
+
+
+def test_horario_previsto_fica_dentro_da_janela(janela_noturna):
+    inicio = local("2026-10-19 22:00")
+    limite = inicio + timedelta(hours=4, seconds=sincronizacao.SINCRONIZACAO_JITTER_SEGUNDOS)
+    for i in range(200):
+        assert inicio <= horario_previsto(f"usuario-{i}", date(2026, 10, 19)) < limite
+
+
+def test_janela_considera_o_fuso_configurado(janela_noturna):
+    # 00:30 UTC ainda é 21:30 em São Paulo: a janela de hoje não começou
+    agora = datetime.fromisoformat("2026-10-20 00:30+00:00")
+    assert janela_atual(agora) == date(2026, 10, 18)
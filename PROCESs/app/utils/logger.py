@@ -1,31 +1,209 @@
+import atexit
+import copy
+import json
 import logging
 import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 
 # Definir o nível de log a partir da variável de ambiente ou usar "INFO" como padrão
 log_level = os.getenv("LOG_LEVEL", "INFO").upper()
 
-# Criar um handler de saída padrão (console)
-console_handler = logging.StreamHandler()
+# Níveis por módulo/logger, ex.: "sqlalchemy.engine=WARNING,notion_integration=DEBUG"
+log_levels = os.getenv("LOG_LEVELS", "sqlalchemy.engine=WARNING,httpx=WARNING")
 
-# Definir um formatter personalizado para incluir o status e outras informações
-formatter = logging.Formatter(
-    fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+# Formato de saída: "json" (padrão) ou "text"
+log_format = os.getenv("LOG_FORMAT", "json").lower()
 
-# Associar o formatter ao handler
-console_handler.setFormatter(formatter)
+# Máximo de logs por segundo para cada chave de amostragem (logs por item)
+log_sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "5"))
+
+# Atributos padrão de um LogRecord, usados para separar os campos extras
+_ATRIBUTOS_PADRAO = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "amostra"}
+
+
+def _nivel(valor: str):
+    """Nível numérico de um nome ("INFO", "debug") ou número ("10"); ``None`` se inválido."""
+    valor = valor.strip().upper()
+    if valor.isdigit():
+        return int(valor)
+    nivel = logging.getLevelName(valor)
+    return nivel if isinstance(nivel, int) else None
+
+
+def _parse_niveis(valor: str, avisos: list) -> dict:
+    niveis = {}
+    for item in filter(None, (parte.strip() for parte in valor.split(","))):
+        nome, _, nivel = item.partition("=")
+        numero = _nivel(nivel)
+        if nome.strip() and numero is not None:
+            niveis[nome.strip()] = numero
+        else:
+            avisos.append(f"LOG_LEVELS: item inválido ignorado: {item!r}")
+    return niveis
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        for chave, valor in vars(record).items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                dados[chave] = valor
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados["exc_info"] = record.exc_text
+        if record.stack_info:
+            dados["stack_info"] = record.stack_info
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FilaHandler(QueueHandler):
+    """
+    ``QueueHandler`` que não formata o registro antes de enfileirá-lo.
+
+    O ``prepare`` padrão junta o traceback à mensagem e limpa ``exc_info``,
+    então o formatador da thread de saída não saberia que houve exceção. Aqui
+    só a mensagem é resolvida e o traceback vai já formatado em ``exc_text``
+    (sem manter os frames vivos na fila).
+    """
+
+    _formatador = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._formatador.formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+
+class NivelPorModuloFilter(logging.Filter):
+    """
+    Aplica o nível configurado para o módulo do registro ou para o seu
+    logger (o nome mais específico da hierarquia) e, na falta dele, o nível
+    global. Como a raiz fica no menor nível configurado, um módulo pode
+    tanto subir quanto baixar o limite em relação ao ``LOG_LEVEL``.
+    """
+
+    def __init__(self, niveis: dict, padrao: int):
+        super().__init__()
+        self.niveis = niveis
+        self.padrao = padrao
+
+    def nivel(self, record: logging.LogRecord) -> int:
+        nivel = self.niveis.get(record.module)
+        if nivel is not None:
+            return nivel
+        nome = record.name
+        while nome:
+            if nome in self.niveis:
+                return self.niveis[nome]
+            nome = nome.rpartition(".")[0]
+        return self.padrao
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.nivel(record)
+
+
+class AmostragemFilter(logging.Filter):
+    """
+    Limita a taxa de logs por item.
+
+    Registros emitidos com ``extra={"amostra": "<chave>"}`` são limitados a
+    ``taxa`` por segundo para cada chave; os descartados são contabilizados
+    e informados no próximo registro emitido da mesma chave. Avisos e erros
+    nunca são descartados.
+    """
+
+    def __init__(self, taxa: float):
+        super().__init__()
+        self.taxa = taxa
+        self._janelas = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        chave = getattr(record, "amostra", None)
+        if chave is None or record.levelno >= logging.WARNING or self.taxa <= 0:
+            return True
+
+        agora = time.monotonic()
+        with self._lock:
+            inicio, emitidos, suprimidos = self._janelas.get(chave, (agora, 0, 0))
+            if agora - inicio >= 1.0:
+                inicio, emitidos = agora, 0
+            if emitidos >= self.taxa:
+                self._janelas[chave] = (inicio, emitidos, suprimidos + 1)
+                return False
+            self._janelas[chave] = (inicio, emitidos + 1, 0)
+
+        if suprimidos:
+            record.suprimidos = suprimidos
+        return True
+
+
+def configurar_logging() -> QueueListener:
+    """
+    Envia todos os logs por uma fila para uma thread dedicada, evitando
+    escrita síncrona no stderr a partir do event loop.
+    """
+    console_handler = logging.StreamHandler()
+    if log_format == "json":
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(logging.Formatter(
+            fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        ))
+
+    avisos = []
+    niveis = _parse_niveis(log_levels, avisos)
+    padrao = _nivel(log_level)
+    if padrao is None:
+        avisos.append(f"LOG_LEVEL inválido: {log_level!r}; usando INFO.")
+        padrao = logging.INFO
+    fila = queue.SimpleQueue()
+    queue_handler = FilaHandler(fila)
+    queue_handler.addFilter(NivelPorModuloFilter(niveis, padrao))
+    queue_handler.addFilter(AmostragemFilter(log_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    # Todos os módulos logam por utils.logger, que herda o nível da raiz; o
+    # filtro acima decide por módulo a partir do menor nível configurado.
+    root.setLevel(min([padrao, *niveis.values()]))
+    for nome, nivel in niveis.items():
+        logging.getLogger(nome).setLevel(nivel)
+
+    listener = QueueListener(fila, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    for aviso in avisos:
+        logging.getLogger(__name__).warning(aviso)
+    return listener
+
+
+listener = configurar_logging()
 
 # Configurar o logger principal
 logger = logging.getLogger(__name__)
-logger.setLevel(log_level)
-logger.addHandler(console_handler)
 
 # Adicionar um exemplo de função para logar status
 def log_status(status: str, mensagem: str, detalhes: dict = None):
     """
     Loga informações detalhadas de status.
-    
+
     Args:
         status (str): Sucesso ou erro.
         mensagem (str): Mensagem descritiva do evento.
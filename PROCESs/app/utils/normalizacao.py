@@ -0,0 +1,45 @@
+from functools import lru_cache
+from unidecode import unidecode
+
+# Faixas pré-calculadas: ASCII, Latin-1, Latin Extended-A/B e pontuação geral.
+# Os demais caracteres são calculados na primeira ocorrência e guardados.
+FAIXAS_PRECALCULADAS = ((0x0000, 0x0250), (0x2000, 0x2070))
+TAMANHO_CACHE = 4096
+
+
+def _transliterar(caractere: str) -> str:
+    """Equivalente, para um caractere, a unidecode seguido do filtro isalnum/isspace."""
+    return "".join(e for e in unidecode(caractere) if e.isalnum() or e.isspace())
+
+
+class _TabelaNormalizacao(dict):
+    """Tabela de ``str.translate`` que se completa sob demanda."""
+
+    def __missing__(self, codigo: int) -> str:
+        valor = self[codigo] = _transliterar(chr(codigo))
+        return valor
+
+
+_TABELA = _TabelaNormalizacao(
+    (codigo, _transliterar(chr(codigo)))
+    for inicio, fim in FAIXAS_PRECALCULADAS
+    for codigo in range(inicio, fim)
+)
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def normalizar_valor(valor):
+    """
+    Normaliza o valor de texto:
+    - Remove acentos.
+    - Converte para minúsculas.
+    - Remove caracteres especiais.
+    - Remove espaços extras.
+
+    Como o unidecode translitera caractere a caractere, o resultado é o mesmo
+    de ``unidecode`` seguido do filtro, feito numa única passada de
+    ``str.translate``. Valores repetidos (tipo, código AASP) saem do cache.
+    """
+    if not valor:
+        return ""
+    return valor.translate(_TABELA).strip().lower()
@@ -0,0 +1,51 @@
+import logging
+import random
+from utils.settings import RELATORIO_MAXIMO_ERROS, RELATORIO_TAMANHO_TEXTO, RELATORIO_DETALHES_NO_LOG
+
+# Destino dos detalhes completos; o nível pode ser ajustado com LOG_LEVELS=relatorio=...
+logger_detalhes = logging.getLogger("relatorio")
+
+
+def _truncar(valor):
+    if isinstance(valor, str) and len(valor) > RELATORIO_TAMANHO_TEXTO:
+        return valor[:RELATORIO_TAMANHO_TEXTO] + "…"
+    return valor
+
+
+class AmostraErros:
+    """
+    Erros de um envio, de uma busca ou de um job em memória limitada: todos
+    são contados, mas só uma amostra uniforme de até ``maximo`` fica guardada
+    (reservoir sampling), com os textos truncados. Com ``detalhes_no_log``
+    (padrão ``RELATORIO_DETALHES_NO_LOG``) cada erro completo vai também para
+    o logger ``relatorio``, fora da resposta.
+    """
+
+    def __init__(self, contexto: str = None, maximo: int = RELATORIO_MAXIMO_ERROS, detalhes_no_log: bool = RELATORIO_DETALHES_NO_LOG):
+        self.contexto = contexto
+        self.maximo = maximo
+        self.detalhes_no_log = detalhes_no_log
+        self.total = 0
+        self.amostra = []
+
+    def registrar(self, erro: dict):
+        self.total += 1
+        if self.detalhes_no_log:
+            logger_detalhes.info(
+                f"Erro {self.total} ({self.contexto}): {erro}",
+                extra={"relatorio": self.contexto},
+            )
+
+        erro = {chave: _truncar(valor) for chave, valor in erro.items()}
+        if len(self.amostra) < self.maximo:
+            self.amostra.append(erro)
+            return
+        posicao = random.randrange(self.total)
+        if posicao < self.maximo:
+            self.amostra[posicao] = erro
+
+    def __len__(self) -> int:
+        return self.total
+
+    def como_dict(self) -> dict:
+        return {"total": self.total, "amostra": list(self.amostra)}
@@ -1,24 +1,10 @@
 import asyncio
 from pydantic import BaseModel
-import unidecode
 from fastapi import HTTPException, Body
 from utils.logger import logger
+from utils.normalizacao import normalizar_valor
 from typing import Optional
-
-def normalizar_valor(valor):
-    """
-    Normaliza o valor de texto:
-    - Remove acentos.
-    - Converte para minúsculas.
-    - Remove caracteres especiais.
-    - Remove espaços extras.
-    """
-    if not valor:
-        return ""
-    valor = unidecode(valor)  # Remove acentos
-    valor = "".join(e for e in valor if e.isalnum() or e.isspace())  # Remove caracteres especiais
-    return valor.strip().lower()  # Remove espaços extras e converte para minúsculas
-
+from datetime import date
 
 
 fila_uuids = asyncio.Queue()
@@ -29,6 +15,8 @@ class UserPayload(BaseModel):
     access_token: str
     notion_database_id: str
     tipo: str
+    dias_atras: Optional[int] = None  # sincronização incremental; padrão do tipo quando ausente
+    continuacao: int = 0  # quantas vezes o job já foi reenfileirado por estouro de prazo
 
 class UserPayloadAssociado(BaseModel):
     matricula: str    
@@ -36,15 +24,19 @@ class UserPayloadAssociado(BaseModel):
     notion_database_id: str
     tipo: str
 
+class ReenvioPayload(BaseModel):
+    matricula: str
+    access_token: str
+    notion_database_id: str
+    data_inicio: date
+    data_fim: date
+    continuacao: int = 0
+
 class NotionAPIUtils:
     @staticmethod
     def normalizar_valor(valor):
         """Normaliza o valor de texto."""
-        if not valor:
-            return ""
-        valor = unidecode.unidecode(valor)  # Remove acentos
-        valor = "".join(e for e in valor if e.isalnum() or e.isspace())  # Remove caracteres especiais
-        return valor.strip().lower()  # Remove espaços extras e converte para minúsculas
+        return normalizar_valor(valor)
 
 
 async def validar_payload(payload: UserPayload = Body(...)):
@@ -0,0 +1,23 @@
+import json
+
+# orjson é opcional: quando disponível, serializa direto para bytes e decodifica
+# as respostas sem passar por str.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj) -> bytes:
+        return _encoder.encode(obj).encode("utf-8")
+
+    def loads(data):
+        return json.loads(data)
@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 import asyncio
 from utils.logger import logger
-from models.db_config import SessionLocal
+from models.db_config import SessionLocal, engine
 from services.client.consulta_codigo_matricula import consultar_matriculas_vazias
 from services.validador import NotionDatabaseClient
+from utils.pool import estatisticas_do_pool
+from utils.lag_loop import medidor_lag
 import os
 
 SEMAPHORE_LIMIT = 10
@@ -11,6 +13,7 @@ SEMAPHORE_LIMIT = 10
 async def lifespan(app: FastAPI):
     """Configurações executadas durante o ciclo de vida da aplicação."""
     logger.info("Iniciando a API...")
+    medidor_lag.iniciar()
     semaphore = asyncio.Semaphore(SEMAPHORE_LIMIT)
 
     async def loop_principal():
@@ -53,6 +56,7 @@ async def lifespan(app: FastAPI):
             await app.state.loop_task
         except asyncio.CancelledError:
             logger.info("Loop principal foi encerrado com sucesso.")
+        await medidor_lag.parar()
 
 async def processar_tarefa(data, session, semaphore):
     async with semaphore:
@@ -77,6 +81,16 @@ app = FastAPI(
     lifespan=lifespan,  # Registrar o manipulador de ciclo de vida
 )
 
+# Telemetria do pool de conexões
+@app.get("/metricas/pool", tags=["Status"])
+async def metricas_pool():
+    return estatisticas_do_pool(engine)
+
+# Atraso do event loop
+@app.get("/metricas/loop", tags=["Status"])
+async def metricas_loop():
+    return medidor_lag.como_dict()
+
 if __name__ == "__main__":
     import uvicorn
 
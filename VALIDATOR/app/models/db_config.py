@@ -1,16 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from utils.settings import DATABASE_URL
+from utils.settings import DATABASE_URL, DB_ECHO
+from utils.pool import opcoes_do_engine
 from sqlalchemy.ext.declarative import declarative_base
 from utils.logger import logger
 
 Base = declarative_base()
-engine = create_async_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    echo=True
-)
+engine = create_async_engine(DATABASE_URL, echo=DB_ECHO, **opcoes_do_engine())
 
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -18,7 +18,7 @@ async def consultar_matriculas_vazias():
             for associado in users_with_empty_fields:
                 # Verificar se o usuário já foi processado no cache
                 if associado.uuid in NotionDatabaseClient.processed_users:
-                    logger.info(f"Usuário {associado.uuid} já processado. Ignorando.")
+                    logger.info(f"Usuário {associado.uuid} já processado. Ignorando.", extra={"amostra": "validador.ignorado"})
                     continue
 
                 notion_database_result = await session.execute(
@@ -1,36 +1,18 @@
 import httpx
-from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy import create_engine
 from sqlalchemy.future import select
-from unidecode import unidecode
 from models.models import NotionDatabase, User
-from utils.settings import DATABASE_URL, NOTION_API_VERSION
+from utils.settings import NOTION_API_VERSION, NOTION_API_URL, PROCESS_URL
 from utils.logger import logger
+from utils.normalizacao import normalizar_valor
 import asyncio
+import hashlib
+import time
 
 
-# Configuração do SQLAlchemy
-engine = create_engine(DATABASE_URL)
-SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
-
-def normalizar_valor(valor):
-    """
-    Normaliza o valor de texto:
-    - Remove acentos.
-    - Converte para minúsculas.
-    - Remove caracteres especiais.
-    - Remove espaços extras.
-    """
-    if not valor:
-        return ""
-    valor = unidecode(valor)  # Remove acentos
-    valor = "".join(e for e in valor if e.isalnum() or e.isspace())  # Remove caracteres especiais
-    return valor.strip().lower()  # Remove espaços extras e converte para minúsculas
-
 class NotionAPIUtils:
     @staticmethod
     async def consultar_dados(database_id, access_token):
-        url = f"https://api.notion.com/v1/databases/{database_id}/query"
+        url = f"{NOTION_API_URL}/databases/{database_id}/query"
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
@@ -51,6 +33,44 @@ class NotionAPIUtils:
                 logger.exception(f"Erro durante a solicitação: {e}")
                 return None
 
+    @staticmethod
+    def validar_registro(item) -> dict:
+        """Valida e normaliza um registro do banco de matrículas."""
+        properties = item.get("properties", {})
+
+        # Validação e normalização da Chave de Acesso
+        matricula = properties.get("Chave de Acesso", {}).get("rich_text", [])
+        valor_matricula = (
+            matricula[0].get("text", {}).get("content", "Não preenchido") if matricula else "Não preenchido"
+        )
+
+        # Validação e normalização do Código AASP
+        codigo_aasp = properties.get("Código AASP", {}).get("rich_text", [])
+        valor_codigo_aasp = (
+            codigo_aasp[0].get("text", {}).get("content", "") if codigo_aasp else ""
+        )
+
+        # Validação e normalização do Tipo
+        tipo = properties.get("Tipo", {}).get("rich_text", [])
+        valor_tipo = (
+            tipo[0].get("text", {}).get("content", "Não preenchido") if tipo else "Não preenchido"
+        )
+
+        # Validação dos valores
+        valido = not (
+            valor_matricula == "Não preenchido" or
+            valor_tipo not in ["empresa", "associado"] or
+            (valor_tipo == "empresa" and not valor_codigo_aasp)
+        )
+
+        return {
+            "id": item.get("id"),
+            "matricula": normalizar_valor(valor_matricula),
+            "codigo_aasp": normalizar_valor(valor_codigo_aasp),
+            "tipo": normalizar_valor(valor_tipo),
+            "valido": valido,
+        }
+
     @staticmethod
     def validar_dados(results):
         if not results:
@@ -61,41 +81,78 @@ class NotionAPIUtils:
         matriculas, codigos_aasp, tipos = [], [], []
 
         for item in results:
-            properties = item.get("properties", {})
-
-            # Validação e normalização da Chave de Acesso
-            matricula = properties.get("Chave de Acesso", {}).get("rich_text", [])
-            valor_matricula = (
-                matricula[0].get("text", {}).get("content", "Não preenchido") if matricula else "Não preenchido"
-            )
-            matriculas.append(normalizar_valor(valor_matricula))
-
-            # Validação e normalização do Código AASP
-            codigo_aasp = properties.get("Código AASP", {}).get("rich_text", [])
-            valor_codigo_aasp = (
-                codigo_aasp[0].get("text", {}).get("content", "") if codigo_aasp else ""
-            )
-            codigos_aasp.append(normalizar_valor(valor_codigo_aasp))
-
-            # Validação e normalização do Tipo
-            tipo = properties.get("Tipo", {}).get("rich_text", [])
-            valor_tipo = (
-                tipo[0].get("text", {}).get("content", "Não preenchido") if tipo else "Não preenchido"
-            )
-            tipos.append(normalizar_valor(valor_tipo))
-
-            # Validação dos valores
-            if (valor_matricula == "Não preenchido" or
-                valor_tipo not in ["empresa", "associado"] or
-                (valor_tipo == "empresa" and not valor_codigo_aasp)):
+            registro = NotionAPIUtils.validar_registro(item)
+            matriculas.append(registro["matricula"])
+            codigos_aasp.append(registro["codigo_aasp"])
+            tipos.append(registro["tipo"])
+
+            if not registro["valido"]:
                 logger.info(f"Registro ID: {item.get('id')} ainda está com campos faltantes.")
                 return False, matriculas, codigos_aasp, tipos
 
         logger.info("Todos os registros possuem Matrícula, Código AASP e Tipo válidos.")
         return True, matriculas, codigos_aasp, tipos
 
+    @staticmethod
+    def validar_incremental(database_id, results):
+        """
+        Valida só os registros novos ou editados desde o último ciclo.
+
+        Retorna ``(validos, pendentes)``: os registros válidos que ainda não
+        foram despachados e todos os que continuam com campos faltantes.
+        """
+        return estado_validacao.separar(database_id, results or [])
+
+
+class EstadoValidacao:
+    """
+    Resultado da validação de cada registro, por banco, id da página e
+    ``last_edited_time``. Um registro só é validado de novo quando é editado
+    no Notion; páginas removidas do banco saem do estado.
+    """
+
+    def __init__(self):
+        self._bancos = {}
+
+    def separar(self, database_id, results):
+        anteriores = self._bancos.get(database_id, {})
+        atuais = {}
+        validos, pendentes = [], []
+        revalidados = 0
+
+        for item in results:
+            page_id = item.get("id")
+            editado_em = item.get("last_edited_time")
+            anterior = anteriores.get(page_id)
+
+            if anterior and editado_em is not None and anterior[0] == editado_em:
+                atuais[page_id] = anterior
+                if not anterior[1]["valido"]:
+                    pendentes.append(anterior[1])
+                continue
+
+            registro = NotionAPIUtils.validar_registro(item)
+            revalidados += 1
+            atuais[page_id] = (editado_em, registro)
+            (validos if registro["valido"] else pendentes).append(registro)
+
+        self._bancos[database_id] = atuais
+        if revalidados:
+            logger.info(f"Banco {database_id}: {revalidados} registro(s) validados, {len(validos)} válido(s), {len(pendentes)} pendente(s).")
+        return validos, pendentes
+
+    def esquecer(self, database_id, page_id):
+        """Faz o registro ser validado e despachado de novo no próximo ciclo."""
+        self._bancos.get(database_id, {}).pop(page_id, None)
+
+
+estado_validacao = EstadoValidacao()
+
+
 class NotionDatabaseClient:
     processed_users = set()  # Cache em memória para armazenar usuários processados
+    pausado_ate = 0.0  # instante (monotonic) em que o PROCESs volta a aceitar envios após um 429
+    recusas = {}  # (origem, sha256 da credencial) -> instante (monotonic) até o qual o PROCESs recusa a credencial (409)
 
     def __init__(self, database_id, access_token, session):
         self.database_id = database_id
@@ -110,28 +167,93 @@ class NotionDatabaseClient:
             async with httpx.AsyncClient() as client:
                 response = await client.post(endpoint, json=payload)
                 if 200 <= response.status_code < 300:
-                    logger.info(f"Dados enviados com sucesso para o endpoint: {endpoint}")
+                    job_id = response.json().get("job_id") if response.content else None
+                    logger.info(f"Dados enviados com sucesso para o endpoint: {endpoint} (job: {job_id})")
                     return True
+                elif response.status_code == 429:
+                    retry_after = self.ler_retry_after(response)
+                    NotionDatabaseClient.pausado_ate = time.monotonic() + retry_after
+                    logger.warning(f"Endpoint {endpoint} sobrecarregado. Novos envios suspensos por {retry_after}s.")
+                elif response.status_code == 409:
+                    retry_after = self.ler_retry_after(response)
+                    origem = (response.json() if response.content else {}).get("origem")
+                    credencial = payload.get("access_token") if origem == "notion" else payload.get("matricula")
+                    NotionDatabaseClient.registrar_recusa(origem, credencial, retry_after)
+                    logger.warning(f"Credencial {origem} recusada pelo PROCESs. Registro {payload.get('matricula')} em espera por {retry_after}s.")
                 else:
                     logger.warning(f"Falha ao enviar dados. Status: {response.status_code}, Response: {response.text}")
         except Exception as e:
             logger.error(f"Erro ao enviar dados para API externa: {e}")
         return False
 
+    @staticmethod
+    def ler_retry_after(response, padrao: int = 30) -> int:
+        try:
+            return max(1, int(response.headers.get("Retry-After", padrao)))
+        except ValueError:
+            return padrao
+
+    @classmethod
+    def envio_pausado(cls) -> bool:
+        return time.monotonic() < cls.pausado_ate
+
+    @staticmethod
+    def _chave_recusa(origem, credencial) -> tuple:
+        return (origem, hashlib.sha256(credencial.encode("utf-8")).hexdigest())
+
+    @classmethod
+    def registrar_recusa(cls, origem, credencial, segundos: int):
+        """Guarda a recusa pelo hash da credencial, descartando antes as que já venceram."""
+        if not credencial:
+            return
+        agora = time.monotonic()
+        for chave in [chave for chave, ate in cls.recusas.items() if ate <= agora]:
+            del cls.recusas[chave]
+        cls.recusas[cls._chave_recusa(origem, credencial)] = agora + segundos
+
+    @classmethod
+    def credencial_recusada(cls, payload) -> bool:
+        """Indica se a matrícula ou o token do payload ainda estão no prazo de um 409."""
+        agora = time.monotonic()
+        for origem, credencial in (("aasp", payload.get("matricula")), ("notion", payload.get("access_token"))):
+            if not credencial:
+                continue
+            chave = cls._chave_recusa(origem, credencial)
+            ate = cls.recusas.get(chave)
+            if ate is None:
+                continue
+            if agora < ate:
+                return True
+            del cls.recusas[chave]
+        return False
+
     async def processar_associado(self, user_uuid):
         """Processa o associado, verifica cache e atualiza banco de dados."""
         if user_uuid in self.processed_users:
             logger.info(f"Usuário {user_uuid} já processado. Ignorando.")
             return
 
+        if self.envio_pausado():
+            logger.info(f"PROCESs em espera por Retry-After. Usuário {user_uuid} será reenviado no próximo ciclo.")
+            return
+
+        # Registros validados neste ciclo e ainda não aceitos pelo PROCESs; no
+        # fim, qualquer que seja a saída, voltam a ser despachados no próximo
+        validos, enviados = [], set()
         try:
-            # Buscar e validar dados no Notion
+            # Buscar e validar dados no Notion (só registros novos ou editados)
             logger.info(f"Consultando dados no Notion para o usuário {user_uuid}...")
             results = await NotionAPIUtils.consultar_dados(self.database_id, self.access_token)
-            all_valid, matriculas, codigos_aasp, tipos = NotionAPIUtils.validar_dados(results)
+            if results is None:
+                return
+            validos, pendentes = NotionAPIUtils.validar_incremental(self.database_id, results)
+
+            if pendentes:
+                logger.info(f"Usuário {user_uuid}: {len(pendentes)} registro(s) ainda com campos faltantes.")
 
-            if not all_valid:
-                logger.warning(f"Dados incompletos para o usuário {user_uuid}. Ignorando.")
+            if not validos:
+                if not results:
+                    logger.warning(f"Nenhum registro no banco de matrículas do usuário {user_uuid}.")
                 return
 
             # Atualizar banco de dados
@@ -144,9 +266,9 @@ class NotionDatabaseClient:
                     logger.error(f"Usuário {user_uuid} não encontrado.")
                     return
 
-                user.matricula = matriculas[0]
-                user.codigo_aasp = codigos_aasp[0] if tipos[0] == "empresa" else None
-                user.tipo = tipos[0]
+                user.matricula = validos[0]["matricula"]
+                user.codigo_aasp = validos[0]["codigo_aasp"] if validos[0]["tipo"] == "empresa" else None
+                user.tipo = validos[0]["tipo"]
 
             # Buscar NotionDatabase
             notion_record = (await self.session.execute(
@@ -157,28 +279,42 @@ class NotionDatabaseClient:
                 logger.error(f"NotionDatabase não encontrado para ID {self.database_id}")
                 return
 
-            # Preparar payload
-            payload = {
-                "matricula": user.matricula,
-                "access_token": self.access_token,
-                "notion_database_id": notion_record.notion_database_id,
-                "tipo": user.tipo,
-            }
-            if user.tipo == "empresa":
-                payload["codigo_aasp"] = user.codigo_aasp
-                endpoint = "http://localhost:8003/empresa"
-            else:
-                endpoint = "http://localhost:8003/associado"
-
-            logger.info(f"Enviando payload para {endpoint}: {payload}")
-
-            # Enviar para o endpoint
-            if await self.enviar_para_api_externa(payload, endpoint):
+            # Despachar cada registro válido; os que falharem voltam no próximo ciclo
+            for registro in validos:
+                if self.envio_pausado():
+                    logger.info(f"PROCESs em espera por Retry-After. Registros restantes do usuário {user_uuid} serão reenviados no próximo ciclo.")
+                    break
+
+                payload = {
+                    "matricula": registro["matricula"],
+                    "access_token": self.access_token,
+                    "notion_database_id": notion_record.notion_database_id,
+                    "tipo": registro["tipo"],
+                }
+                if registro["tipo"] == "empresa":
+                    payload["codigo_aasp"] = registro["codigo_aasp"]
+                    endpoint = f"{PROCESS_URL}/empresa"
+                else:
+                    endpoint = f"{PROCESS_URL}/associado"
+
+                if self.credencial_recusada(payload):
+                    continue
+
+                logger.info(f"Enviando payload para {endpoint}: {payload}")
+
+                if await self.enviar_para_api_externa(payload, endpoint):
+                    enviados.add(registro["id"])
+
+            if len(enviados) == len(validos) and not pendentes:
                 self.processed_users.add(user_uuid)
                 logger.info(f"Usuário {user_uuid} processado com sucesso.")
-            else:
-                logger.warning(f"Falha ao processar usuário {user_uuid}.")
+            elif len(enviados) < len(validos):
+                logger.warning(f"Falha ao processar usuário {user_uuid}: {len(validos) - len(enviados)} registro(s) serão reenviados.")
 
         except Exception as e:
             logger.error(f"Erro ao processar usuário {user_uuid}: {e}")
             self.processed_users.add(user_uuid)  # Evitar loops infinitos em caso de erro
+        finally:
+            for registro in validos:
+                if registro["id"] not in enviados:
+                    estado_validacao.esquecer(self.database_id, registro["id"])
@@ -0,0 +1,8 @@
+"""
+Gerador de carga para PROCESs, AUTENTICATOR e VALIDATOR.
+
+Os serviços são apontados para os simulados de ``carga.simulados`` (AASP,
+Notion e a entrada do PROCESs) pelas variáveis ``NOTION_API_URL``,
+``AASP_EMPRESA_URL``, ``AASP_ASSOCIADO_URL`` e ``PROCESS_URL``; o gerador
+(``python -m carga``) dispara as requisições e grava o resultado em JSON.
+"""
@@ -0,0 +1,142 @@
+"""
+Teste de carga dos serviços.
+
+    python -m carga processos --url http://localhost:8003 --taxa 20 --duracao 60 --saida resultado.json
+    python -m carga autenticador --url http://localhost:8000 --taxa 5
+    python -m carga validador --url http://localhost:3030 --simulados http://localhost:9000 --duracao 120
+    python -m carga processos ... --comparar resultado_anterior.json
+
+Os serviços devem estar apontados para ``python -m carga.simulados``. O
+atraso do event loop é lido de ``/metricas/loop`` do serviço em ``--url``
+antes e depois da carga.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+import httpx
+from carga.cenarios import Autenticador, Processos, observar_validador
+from carga.gerador import gerar_carga, percentis, lag_no_periodo
+
+URLS_PADRAO = {
+    "processos": "http://localhost:8003",
+    "autenticador": "http://localhost:8000",
+    "validador": "http://localhost:3030",
+}
+
+
+async def ler_lag(client, url: str):
+    try:
+        response = await client.get(f"{url}/metricas/loop")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        print(f"Sem métricas do event loop em {url}: {type(e).__name__} {e}", file=sys.stderr)
+        return None
+
+
+async def executar(args) -> dict:
+    limites = httpx.Limits(max_connections=args.maximo_em_voo, max_keepalive_connections=args.maximo_em_voo)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout), limits=limites) as client:
+        resultado = {
+            "alvo": args.alvo,
+            "rotulo": args.rotulo,
+            "inicio": datetime.now(timezone.utc).isoformat(),
+        }
+
+        lag_antes = await ler_lag(client, args.url)
+        resultado.update(await executar_carga(client, args))
+        lag_depois = await ler_lag(client, args.url)
+        if lag_antes and lag_depois:
+            resultado["lag_loop_ms"] = lag_no_periodo(lag_antes, lag_depois)
+        return resultado
+
+
+async def executar_carga(client, args) -> dict:
+    resultado = {}
+    if args.alvo == "validador":
+        resultado["validador"] = await observar_validador(client, args.simulados, args.duracao)
+        return resultado
+
+    if args.alvo == "processos":
+        cenario = Processos(client, args.url, args.usuarios, args.acompanhar_jobs)
+    else:
+        cenario = Autenticador(client, args.url)
+
+    resultados, decorrido = await gerar_carga(
+        cenario.requisicao, args.taxa, args.duracao, args.poisson, args.maximo_em_voo
+    )
+    erros = resultados.com_erro(cenario.sucesso)
+    resultado.update({
+        "taxa_alvo": args.taxa,
+        "chegadas": "poisson" if args.poisson else "constante",
+        "duracao_s": round(decorrido, 2),
+        "enviadas": resultados.enviadas,
+        "concluidas": resultados.concluidas,
+        "descartadas": resultados.descartadas,
+        "vazao_rps": round((resultados.enviadas - erros) / decorrido, 3),
+        "taxa_erro": round(erros / resultados.enviadas, 4) if resultados.enviadas else 0.0,
+        "status": dict(resultados.status),
+        "excecoes": dict(resultados.erros),
+        "latencia_ms": percentis(resultados.latencias),
+    })
+
+    if isinstance(cenario, Processos) and args.acompanhar_jobs:
+        jobs = await cenario.aguardar_jobs(args.limite_jobs)
+        resultado["jobs"] = {"estados": jobs["estados"], "duracao_ms": percentis(jobs["duracoes"])}
+
+    return resultado
+
+
+def comparar(atual: dict, anterior: dict):
+    """Imprime a variação das métricas principais em relação a um resultado salvo."""
+    linhas = [("vazao_rps", atual.get("vazao_rps"), anterior.get("vazao_rps")),
+              ("taxa_erro", atual.get("taxa_erro"), anterior.get("taxa_erro"))]
+    for p in ("p50", "p99"):
+        linhas.append((f"latencia_{p}_ms", atual.get("latencia_ms", {}).get(p), anterior.get("latencia_ms", {}).get(p)))
+    linhas.append(("lag_loop_medio_ms", atual.get("lag_loop_ms", {}).get("medio_ms"), anterior.get("lag_loop_ms", {}).get("medio_ms")))
+    print(f"\nComparação com {anterior.get('rotulo') or anterior.get('inicio')}:")
+    for nome, novo, velho in linhas:
+        if novo is None or velho is None:
+            continue
+        variacao = f"{(novo - velho) / velho * 100:+.1f}%" if velho else "n/a"
+        print(f"  {nome:<18} {velho:>10} -> {novo:<10} ({variacao})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gerador de carga para PROCESs, AUTENTICATOR e VALIDATOR.")
+    parser.add_argument("alvo", choices=sorted(URLS_PADRAO))
+    parser.add_argument("--url", help="URL base do serviço (padrão conforme o alvo)")
+    parser.add_argument("--simulados", default="http://localhost:9000", help="URL dos simulados (alvo validador)")
+    parser.add_argument("--taxa", type=float, default=10.0, help="chegadas por segundo")
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos de carga")
+    parser.add_argument("--poisson", action="store_true", help="chegadas exponenciais em vez de intervalo fixo")
+    parser.add_argument("--maximo-em-voo", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--usuarios", type=int, default=50, help="matrículas distintas (alvo processos)")
+    parser.add_argument("--acompanhar-jobs", action="store_true", help="aguarda os jobs aceitos pelo PROCESs")
+    parser.add_argument("--limite-jobs", type=float, default=300.0, help="segundos de espera pelos jobs")
+    parser.add_argument("--rotulo", help="identificação da versão testada")
+    parser.add_argument("--saida", help="arquivo JSON para o resultado")
+    parser.add_argument("--comparar", help="resultado JSON anterior para comparação")
+    args = parser.parse_args()
+    args.url = args.url or URLS_PADRAO[args.alvo]
+
+    resultado = asyncio.run(executar(args))
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    print(texto)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(resultado, json.load(arquivo))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
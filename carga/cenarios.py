@@ -0,0 +1,99 @@
+import asyncio
+import time
+import httpx
+
+
+class Processos:
+    """Submissões alternadas a ``/empresa`` e ``/associado`` do PROCESs."""
+
+    nome = "processos"
+
+    def __init__(self, client: httpx.AsyncClient, url: str, usuarios: int, acompanhar_jobs: bool):
+        self.client = client
+        self.url = url.rstrip("/")
+        self.usuarios = usuarios
+        self.acompanhar_jobs = acompanhar_jobs
+        self.jobs = []
+
+    @staticmethod
+    def sucesso(status: int) -> bool:
+        return status == 202
+
+    async def requisicao(self, i: int) -> int:
+        tipo = "empresa" if i % 2 == 0 else "associado"
+        payload = {
+            "matricula": f"CARGA{i % self.usuarios:05d}",
+            "access_token": f"secret_carga_{i % self.usuarios}",
+            "notion_database_id": f"banco{i % self.usuarios:05d}",
+            "tipo": tipo,
+        }
+        if tipo == "empresa":
+            payload["codigo_aasp"] = "12345"
+        response = await self.client.post(f"{self.url}/{tipo}", json=payload)
+        if response.status_code == 202 and self.acompanhar_jobs:
+            self.jobs.append((response.json()["job_id"], time.perf_counter()))
+        return response.status_code
+
+    async def aguardar_jobs(self, limite: float) -> dict:
+        """Consulta ``/jobs/{id}`` até todos finalizarem ou o ``limite`` acabar."""
+        pendentes = dict(self.jobs)
+        duracoes, estados = [], {}
+        fim = time.perf_counter() + limite
+        while pendentes and time.perf_counter() < fim:
+            for job_id, inicio in list(pendentes.items()):
+                response = await self.client.get(f"{self.url}/jobs/{job_id}")
+                if response.status_code != 200:
+                    continue
+                estado = response.json().get("estado")
+                if estado in ("concluido", "falhou"):
+                    estados[estado] = estados.get(estado, 0) + 1
+                    duracoes.append(time.perf_counter() - inicio)
+                    del pendentes[job_id]
+            await asyncio.sleep(0.5)
+        estados["sem_conclusao"] = len(pendentes)
+        return {"estados": estados, "duracoes": duracoes}
+
+
+class Autenticador:
+    """Callbacks de OAuth no AUTENTICATOR, com o Notion simulado."""
+
+    nome = "autenticador"
+
+    def __init__(self, client: httpx.AsyncClient, url: str):
+        self.client = client
+        self.url = url.rstrip("/")
+
+    @staticmethod
+    def sucesso(status: int) -> bool:
+        return status in (200, 303)
+
+    async def requisicao(self, i: int) -> int:
+        response = await self.client.get(f"{self.url}/oauth/callback", params={"code": f"carga-{i}"})
+        return response.status_code
+
+
+async def observar_validador(client: httpx.AsyncClient, url_simulados: str, duracao: float) -> dict:
+    """
+    O VALIDATOR não recebe requisições: ele roda em ciclos. Aqui a vazão é
+    medida pelos simulados, contando as consultas ao banco de matrículas e as
+    submissões que chegaram à entrada simulada do PROCESs durante a janela.
+    """
+    url = f"{url_simulados.rstrip('/')}/_estatisticas"
+    antes = (await client.get(url)).json()
+    inicio = time.perf_counter()
+    await asyncio.sleep(duracao)
+    depois = (await client.get(url)).json()
+    decorrido = time.perf_counter() - inicio
+
+    def delta(chave):
+        return depois.get(chave, 0) - antes.get(chave, 0)
+
+    consultas = delta("notion_query_matriculas")
+    submissoes = delta("processos_empresa") + delta("processos_associado")
+    return {
+        "duracao_s": round(decorrido, 2),
+        "consultas_notion": consultas,
+        "submissoes_processos": submissoes,
+        "consultas_por_s": round(consultas / decorrido, 3),
+        "submissoes_por_s": round(submissoes / decorrido, 3),
+    }
@@ -0,0 +1,110 @@
+import asyncio
+import random
+import time
+from collections import Counter
+
+
+def percentis(valores: list, pontos=(0.5, 0.9, 0.99)) -> dict:
+    """Percentis em milissegundos (``p50``, ``p90``, ``p99``) e o máximo."""
+    if not valores:
+        return {f"p{int(p * 100)}": None for p in pontos} | {"max": None}
+    ordenados = sorted(valores)
+    resultado = {
+        f"p{int(p * 100)}": round(ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))] * 1000, 2)
+        for p in pontos
+    }
+    resultado["max"] = round(ordenados[-1] * 1000, 2)
+    return resultado
+
+
+def lag_no_periodo(antes: dict, depois: dict, pontos=(0.5, 0.9, 0.99)) -> dict:
+    """
+    Atraso do event loop do serviço entre duas leituras de ``/metricas/loop``.
+    Os percentis vêm do histograma e são o limite da faixa em que caem.
+    """
+    amostras = depois["amostras"] - antes["amostras"]
+    histograma = {
+        faixa: n - antes["histograma_lag"].get(faixa, 0)
+        for faixa, n in depois["histograma_lag"].items()
+    }
+    resultado = {
+        "amostras": amostras,
+        "medio_ms": round((depois["lag_total_ms"] - antes["lag_total_ms"]) / amostras, 3) if amostras else None,
+        "maximo_desde_subida_ms": depois["lag_maximo_ms"],
+    }
+    for p in pontos:
+        acumulado = 0
+        resultado[f"p{int(p * 100)}"] = None
+        for faixa, n in histograma.items():
+            acumulado += n
+            if amostras and acumulado >= p * amostras:
+                resultado[f"p{int(p * 100)}"] = faixa
+                break
+    resultado["histograma"] = histograma
+    return resultado
+
+
+class Resultados:
+    def __init__(self):
+        self.latencias = []
+        self.status = Counter()
+        self.erros = Counter()
+        self.enviadas = 0
+        self.descartadas = 0
+
+    def registrar(self, segundos: float, status: int = None, erro: str = None):
+        if erro:
+            self.erros[erro] += 1
+        else:
+            self.status[str(status)] += 1
+            self.latencias.append(segundos)
+
+    @property
+    def concluidas(self) -> int:
+        return sum(self.status.values())
+
+    def com_erro(self, sucesso) -> int:
+        falhas = sum(n for codigo, n in self.status.items() if not sucesso(int(codigo)))
+        return falhas + sum(self.erros.values()) + self.descartadas
+
+
+async def gerar_carga(requisicao, taxa: float, duracao: float, poisson: bool, maximo_em_voo: int) -> tuple:
+    """
+    Laço aberto: as chegadas seguem o relógio (intervalo fixo ``1/taxa`` ou
+    exponencial com ``poisson``), independentemente de as respostas
+    anteriores terem voltado. ``requisicao(i)`` é uma corrotina que retorna o
+    status HTTP. Chegadas com ``maximo_em_voo`` requisições pendentes são
+    descartadas e contadas como erro.
+    """
+    resultados = Resultados()
+    em_voo = set()
+
+    async def disparar(i: int):
+        inicio = time.perf_counter()
+        try:
+            status = await requisicao(i)
+            resultados.registrar(time.perf_counter() - inicio, status=status)
+        except Exception as e:
+            resultados.registrar(time.perf_counter() - inicio, erro=type(e).__name__)
+
+    inicio = time.perf_counter()
+    proxima = inicio
+    i = 0
+    while proxima - inicio < duracao:
+        espera = proxima - time.perf_counter()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        resultados.enviadas += 1
+        if len(em_voo) >= maximo_em_voo:
+            resultados.descartadas += 1
+        else:
+            tarefa = asyncio.create_task(disparar(i))
+            em_voo.add(tarefa)
+            tarefa.add_done_callback(em_voo.discard)
+        i += 1
+        proxima += random.expovariate(taxa) if poisson else 1.0 / taxa
+
+    if em_voo:
+        await asyncio.gather(*em_voo, return_exceptions=True)
+    decorrido = time.perf_counter() - inicio
+    return resultados, decorrido
@@ -0,0 +1,202 @@
+"""
+Simulados locais das APIs externas, com latência configurável.
+
+    python -m carga.simulados --porta 9000 --latencia 0.05 --intimacoes-por-dia 20
+
+Rotas: AASP (``/api/Empresa/intimacao``, ``/api/Associado/intimacao/json``),
+Notion (``/v1/...``) e a entrada do PROCESs (``/empresa``, ``/associado``),
+além de ``/_estatisticas`` com a contagem de requisições por rota.
+"""
+import argparse
+import asyncio
+import os
+import random
+import uuid
+import zlib
+from collections import Counter
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Simulados de carga")
+contagem = Counter()
+
+LATENCIA = float(os.getenv("SIMULADO_LATENCIA", "0.05"))
+INTIMACOES_POR_DIA = int(os.getenv("SIMULADO_INTIMACOES_POR_DIA", "10"))
+TAMANHO_PUBLICACAO = int(os.getenv("SIMULADO_TAMANHO_PUBLICACAO", "3000"))
+REGISTROS_MATRICULA = int(os.getenv("SIMULADO_REGISTROS_MATRICULA", "1"))
+
+
+async def _esperar():
+    # Latência com variação de ±50% em torno da média configurada
+    if LATENCIA > 0:
+        await asyncio.sleep(random.uniform(0.5, 1.5) * LATENCIA)
+
+
+def _intimacao(numero: int, data: str) -> dict:
+    texto = ("Intimação de teste; prazo de quinze dias; " * (TAMANHO_PUBLICACAO // 40 + 1))[:TAMANHO_PUBLICACAO]
+    return {
+        "numeroPublicacao": numero,
+        "codigoRelacionamento": numero % 97,
+        "numeroArquivo": numero // 10,
+        "numeroUnicoProcesso": f"{numero:07d}-00.2024.8.26.0100",
+        "titulo": "Intimação",
+        "cabecalho": "Foro Central Cível",
+        "textoPublicacao": texto,
+        "rodape": "",
+        "termoReferenciaData": data,
+        "jornal": {
+            "nomeJornal": "DJE - TJSP",
+            "dataTratamento": None,
+            "dataDisponibilizacao_Publicacao": None,
+        },
+    }
+
+
+def _intimacoes(request: Request) -> dict:
+    data = request.query_params.get("data", "")
+    chave = f"{request.query_params.get('chave')}|{data}"
+    base = zlib.crc32(chave.encode("utf-8")) % 10_000_000 * 100
+    return {"intimacoes": [_intimacao(base + i, data) for i in range(INTIMACOES_POR_DIA)]}
+
+
+def _texto(conteudo: str) -> dict:
+    return {"rich_text": [{"text": {"content": conteudo}}]}
+
+
+@app.get("/api/Empresa/intimacao")
+async def aasp_empresa(request: Request):
+    contagem["aasp_empresa"] += 1
+    await _esperar()
+    return _intimacoes(request)
+
+
+@app.get("/api/Associado/intimacao/json")
+async def aasp_associado(request: Request):
+    contagem["aasp_associado"] += 1
+    await _esperar()
+    return _intimacoes(request)
+
+
+@app.post("/v1/oauth/token")
+async def notion_token():
+    contagem["notion_token"] += 1
+    await _esperar()
+    return {
+        "access_token": f"secret_{uuid.uuid4().hex}",
+        "owner": {"user": {"name": "Carga", "person": {"email": f"{uuid.uuid4().hex[:8]}@carga.local"}}},
+    }
+
+
+@app.post("/v1/search")
+async def notion_search():
+    contagem["notion_search"] += 1
+    await _esperar()
+    return {"results": [{
+        "id": uuid.uuid4().hex,
+        "url": "https://notion.so/teste",
+        "properties": {"title": {"title": [{"text": {"content": "TESTE"}}]}},
+    }]}
+
+
+@app.post("/v1/databases")
+async def notion_criar_banco():
+    contagem["notion_criar_banco"] += 1
+    await _esperar()
+    banco_id = str(uuid.uuid4())
+    return {"id": banco_id, "url": f"https://notion.so/{banco_id}"}
+
+
+@app.post("/v1/databases/{database_id}/query")
+async def notion_query(database_id: str, request: Request):
+    corpo = await request.json() if await request.body() else {}
+    await _esperar()
+    if "filter" in corpo:
+        # Verificação de existentes do PROCESs: nenhuma página prévia
+        contagem["notion_query_existentes"] += 1
+        return {"results": [], "has_more": False, "next_cursor": None}
+
+    # Ciclo do VALIDATOR: banco de matrículas já preenchido
+    contagem["notion_query_matriculas"] += 1
+    return {"results": [
+        {
+            "id": str(uuid.uuid4()),
+            "properties": {
+                "Chave de Acesso": _texto(f"MAT{database_id[:8]}{i}"),
+                "Código AASP": _texto("12345"),
+                "Tipo": _texto("empresa"),
+            },
+        }
+        for i in range(REGISTROS_MATRICULA)
+    ], "has_more": False, "next_cursor": None}
+
+
+@app.post("/v1/pages")
+async def notion_criar_pagina():
+    contagem["notion_criar_pagina"] += 1
+    await _esperar()
+    return {"id": str(uuid.uuid4())}
+
+
+@app.patch("/v1/pages/{page_id}")
+async def notion_atualizar_pagina(page_id: str):
+    contagem["notion_atualizar_pagina"] += 1
+    await _esperar()
+    return {"id": page_id}
+
+
+@app.get("/v1/blocks/{block_id}/children")
+async def notion_listar_blocos(block_id: str):
+    contagem["notion_listar_blocos"] += 1
+    await _esperar()
+    return {"results": [], "has_more": False, "next_cursor": None}
+
+
+@app.delete("/v1/blocks/{block_id}")
+async def notion_remover_bloco(block_id: str):
+    contagem["notion_remover_bloco"] += 1
+    await _esperar()
+    return {"id": block_id, "archived": True}
+
+
+@app.patch("/v1/blocks/{block_id}/children")
+async def notion_anexar_blocos(block_id: str, request: Request):
+    contagem["notion_anexar_blocos"] += 1
+    await _esperar()
+    filhos = (await request.json()).get("children", [])
+    return {"results": [{"id": str(uuid.uuid4())} for _ in filhos]}
+
+
+@app.post("/empresa")
+@app.post("/associado")
+async def processos_entrada(request: Request):
+    contagem[f"processos{request.url.path.replace('/', '_')}"] += 1
+    return JSONResponse(status_code=202, content={"job_id": uuid.uuid4().hex})
+
+
+@app.get("/_estatisticas")
+async def estatisticas():
+    return dict(contagem)
+
+
+def main():
+    global LATENCIA, INTIMACOES_POR_DIA, TAMANHO_PUBLICACAO, REGISTROS_MATRICULA
+    parser = argparse.ArgumentParser(description="Sobe os simulados de AASP, Notion e PROCESs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=9000)
+    parser.add_argument("--latencia", type=float, default=LATENCIA, help="latência média em segundos")
+    parser.add_argument("--intimacoes-por-dia", type=int, default=INTIMACOES_POR_DIA)
+    parser.add_argument("--tamanho-publicacao", type=int, default=TAMANHO_PUBLICACAO)
+    parser.add_argument("--registros-matricula", type=int, default=REGISTROS_MATRICULA)
+    args = parser.parse_args()
+
+    LATENCIA = args.latencia
+    INTIMACOES_POR_DIA = args.intimacoes_por_dia
+    TAMANHO_PUBLICACAO = args.tamanho_publicacao
+    REGISTROS_MATRICULA = args.registros_matricula
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.porta, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+Micro-benchmarks das funções puras mais chamadas dos três serviços.
+
+    python -m microbench                       # roda e compara com baseline.json
+    python -m microbench --servico VALIDATOR   # só um serviço
+    python -m microbench --atualizar-baseline  # grava a medição como nova baseline
+
+Cada serviço roda num processo próprio, com o diretório ``<serviço>/app``
+como raiz de importação (os pacotes ``services``/``utils`` têm o mesmo
+nome nos três). O resultado é a vazão (ops/s) e o pico de memória alocada
+por chamada. Como ops/s absolutos variam com a máquina e com a carga, a
+comparação com a baseline usa a vazão relativa a um laço de calibração
+medido no mesmo processo (``executar.calibracao``); o comando termina com
+erro quando algum caso piora além do limite.
+
+Com o diretório ``PROCESs/app`` como raiz de importação,
+``python -m microbench.payload`` compara a montagem de payloads do Notion
+com a implementação anterior.
+"""
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from microbench.casos import CASOS
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def medir_servico(servico: str, tempo_minimo: float, rodadas: int) -> dict:
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [RAIZ, os.environ.get("PYTHONPATH")])))
+    processo = subprocess.run(
+        [sys.executable, "-m", "microbench.executar", servico, str(tempo_minimo), str(rodadas)],
+        cwd=os.path.join(RAIZ, servico, "app"),
+        env=ambiente,
+        capture_output=True,
+        text=True,
+    )
+    if processo.returncode != 0:
+        raise SystemExit(f"Falha ao medir {servico}:\n{processo.stderr}")
+    return json.loads(processo.stdout)
+
+
+def regressoes(atual: dict, baseline: dict, limite: float) -> list:
+    """
+    Casos com vazão relativa à calibração abaixo de ``(1 - limite)`` ou pico
+    de memória acima de ``(1 + limite)`` da baseline.
+    """
+    encontradas = []
+    for servico, casos in atual.items():
+        for nome, medida in casos.items():
+            referencia = baseline.get(servico, {}).get(nome)
+            if not referencia or "relativo" not in referencia:
+                continue
+            if medida["relativo"] < referencia["relativo"] * (1 - limite):
+                piora = 1 - medida["relativo"] / referencia["relativo"]
+                encontradas.append(
+                    f"{servico} {nome}: {piora:.0%} mais lento em relação à calibração "
+                    f"({medida['ops_s']:,.0f} ops/s)"
+                )
+            if medida["pico_bytes"] > referencia["pico_bytes"] * (1 + limite) + 1024:
+                encontradas.append(f"{servico} {nome}: pico {referencia['pico_bytes']:,} -> {medida['pico_bytes']:,} bytes")
+    return encontradas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks com verificação de regressão.")
+    parser.add_argument("--servico", choices=sorted(CASOS), action="append", help="padrão: todos")
+    parser.add_argument("--limite", type=float, default=0.25, help="piora tolerada (fração), padrão 0.25")
+    parser.add_argument("--tempo-minimo", type=float, default=0.2, help="segundos por rodada")
+    parser.add_argument("--rodadas", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--atualizar-baseline", action="store_true")
+    parser.add_argument("--saida", help="grava a medição em JSON")
+    args = parser.parse_args()
+
+    atual = {servico: medir_servico(servico, args.tempo_minimo, args.rodadas) for servico in args.servico or sorted(CASOS)}
+
+    for servico, casos in atual.items():
+        print(servico)
+        for nome, medida in casos.items():
+            print(
+                f"  {nome:<58} {medida['ops_s']:>14,.1f} ops/s {medida['relativo']:>10.4f}x "
+                f"{medida['pico_bytes']:>12,} B pico"
+            )
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(atual, arquivo, indent=2, ensure_ascii=False)
+
+    if args.atualizar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(atual)
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(baseline, arquivo, indent=2, ensure_ascii=False, sort_keys=True)
+        print(f"Baseline atualizada em {args.baseline}.")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sem baseline para comparar; use --atualizar-baseline.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        encontradas = regressoes(atual, json.load(arquivo), args.limite)
+    if encontradas:
+        print(f"\nRegressões acima de {args.limite:.0%}:")
+        for linha in encontradas:
+            print(f"  {linha}")
+        return 1
+    print(f"\nSem regressões acima de {args.limite:.0%} em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
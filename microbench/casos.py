@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Callable
+from microbench import fixtures as f
+
+
+@dataclass
+class Caso:
+    nome: str
+    modulo: str
+    montar: Callable  # recebe o módulo importado e devolve a função a medir
+    argumentos: Callable  # devolve a tupla de argumentos (montada fora da medição)
+
+
+def _atributo(caminho: str):
+    def montar(modulo):
+        alvo = modulo
+        for parte in caminho.split("."):
+            alvo = getattr(alvo, parte)
+        return alvo
+    return montar
+
+
+def _em_lote(funcao):
+    """Aplica a função a cada item da lista, para medir vazão por lote."""
+    return lambda itens: [funcao(item) for item in itens]
+
+
+CASOS = {
+    "PROCESs": [
+        Caso("notion_integration.formatar_dados_para_notion[curta]", "services.notion_integration",
+             _atributo("formatar_dados_para_notion"), lambda: (f.intimacao(f.PUBLICACAO_CURTA),)),
+        Caso("notion_integration.formatar_dados_para_notion[longa]", "services.notion_integration",
+             _atributo("formatar_dados_para_notion"), lambda: (f.intimacao(f.PUBLICACAO_LONGA),)),
+        Caso("payload.dividir_texto_em_blocos[longa]", "services.notion.payload",
+             _atributo("dividir_texto_em_blocos"), lambda: (f.texto(f.PUBLICACAO_LONGA),)),
+        Caso("payload.PayloadBuilder.pagina[longa]", "services.notion.payload",
+             lambda m: m.PayloadBuilder("0" * 32).pagina, lambda: (f.intimacao(f.PUBLICACAO_LONGA),)),
+        Caso("resoucer.NotionAPIUtils.normalizar_valor[x100]", "utils.resoucer",
+             lambda m: _em_lote(m.NotionAPIUtils.normalizar_valor), lambda: (f.valores_para_normalizar(),)),
+        Caso("normalizacao.normalizar_valor[x100, sem cache]", "utils.normalizacao",
+             lambda m: _em_lote(m.normalizar_valor.__wrapped__), lambda: (f.valores_para_normalizar(),)),
+    ],
+    "VALIDATOR": [
+        Caso("validador.normalizar_valor[x100]", "services.validador",
+             lambda m: _em_lote(m.normalizar_valor), lambda: (f.valores_para_normalizar(),)),
+        Caso("normalizacao.normalizar_valor[x100, sem cache]", "utils.normalizacao",
+             lambda m: _em_lote(m.normalizar_valor.__wrapped__), lambda: (f.valores_para_normalizar(),)),
+        Caso("validador.NotionAPIUtils.validar_dados[1000]", "services.validador",
+             _atributo("NotionAPIUtils.validar_dados"), lambda: (f.resultados_notion(1000),)),
+        Caso("validador.NotionAPIUtils.validar_incremental[1000, sem edições]", "services.validador",
+             lambda m: lambda results: m.NotionAPIUtils.validar_incremental("banco", results),
+             lambda: (f.resultados_notion(1000),)),
+    ],
+    "AUTENTICATOR": [
+        Caso("formatter.formatar_dados_para_notion[curta]", "services.notion_services.formatter",
+             _atributo("formatar_dados_para_notion"), lambda: (f.intimacao(f.PUBLICACAO_CURTA),)),
+        Caso("formatter.formatar_dados_para_notion[longa]", "services.notion_services.formatter",
+             _atributo("formatar_dados_para_notion"), lambda: (f.intimacao(f.PUBLICACAO_LONGA),)),
+    ],
+}
@@ -0,0 +1,92 @@
+"""Mede os casos de um serviço; chamado por ``python -m microbench`` com cwd em ``<serviço>/app``."""
+import importlib
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from microbench.casos import CASOS
+
+
+def _repeticoes(funcao, argumentos: tuple, tempo_minimo: float) -> int:
+    """Quantas chamadas seguidas levam pelo menos ``tempo_minimo`` segundos."""
+    numero = 1
+    while _cronometrar(funcao, argumentos, numero) < tempo_minimo:
+        numero *= 2
+    return numero
+
+
+def _cronometrar(funcao, argumentos: tuple, numero: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(numero):
+        funcao(*argumentos)
+    return time.perf_counter() - inicio
+
+
+def vazao(funcao, argumentos: tuple, tempo_minimo: float, rodadas: int) -> tuple:
+    """
+    Melhor ops/s entre ``rodadas`` e a mediana, entre as rodadas, da razão
+    com a vazão de ``calibracao``. Cada rodada mede a calibração logo antes
+    do caso, para que os dois passem pelas mesmas condições da máquina.
+    """
+    numero = _repeticoes(funcao, argumentos, tempo_minimo)
+    numero_calibracao = _repeticoes(calibracao, (), tempo_minimo)
+
+    melhor = 0.0
+    razoes = []
+    for _ in range(rodadas):
+        referencia = numero_calibracao / _cronometrar(calibracao, (), numero_calibracao)
+        ops_s = numero / _cronometrar(funcao, argumentos, numero)
+        melhor = max(melhor, ops_s)
+        razoes.append(ops_s / referencia)
+    return melhor, statistics.median(razoes)
+
+
+def calibracao() -> list:
+    """
+    Laço fixo de Python puro (dicts, strings e listas, como os casos), que
+    não depende do código do repositório. A vazão dos casos é dividida pela
+    dele para descontar a velocidade da máquina e a carga do momento.
+    """
+    registros = [{"id": i, "texto": f"item {i};"} for i in range(200)]
+    return [registro["texto"].replace(";", "\n").upper() for registro in registros if registro["id"] % 3]
+
+
+def alocacao(funcao, argumentos: tuple) -> dict:
+    """Pico de memória alocada durante uma chamada e quanto fica retido no resultado."""
+    tracemalloc.start()
+    try:
+        antes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        resultado = funcao(*argumentos)
+        depois, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del resultado
+    return {"pico_bytes": pico - antes, "retido_bytes": depois - antes}
+
+
+def main():
+    servico = sys.argv[1]
+    tempo_minimo = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    rodadas = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    # Os logs de cada chamada não fazem parte do que se quer medir
+    logging.disable(logging.CRITICAL)
+
+    resultados = {}
+    for caso in CASOS[servico]:
+        funcao = caso.montar(importlib.import_module(caso.modulo))
+        argumentos = caso.argumentos()
+        ops_s, relativo = vazao(funcao, argumentos, tempo_minimo, rodadas)
+        resultados[caso.nome] = {
+            "ops_s": round(ops_s, 2),
+            "relativo": round(relativo, 6),
+            **alocacao(funcao, argumentos),
+        }
+    json.dump(resultados, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import random
+
+_PALAVRAS = (
+    "intimação", "processo", "sentença", "recurso", "agravo", "apelação", "réu", "autor",
+    "advogado", "prazo", "publicação", "despacho", "decisão", "ação", "execução", "fiscal",
+)
+
+# Tamanhos de publicação observados: a maioria cabe numa propriedade, mas
+# acórdãos e editais passam de 200 mil caracteres.
+PUBLICACAO_CURTA = 3_000
+PUBLICACAO_LONGA = 250_000
+
+
+def texto(tamanho: int, seed: int = 0) -> str:
+    """Texto com acentos e ';' no formato das publicações do Diário."""
+    rnd = random.Random(seed)
+    partes = []
+    total = 0
+    while total < tamanho:
+        palavra = rnd.choice(_PALAVRAS)
+        if rnd.random() < 0.05:
+            palavra += ";"
+        partes.append(palavra)
+        total += len(palavra) + 1
+    return " ".join(partes)[:tamanho]
+
+
+def intimacao(tamanho_publicacao: int = PUBLICACAO_CURTA, seed: int = 0) -> dict:
+    """Intimação no formato retornado pela API da AASP."""
+    return {
+        "termoReferenciaData": "Disponibilização: 10/12/2024",
+        "titulo": "Intimação de Sentença",
+        "cabecalho": "PODER JUDICIÁRIO - TRIBUNAL DE JUSTIÇA DO ESTADO DE SÃO PAULO",
+        "textoPublicacao": texto(tamanho_publicacao, seed),
+        "rodape": "Advogado: Fulano de Tal (OAB 123456/SP)",
+        "numeroUnicoProcesso": f"{1000000 + seed:07d}-12.2024.8.26.0100",
+        "numeroPublicacao": 100000 + seed,
+        "numeroArquivo": 1200 + seed % 7,
+        "codigoRelacionamento": 500000 + seed,
+        "jornal": {
+            "nomeJornal": "DJE - SP",
+            "dataTratamento": "2024-12-10",
+            "dataDisponibilizacao_Publicacao": "2024-12-10",
+        },
+    }
+
+
+def intimacoes(quantidade: int = 200, tamanho_publicacao: int = PUBLICACAO_CURTA) -> list:
+    return [intimacao(tamanho_publicacao, seed) for seed in range(quantidade)]
+
+
+def valores_para_normalizar(quantidade: int = 100, seed: int = 0) -> list:
+    """Chaves de acesso, códigos e tipos como digitados no banco de matrículas."""
+    rnd = random.Random(seed)
+    modelos = ("  Empresa ", "ASSOCIADO", "Associação São João", "Código: 12.345-6", "33F2-7778-5828/44DE ção")
+    return [rnd.choice(modelos) + f" {rnd.randint(0, 99999)}" for _ in range(quantidade)]
+
+
+def _rich_text(conteudo: str) -> dict:
+    return {"rich_text": [{"text": {"content": conteudo}}]}
+
+
+def resultados_notion(quantidade: int = 1000, seed: int = 0) -> list:
+    """Registros do banco de matrículas, todos preenchidos (o pior caso de validar_dados)."""
+    rnd = random.Random(seed)
+    return [
+        {
+            "id": f"{i:032x}",
+            "last_edited_time": "2024-12-10T12:00:00.000Z",
+            "properties": {
+                "Chave de Acesso": _rich_text(f"{rnd.getrandbits(128):032X}"),
+                "Código AASP": _rich_text(str(rnd.randint(10000, 99999))),
+                "Tipo": _rich_text("empresa" if i % 2 else "associado"),
+            },
+        }
+        for i in range(quantidade)
+    ]
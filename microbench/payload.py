@@ -0,0 +1,82 @@
+"""Montagem de payloads do Notion: implementação atual x anterior; cwd em ``PROCESs/app``."""
+import argparse
+import json
+import re
+import timeit
+
+from microbench.fixtures import intimacoes
+from services.notion.payload import PayloadBuilder
+from utils.serializacao import loads
+
+
+def formatar_dados_para_notion_legado(dados_json: dict) -> dict:
+    """Cópia da implementação anterior, usada como referência."""
+    def dividir_texto_em_blocos(texto: str, limite: int = 2000) -> list:
+        return [texto[i:i + limite] for i in range(0, len(texto), limite)]
+
+    publicacao = (
+        f"{dados_json.get('termoReferenciaData', '')} "
+        f"{dados_json.get('titulo', '')} "
+        f"{dados_json.get('cabecalho', '')} "
+        f"{dados_json.get('textoPublicacao', '')} "
+        f"{dados_json.get('rodape', '')}"
+    ).strip()
+
+    publicacao_formatada = re.sub(r";", r"\n", publicacao)
+    blocos_publicacao = dividir_texto_em_blocos(publicacao_formatada)
+
+    publicacao_rich_text = [{"text": {"content": bloco}} for bloco in blocos_publicacao]
+
+    return {
+        "Jornal": {"title": [{"text": {"content": dados_json.get('jornal', {}).get('nomeJornal', 'Sem Nome')}}]},
+        "Tratado em": {"date": {"start": dados_json.get('jornal', {}).get('dataTratamento')}},
+        "Disponibilização": {"date": {"start": dados_json.get('jornal', {}).get('dataDisponibilizacao_Publicacao')}},
+        "Nº do Processo": {"rich_text": [{"text": {"content": dados_json.get('numeroUnicoProcesso', 'Sem Processo')}}]},
+        "Publicação": {"rich_text": publicacao_rich_text},
+        "Título": {"rich_text": [{"text": {"content": dados_json.get('titulo', 'Sem Título')}}]},
+        "Cabeçalho": {"rich_text": [{"text": {"content": dados_json.get('cabecalho', 'Sem Cabeçalho')}}]},
+        "Rodapé": {"rich_text": [{"text": {"content": dados_json.get('rodape') or 'Sem Rodapé'}}]},
+        "Nº Publicação": {"number": dados_json.get('numeroPublicacao')},
+        "Nº Arquivo": {"number": dados_json.get('numeroArquivo')},
+        "Cod Relacionamento": {"number": dados_json.get('codigoRelacionamento')}
+    }
+
+
+def payload_legado(intimacao: dict, notion_database_id: str) -> bytes:
+    # httpx serializa o argumento json= com json.dumps padrão
+    payload = {
+        "parent": {"database_id": notion_database_id},
+        "properties": formatar_dados_para_notion_legado(intimacao)
+    }
+    return json.dumps(payload).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a montagem de payloads do Notion.")
+    parser.add_argument("--quantidade", type=int, default=200)
+    parser.add_argument("--tamanho", type=int, default=3000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    dados = intimacoes(args.quantidade, args.tamanho)
+    database_id = "0" * 32
+    builder = PayloadBuilder(database_id)
+
+    for intimacao in dados:
+        if loads(builder.pagina(intimacao)[0]) != json.loads(payload_legado(intimacao, database_id)):
+            raise SystemExit("Payload divergente da implementação anterior.")
+
+    legado = min(timeit.repeat(
+        lambda: [payload_legado(i, database_id) for i in dados], number=1, repeat=args.repeticoes
+    ))
+    novo = min(timeit.repeat(
+        lambda: [builder.pagina(i) for i in dados], number=1, repeat=args.repeticoes
+    ))
+
+    print(f"legado: {args.quantidade / legado:,.0f} payloads/s")
+    print(f"novo:   {args.quantidade / novo:,.0f} payloads/s")
+    print(f"ganho:  {legado / novo:.2f}x")
+
+
+if __name__ == "__main__":
+    main()